@@ -1,6 +1,6 @@
 {
     "name": "Bluemax - AI Product Details Generator",
-    "version": "1.0",
+    "version": "1.1",
     "depends": ["base", "product", "stock", "motorstate_integration"],
     "category": "Productivity",
     "summary": "Generate product fields using AI (OpenAI GPT)",
@@ -10,8 +10,15 @@
          "views/ai_generated_fields_wizard_view.xml",
          "views/ai_generated_fields_multiple_views.xml",
          "data/ai_spec_option.xml",
+         "data/ir_cron.xml",
+         "views/ai_generation_job_views.xml",
+         "views/ai_rate_limit_views.xml",
+         "views/ai_generation_log_views.xml",
+         "views/ai_response_cache_views.xml",
+         "views/ai_generation_route_views.xml",
+         "views/ai_feed_export_views.xml",
          "views/ai_generated_fields_wizard_view.xml",
-        #  "views/motorstate_product_actions.xml",
+         "views/motorstate_product_actions.xml",
     ],
     "installable": True,
     "application": False,
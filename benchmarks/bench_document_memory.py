@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""Peak RSS of hashing and uploading a large supporting document, field value vs filestore stream.
+
+Builds a synthetic PDF, then runs each approach in a fresh interpreter so the peak
+resident set size of one does not hide the other. Runs without Odoo:
+
+    python benchmarks/bench_document_memory.py [size_mb]
+
+``legacy`` mirrors the former wizard code: the ``attachment=True`` field value is the
+base64 encoded file, which is decoded into memory, hashed and wrapped in a ``BytesIO``
+for the upload. ``streamed`` opens the filestore file and reads it in chunks, which is
+what ``ir.attachment._open_content`` hands to the document cache. With pdfplumber
+installed, ``--index`` also measures the local index build from the open file.
+"""
+import base64
+import hashlib
+import importlib.util
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+_here = os.path.dirname(os.path.abspath(__file__))
+
+
+def _load_tool(name):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(_here, os.pardir, 'tools', name + '.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+file_stream = _load_tool('file_stream')
+
+UPLOAD_CHUNK = 64 * 1024  # httpx reads multipart file fields in blocks of this size
+PAGE_LINES = 400
+
+
+def make_pdf(path, size_mb):
+    """Write a valid text-only PDF of roughly ``size_mb`` megabytes."""
+    line = b"(PN-%06d  Brake Rotor Assembly 12.5 in vented, fits 2015-2020 models) Tj T* "
+    page_stream = [b"BT /F1 9 Tf 36 800 Td 11 TL "]
+    page_stream += [line % i for i in range(PAGE_LINES)]
+    page_stream.append(b"ET")
+    content = b"\n".join(page_stream)
+    pages = max(int(size_mb * 1024 * 1024 / len(content)), 1)
+
+    offsets = []
+    with open(path, 'wb') as fh:
+        def obj(body):
+            offsets.append(fh.tell())
+            fh.write(b"%d 0 obj\n" % len(offsets) + body + b"\nendobj\n")
+
+        fh.write(b"%PDF-1.4\n")
+        kids = b" ".join(b"%d 0 R" % (4 + 2 * i) for i in range(pages))
+        obj(b"<< /Type /Catalog /Pages 2 0 R >>")
+        obj(b"<< /Type /Pages /Count %d /Kids [%s] >>" % (pages, kids))
+        obj(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+        for i in range(pages):
+            obj(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (5 + 2 * i))
+            obj(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+        xref = fh.tell()
+        fh.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(offsets) + 1))
+        fh.writelines(b"%010d 00000 n \n" % offset for offset in offsets)
+        fh.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(offsets) + 1, xref))
+    return pages
+
+
+def _upload(fileobj):
+    """Stand-in for the multipart upload: consume the file the way httpx does."""
+    for _chunk in file_stream.iter_chunks(fileobj, UPLOAD_CHUNK):
+        pass
+
+
+def run_legacy(path):
+    with open(path, 'rb') as fh:
+        field_value = base64.b64encode(fh.read())  # what reading doc_attachment returns
+    file_data = base64.b64decode(field_value)
+    checksum = hashlib.sha256(file_data).hexdigest()
+    _upload(BytesIO(file_data))
+    return checksum
+
+
+def run_streamed(path):
+    with open(path, 'rb') as fh:
+        checksum = file_stream.hash_file(fh)
+        _upload(fh)
+    return checksum
+
+
+def run_index(path):
+    doc_index = _load_tool('doc_index')
+    with open(path, 'rb') as fh:
+        checksum = file_stream.hash_file(fh)
+        index = doc_index.DocumentIndex.build(doc_index.iter_passages(doc_index.iter_pages(fh, path)))
+    return "%s (%d passages)" % (checksum, len(index.passages))
+
+
+MODES = {'legacy': run_legacy, 'streamed': run_streamed, 'index': run_index}
+
+
+def child(mode, path):
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.perf_counter()
+    result = MODES[mode](path)
+    elapsed = time.perf_counter() - t0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KB on Linux
+    print("%-9s peak RSS +%7.1f MB (total %7.1f MB) in %.2f s  %s"
+          % (mode, (peak - before) / 1024, peak / 1024, elapsed, result[:16]))
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        return child(sys.argv[2], sys.argv[3])
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    size_mb = float(args[0]) if args else 150
+    modes = ['legacy', 'streamed'] + (['index'] if '--index' in sys.argv else [])
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'catalogue.pdf')
+        pages = make_pdf(path, size_mb)
+        print("document: %.1f MB, %d pages" % (os.path.getsize(path) / 1024 / 1024, pages))
+        for mode in modes:
+            subprocess.run([sys.executable, os.path.abspath(__file__), '--child', mode, path], check=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+"""End to end throughput of the generation wizards, the template push and the list computes.
+
+Run inside an Odoo shell on a scratch database with the module installed:
+
+    BENCH_SIZES=10,1000,10000 odoo-bin shell -d <db> < benchmarks/bench_generation.py
+
+``env`` is provided by the shell. OpenAI is replaced by benchmarks/mock_openai_server.py,
+started in a subprocess with the options in ``BENCH_MOCK_ARGS`` (for instance
+``--latency 0.3 --chunk-size 16 --error-rate 0.02``), unless ``BENCH_OPENAI_URL`` points
+at a server already running. The wizards commit, so synthetic ``BENCH-`` products are
+created for real and deleted at the end, and the configuration parameters touched
+are restored.
+
+For every scenario it prints products/min, SQL queries and commits (all cursors,
+worker threads included), time spent in the streamed JSON parser and the growth of
+the peak RSS of the process. ``BENCH_TRACEMALLOC=1`` adds the peak Python allocation
+of each scenario, at a noticeable speed cost. ``BENCH_SINGLE_MAX`` caps the number
+of single-product wizard runs per size (default: all rows). ``BENCH_DOCUMENT`` adds a
+sequential run with that supporting document, which goes through the mocked Files and
+Vector Store endpoints. The Batch API scenario submits, polls and ingests a batch
+through the mocked Files and Batches endpoints, and reports the ingested and failed
+counts (``--batch-error-rate`` in ``BENCH_MOCK_ARGS`` exercises the error file).
+
+Cached input tokens stay at zero in the mock statistics with the default prompt: the
+stable instructions are about 200 tokens, below the 1024 token minimum of prefix
+caching (see tools/prompt_builder); only wizards run with a long global prompt or
+many required specifications get cached prefixes.
+"""
+import base64
+import json
+import os
+import random
+import resource
+import shlex
+import socket
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+import urllib.request
+
+import odoo.sql_db
+from odoo.modules.module import get_module_path
+from odoo.addons.ai_field_generator.tools import json_stream
+
+SIZES = [int(s) for s in os.environ.get('BENCH_SIZES', '10,1000,10000').split(',') if s]
+SINGLE_MAX = int(os.environ.get('BENCH_SINGLE_MAX', 0)) or None
+TRACE = os.environ.get('BENCH_TRACEMALLOC') == '1'
+DOCUMENT = os.environ.get('BENCH_DOCUMENT')
+BRANDS = ('ACME', 'Brembo', 'Bosch', 'Dorman', 'Moog', 'Monroe', 'Denso')
+PREFIX = 'BENCH-'
+
+# -- counters ---------------------------------------------------------------
+
+counters = {'queries': 0, 'commits': 0, 'parse': 0.0}
+_counter_lock = threading.Lock()
+_execute = odoo.sql_db.Cursor.execute
+_commit = odoo.sql_db.Cursor.commit
+_feed = json_stream.JsonStreamParser.feed
+
+
+def counting_execute(self, *args, **kwargs):
+    with _counter_lock:
+        counters['queries'] += 1
+    return _execute(self, *args, **kwargs)
+
+
+def counting_commit(self, *args, **kwargs):
+    with _counter_lock:
+        counters['commits'] += 1
+    return _commit(self, *args, **kwargs)
+
+
+def timed_feed(self, text):
+    start = time.perf_counter()
+    try:
+        return _feed(self, text)
+    finally:
+        with _counter_lock:
+            counters['parse'] += time.perf_counter() - start
+
+
+def max_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(label, rows, func):
+    env.invalidate_all()
+    with _counter_lock:
+        counters.update(queries=0, commits=0, parse=0.0)
+    rss = max_rss_mb()
+    if TRACE:
+        tracemalloc.reset_peak()
+    start = time.perf_counter()
+    error = None
+    try:
+        func()
+        env.flush_all()
+    except Exception as e:
+        env.cr.rollback()
+        error = e
+    elapsed = time.perf_counter() - start
+    line = ("%-30s %6d rows %9.1f prod/min %8.2f s %8d queries %5d commits %7.3f s parse %+7.1f MB RSS"
+            % (label, rows, rows / elapsed * 60 if elapsed else 0, elapsed,
+               counters['queries'], counters['commits'], counters['parse'], max_rss_mb() - rss))
+    if TRACE:
+        line += " %7.1f MB py peak" % (tracemalloc.get_traced_memory()[1] / 1024 / 1024)
+    if error:
+        line += "  FAILED: %s" % error
+    print(line, flush=True)
+
+
+# -- mock server and configuration --------------------------------------------
+
+def start_mock():
+    url = os.environ.get('BENCH_OPENAI_URL')
+    if url:
+        return url, None
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    script = os.path.join(get_module_path('ai_field_generator'), 'benchmarks', 'mock_openai_server.py')
+    args = shlex.split(os.environ.get('BENCH_MOCK_ARGS', ''))
+    process = subprocess.Popen([sys.executable, script, '--port', str(port)] + args, stdout=subprocess.DEVNULL)
+    url = 'http://127.0.0.1:%s/v1' % port
+    for _attempt in range(50):
+        try:
+            urllib.request.urlopen(url.rsplit('/v1', 1)[0] + '/_stats', timeout=1).read()
+            break
+        except OSError:
+            time.sleep(0.1)
+    return url, process
+
+
+def mock_stats(url):
+    """Request and error counts of the mock server since the previous call."""
+    base = url.rsplit('/v1', 1)[0]
+    with urllib.request.urlopen(base + '/_stats') as response:
+        stats = json.loads(response.read())
+    urllib.request.urlopen(urllib.request.Request(base + '/_reset', data=b'', method='POST')).read()
+    return stats
+
+
+BENCH_PARAMS = {
+    'ai_field_generator.rate_limit_rpm': '0',
+    'ai_field_generator.rate_limit_tpm': '0',
+    'ai_field_generator.http_max_retries': '6',
+}
+
+
+def configure(url):
+    ICP = env['ir.config_parameter'].sudo()
+    params = dict(BENCH_PARAMS, **{'ai_field_generator.openai_base_url': url})
+    if not ICP.get_param('openai_api_key'):
+        params['openai_api_key'] = 'bench'
+    saved = {key: ICP.get_param(key) for key in params}
+    for key, value in params.items():
+        ICP.set_param(key, value)
+    env.cr.commit()
+    return saved
+
+
+def restore(saved):
+    ICP = env['ir.config_parameter'].sudo()
+    for key, value in saved.items():
+        ICP.set_param(key, value or False)
+    env.cr.commit()
+
+
+# -- dataset ------------------------------------------------------------------
+
+def create_dataset(size):
+    rnd = random.Random(size)
+    templates = env['product.template'].create([
+        {'name': 'Bench Part %06d' % i, 'default_code': '%s%06d' % (PREFIX, i)}
+        for i in range(size)
+    ])
+    products = env['motorstate.product'].create([{
+        'part_number': '%s%06d' % (PREFIX, i),
+        'part_name': 'Bench Part %06d' % i,
+        'part_brand': rnd.choice(BRANDS),
+        'part_length': rnd.randint(1, 40),
+        'part_width': rnd.randint(1, 40),
+        'part_height': rnd.randint(1, 40),
+        'part_description': 'Synthetic part used by the generation benchmark. ' * 4,
+        'categ_lvl_1': 'Brakes',
+        'categ_lvl_2': rnd.choice(('Rotors', 'Pads', 'Calipers')),
+        'categ_lvl_3': 'Front',
+        'product_temp_id': template.id,
+    } for i, template in enumerate(templates)])
+    env.cr.commit()
+    return products
+
+
+def drop_dataset():
+    products = env['motorstate.product'].search([('part_number', '=like', PREFIX + '%')])
+    env['ai.response.cache'].sudo().search([('product_id', 'in', products.ids)]).unlink()
+    env['ai.generation.batch'].search([('product_ids', 'in', products.ids)]).unlink()
+    env['ai.generation.log'].sudo().search([('product_id', 'in', products.ids)]).unlink()
+    env['motorstate.spec'].search([('product_id', 'in', products.ids)]).unlink()
+    products.unlink()
+    env['product.template'].search([('default_code', '=like', PREFIX + '%')]).unlink()
+    env.cr.commit()
+
+
+# -- scenarios ------------------------------------------------------------------
+
+CONTENT_FLAGS = {
+    'generate_title': True,
+    'generate_description': True,
+    'generate_keywords': True,
+    'generate_disclaimer': True,
+    'generate_shortDesc': True,
+    'generate_specifications': True,
+}
+
+
+def run_multiple(products, **options):
+    wizard = env['ai.generated.fields.multiple'].create(dict(
+        CONTENT_FLAGS,
+        product_ids=[(6, 0, products.ids)],
+        required_spec_option_ids=[(6, 0, env['ai.spec.option'].search([], limit=3).ids)],
+        force_refresh=True,
+        **options
+    ))
+    return wizard.action_generate_ai_fields_multiple()
+
+
+def run_batch(products):
+    """Submit, poll and ingest one Batch API run over ``products``, as the cron would."""
+    action = run_multiple(products, run_mode='batch')
+    batch = env['ai.generation.batch'].browse(action['res_id'])
+    batch.action_submit()
+    env.cr.commit()
+    while batch.state == 'submitted':
+        batch.action_poll()
+        env.cr.commit()
+        if batch.state == 'submitted':
+            time.sleep(0.2)
+    print("batch: %s, %d ingested, %d failed" % (batch.state, batch.ingested_count, batch.failed_count), flush=True)
+
+
+def run_single(products):
+    Wizard = env['ai.generated.fields.wizard']
+    for product in products:
+        Wizard.create(dict(CONTENT_FLAGS, product_id=product.id, force_refresh=True)).action_generate_ai_fields()
+
+
+def main():
+    if TRACE:
+        tracemalloc.start()
+    odoo.sql_db.Cursor.execute = counting_execute
+    odoo.sql_db.Cursor.commit = counting_commit
+    json_stream.JsonStreamParser.feed = timed_feed
+    url, process = start_mock()
+    saved = configure(url)
+    print("mock OpenAI server: %s" % url)
+    try:
+        drop_dataset()
+        for size in SIZES:
+            products = None
+
+            def create():
+                nonlocal products
+                products = create_dataset(size)
+
+            measure("create dataset", size, create)
+            Product = env['motorstate.product']
+            measure("compute hide_update_btn", size, lambda: Product.browse(products.ids)._compute_hide_update_btn())
+            measure("compute product_created", size, lambda: Product.browse(products.ids)._compute_product_created())
+            measure("recompute ai_fields_generated", size,
+                    lambda: Product.browse(products.ids)._recompute_ai_fields_generated())
+            measure("multiple: sequential", size, lambda: run_multiple(products, run_mode='sequential'))
+            measure("multiple: sequential packed", size,
+                    lambda: run_multiple(products, run_mode='sequential', pack_products=True))
+            measure("multiple: concurrent", size, lambda: run_multiple(products, run_mode='concurrent'))
+            measure("multiple: batch API", size, lambda: run_batch(products))
+            if DOCUMENT:
+                with open(DOCUMENT, 'rb') as fh:
+                    document = base64.b64encode(fh.read())
+                measure("multiple: sequential + document", size, lambda: run_multiple(
+                    products, run_mode='sequential', doc_attachment=document,
+                    doc_filename=os.path.basename(DOCUMENT)))
+            single = products[:SINGLE_MAX] if SINGLE_MAX else products
+            measure("single-product wizard", len(single), lambda: run_single(single))
+            measure("action_create_products_from_data", size,
+                    lambda: Product.browse(products.ids).action_create_products_from_data())
+            print("mock server: %s" % mock_stats(url), flush=True)
+            drop_dataset()
+    finally:
+        odoo.sql_db.Cursor.execute = _execute
+        odoo.sql_db.Cursor.commit = _commit
+        json_stream.JsonStreamParser.feed = _feed
+        restore(saved)
+        if process:
+            process.terminate()
+
+
+main()
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""Per-chunk cost of the streamed JSON parser against the old rescan-the-buffer approach.
+
+Runs without Odoo:
+
+    python benchmarks/bench_json_stream.py [total_kb] [chunk_size]
+"""
+import importlib.util
+import json
+import os
+import statistics
+import sys
+import time
+
+_here = os.path.dirname(os.path.abspath(__file__))
+_spec = importlib.util.spec_from_file_location(
+    'json_stream', os.path.join(_here, os.pardir, 'tools', 'json_stream.py'))
+json_stream = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(json_stream)
+
+
+def legacy_extract(text):
+    """Copy of the former ``_extract_json_objects``: scans the whole buffer every time."""
+    objs = []
+    stack = 0
+    start = None
+    in_str = False
+    esc = False
+    for i, ch in enumerate(text):
+        if ch == '"' and not esc:
+            in_str = not in_str
+        esc = (ch == '\\' and not esc)
+        if in_str:
+            continue
+        if ch == '{':
+            if stack == 0:
+                start = i
+            stack += 1
+        elif ch == '}' and stack:
+            stack -= 1
+            if stack == 0 and start is not None:
+                try:
+                    objs.append(json.loads(text[start:i + 1]))
+                except json.JSONDecodeError:
+                    pass
+                start = None
+    return objs
+
+
+def make_stream(total_kb):
+    """One large product object, as returned for a single product with many specifications."""
+    specs = {}
+    i = 0
+    obj = {'part_number': 'BENCH-1', 'product_title': 'Bench Part', 'specifications': specs}
+    while len(json.dumps(obj)) < total_kb * 1024:
+        specs['Spec %d' % i] = 'Value with "quotes" and {braces} %d' % i
+        i += 1
+    return json.dumps(obj, indent=2)
+
+
+def run(feed, text, chunk_size):
+    """Return the median per-chunk time (seconds) over the first and last tenth of the stream, and the total."""
+    timings = []
+    for pos in range(0, len(text), chunk_size):
+        t0 = time.perf_counter()
+        feed(text[pos:pos + chunk_size])
+        timings.append(time.perf_counter() - t0)
+    tenth = max(len(timings) // 10, 1)
+    return statistics.median(timings[:tenth]), statistics.median(timings[-tenth:]), sum(timings)
+
+
+def main():
+    total_kb = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    text = make_stream(total_kb)
+    print("stream: %d KB in %d-char chunks (%d chunks)" % (len(text) // 1024, chunk_size, len(text) // chunk_size + 1))
+
+    parser = json_stream.JsonStreamParser()
+    first, last, total = run(parser.feed, text, chunk_size)
+    print("incremental parser: first %.2f us/chunk, last %.2f us/chunk, total %.3f s"
+          % (first * 1e6, last * 1e6, total))
+
+    buffer = ['']
+
+    def legacy_feed(chunk):
+        buffer[0] += chunk
+        legacy_extract(buffer[0])
+
+    first, last, total = run(legacy_feed, text, chunk_size)
+    print("legacy rescan:      first %.2f us/chunk, last %.2f us/chunk, total %.3f s"
+          % (first * 1e6, last * 1e6, total))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""Query count and time of the motorstate.product list computes, before and after batching.
+
+Run inside an Odoo shell on a database with the module installed:
+
+    odoo-bin shell -d <db> < benchmarks/bench_motorstate_computes.py
+
+``env`` is provided by the shell. Nothing is committed.
+"""
+import time
+
+LIMITS = (100, 1000, 5000)
+
+
+def legacy_hide_update_btn(records):
+    for record in records:
+        product = env['product.template'].search([('default_code', '=', record.part_number)], limit=1)
+        record.hide_update_btn = not bool(product)
+
+
+def legacy_product_created(records):
+    for record in records:
+        product = env['product.template'].search([('id', '=', record.product_temp_id.id)], limit=1)
+        record.product_created = True if product else False
+
+
+def measure(label, func, records):
+    env.invalidate_all()
+    queries = env.cr.sql_log_count
+    start = time.perf_counter()
+    func(records)
+    env.flush_all()
+    print("%-32s %6d records  %6d queries  %8.3f s"
+          % (label, len(records), env.cr.sql_log_count - queries, time.perf_counter() - start))
+
+
+def list_view_read(records):
+    records.with_context(bin_size=True).read(['part_number', 'part_brand', 'hide_update_btn',
+                                              'product_created', 'ai_fields_generated'])
+
+
+Product = env['motorstate.product']
+for limit in LIMITS:
+    records = Product.search([], limit=limit)
+    measure("legacy hide_update_btn", legacy_hide_update_btn, records)
+    measure("batched hide_update_btn", lambda recs: recs._compute_hide_update_btn(), records)
+    measure("legacy product_created", legacy_product_created, records)
+    measure("batched product_created", lambda recs: recs._compute_product_created(), records)
+    measure("list view read (stored)", list_view_read, records)
+env.cr.rollback()
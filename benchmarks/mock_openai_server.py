@@ -0,0 +1,419 @@
+# -*- coding: utf-8 -*-
+"""Local stand-in for the OpenAI endpoints used by the module, for benchmarks.
+
+Serves the Responses API (plain and streamed), Files, Vector Stores and Batches
+with generated content that matches the requested JSON schema, so the wizards and
+the Batch API mode run end to end without network or cost. Prompt prefixes seen
+before are reported as cached tokens and answered faster, like OpenAI's prefix
+caching. Standard library only:
+
+    python benchmarks/mock_openai_server.py --port 8765 --latency 0.5 --chunk-size 24 --error-rate 0.02
+
+then set the ``ai_field_generator.openai_base_url`` parameter to ``http://127.0.0.1:8765/v1``.
+``GET /_stats`` returns request and error counts, ``POST /_reset`` clears them.
+A batch completes ``--batch-delay`` seconds after it is created; ``--batch-error-rate``
+of its requests go to the error file instead of the output file.
+"""
+import argparse
+import email.parser
+import email.policy
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = ("premium durable steel aluminum direct fit replacement performance heavy duty "
+         "corrosion resistant precision engineered OEM quality easy installation kit "
+         "assembly rotor caliper bracket sensor gasket bolt seal hose valve pump").split()
+
+_PART_RE = re.compile(r"Part Number:\s*([^\n]*)")
+# Prefix caching as OpenAI reports it: from 1024 tokens on, in blocks of 128 (about 4 characters a token)
+CACHE_BLOCK_CHARS = 128 * 4
+CACHE_MIN_CHARS = 1024 * 4
+
+
+class MockState:
+
+    def __init__(self, options):
+        self.options = options
+        self.lock = threading.Lock()
+        self.counts = {}
+        self.errors = 0
+        self.tokens = {'input': 0, 'cached': 0}
+        self.prefixes = set()
+        self.files = {}
+        self.batches = {}
+        self.random = random.Random(options.seed)
+
+    def count(self, key):
+        with self.lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def should_fail(self):
+        with self.lock:
+            fail = self.random.random() < self.options.error_rate
+            if fail:
+                self.errors += 1
+            return fail
+
+    def batch_line_fails(self):
+        with self.lock:
+            return self.random.random() < self.options.batch_error_rate
+
+    def add_file(self, content):
+        file_id = 'file-%s' % uuid.uuid4().hex
+        with self.lock:
+            self.files[file_id] = content
+        return file_id
+
+    def cached_chars(self, prompt):
+        """Length of the longest block aligned prefix of ``prompt`` already seen, remembering its own."""
+        hashes = [hashlib.sha1(prompt[:end].encode()).digest()
+                  for end in range(CACHE_BLOCK_CHARS, len(prompt) + 1, CACHE_BLOCK_CHARS)]
+        with self.lock:
+            cached = 0
+            for index, digest in enumerate(hashes, 1):
+                if digest not in self.prefixes:
+                    break
+                cached = index * CACHE_BLOCK_CHARS
+            self.prefixes.update(hashes)
+        return cached if cached >= CACHE_MIN_CHARS else 0
+
+    def count_tokens(self, usage):
+        with self.lock:
+            self.tokens['input'] += usage['input_tokens']
+            self.tokens['cached'] += usage['input_tokens_details']['cached_tokens']
+
+    def stats(self):
+        with self.lock:
+            return {'requests': dict(self.counts), 'errors': self.errors, 'input_tokens': dict(self.tokens)}
+
+    def reset(self):
+        with self.lock:
+            self.counts.clear()
+            self.errors = 0
+            self.tokens = {'input': 0, 'cached': 0}
+
+
+def _text(seed, words):
+    rnd = random.Random(hashlib.md5(seed.encode()).hexdigest())
+    return " ".join(rnd.choice(WORDS) for _i in range(words)).capitalize()
+
+
+def fake_value(schema, part_number, name, options):
+    """Value conforming to ``schema`` for product ``part_number``."""
+    kind = schema.get('type')
+    if kind == 'object':
+        value = {}
+        for key, sub in (schema.get('properties') or {}).items():
+            value[key] = part_number if key == 'part_number' else fake_value(sub, part_number, key, options)
+        if schema.get('additionalProperties') not in (None, False):
+            for i in range(options.extra_specs):
+                value['Spec %d' % i] = 'Spec %d: %s' % (i, _text(part_number + str(i), 2))
+        return value
+    if kind == 'array':
+        return [fake_value(schema.get('items') or {}, part_number, name, options)]
+    if name in ('ecom_description',):
+        return _text(part_number + name, options.description_words)
+    if name and name[0].isupper():
+        return "%s: %s" % (name, _text(part_number + name, 2))
+    return _text(part_number + (name or ''), 8)
+
+
+def fake_content(body, options):
+    """JSON text answering a Responses API request body."""
+    schema = ((body.get('text') or {}).get('format') or {}).get('schema') or {'type': 'object', 'properties': {}}
+    prompt = body.get('input') if isinstance(body.get('input'), str) else json.dumps(body.get('input'))
+    part_numbers = [p.strip() for p in _PART_RE.findall(prompt or '')] or ['UNKNOWN']
+    products = (schema.get('properties') or {}).get('products')
+    if products:
+        items = products.get('items') or {}
+        return json.dumps({'products': [fake_value(items, pn, None, options) for pn in part_numbers]})
+    return json.dumps(fake_value(schema, part_numbers[0], None, options))
+
+
+def response_object(body, text, status='completed', cached_chars=0):
+    output = []
+    for tool in body.get('tools') or []:
+        if tool.get('type', '').startswith('web_search'):
+            output.append({'type': 'web_search_call', 'id': 'ws_%s' % uuid.uuid4().hex[:12], 'status': 'completed'})
+        elif tool.get('type') == 'file_search':
+            output.append({'type': 'file_search_call', 'id': 'fs_%s' % uuid.uuid4().hex[:12],
+                           'status': 'completed', 'queries': []})
+    output.append({
+        'type': 'message',
+        'id': 'msg_%s' % uuid.uuid4().hex[:12],
+        'role': 'assistant',
+        'status': 'completed',
+        'content': [{'type': 'output_text', 'text': text, 'annotations': []}],
+    })
+    input_tokens = len(json.dumps(body.get('input'))) // 4
+    cached_tokens = min(cached_chars // 4, input_tokens)
+    output_tokens = len(text) // 4
+    return {
+        'id': 'resp_%s' % uuid.uuid4().hex,
+        'object': 'response',
+        'created_at': int(time.time()),
+        'status': status,
+        'model': body.get('model'),
+        'output': output,
+        'parallel_tool_calls': True,
+        'tool_choice': 'auto',
+        'tools': body.get('tools') or [],
+        'usage': {
+            'input_tokens': input_tokens,
+            'input_tokens_details': {'cached_tokens': cached_tokens},
+            'output_tokens': output_tokens,
+            'output_tokens_details': {'reasoning_tokens': 0},
+            'total_tokens': input_tokens + output_tokens,
+        },
+    }
+
+
+def run_batch(state, body):
+    """Answer every request of the batch input file at once; returns the batch object."""
+    options = state.options
+    now = int(time.time())
+    output, errors = [], []
+    for line in (state.files.get(body.get('input_file_id')) or b'').splitlines():
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        result = {'id': 'batch_req_%s' % uuid.uuid4().hex, 'custom_id': request.get('custom_id'), 'error': None}
+        if state.batch_line_fails():
+            result['response'] = {'status_code': 500, 'request_id': 'req_%s' % uuid.uuid4().hex, 'body': {
+                'error': {'message': 'Mock batch failure', 'type': 'server_error', 'code': None}}}
+            errors.append(result)
+        else:
+            request_body = request.get('body') or {}
+            response = response_object(request_body, fake_content(request_body, options))
+            state.count_tokens(response['usage'])
+            result['response'] = {'status_code': 200, 'request_id': 'req_%s' % uuid.uuid4().hex, 'body': response}
+            output.append(result)
+
+    def jsonl(results):
+        return b''.join(json.dumps(result).encode() + b'\n' for result in results)
+
+    return {
+        'id': 'batch_%s' % uuid.uuid4().hex,
+        'object': 'batch',
+        'endpoint': body.get('endpoint'),
+        'errors': None,
+        'input_file_id': body.get('input_file_id'),
+        'completion_window': body.get('completion_window'),
+        'status': 'in_progress',
+        'output_file_id': state.add_file(jsonl(output)) if output else None,
+        'error_file_id': state.add_file(jsonl(errors)) if errors else None,
+        'created_at': now,
+        'in_progress_at': now,
+        'expires_at': now + 24 * 3600,
+        'completed_at': None,
+        'request_counts': {'total': len(output) + len(errors), 'completed': len(output), 'failed': len(errors)},
+        'metadata': body.get('metadata') or {},
+    }
+
+
+def batch_status(batch, delay):
+    """``batch`` as seen now: output and error files are only visible once it completed."""
+    if time.time() < batch['created_at'] + delay:
+        return dict(batch, output_file_id=None, error_file_id=None)
+    return dict(batch, status='completed', completed_at=batch['created_at'] + int(delay))
+
+
+def multipart_fields(content_type, raw):
+    """``{name: bytes}`` of a multipart/form-data body."""
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+        b'Content-Type: ' + content_type.encode() + b'\r\n\r\n' + raw)
+    return {part.get_param('name', header='content-disposition'): part.get_payload(decode=True)
+            for part in message.iter_parts()}
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    state = None
+
+    def log_message(self, fmt, *args):
+        if self.state.options.verbose:
+            super().log_message(fmt, *args)
+
+    # -- helpers -------------------------------------------------------
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        remaining, chunks = length, []
+        while remaining > 0:
+            chunk = self.rfile.read(min(remaining, 1024 * 1024))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            # Uploads are only kept to read batch input files back
+            if self.headers.get('Content-Type', '').startswith(('application/json', 'multipart/form-data')):
+                chunks.append(chunk)
+        return length, b''.join(chunks)
+
+    def _json(self, payload, status=200, headers=None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self):
+        options = self.state.options
+        status = options.error_status
+        headers = {'Retry-After': str(options.retry_after)} if status == 429 else {}
+        self._json({'error': {'message': 'Mock failure', 'type': 'mock_error', 'code': None}}, status, headers)
+
+    def _chunk(self, data):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def _event(self, payload):
+        self._chunk(b"event: %s\ndata: %s\n\n" % (payload['type'].encode(), json.dumps(payload).encode()))
+
+    # -- endpoints -----------------------------------------------------
+
+    def _responses(self, body):
+        options = self.state.options
+        text = fake_content(body, options)
+        prompt = body.get('input') if isinstance(body.get('input'), str) else json.dumps(body.get('input'))
+        cached_chars = self.state.cached_chars(prompt or '')
+        # The cached part of the prompt is not processed again, which shortens the time to first token
+        time.sleep(options.latency * (1 - options.cache_speedup * cached_chars / max(len(prompt or ''), 1)))
+        if not body.get('stream'):
+            time.sleep(options.chunk_delay * (len(text) // max(options.chunk_size, 1)))
+            response = response_object(body, text, cached_chars=cached_chars)
+            self.state.count_tokens(response['usage'])
+            return self._json(response)
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        response = response_object(body, text, status='in_progress', cached_chars=cached_chars)
+        self.state.count_tokens(response['usage'])
+        item_id = response['output'][-1]['id']
+        sequence = 0
+        self._event({'type': 'response.created', 'sequence_number': sequence,
+                     'response': dict(response, output=[])})
+        for pos in range(0, len(text), options.chunk_size):
+            sequence += 1
+            self._event({'type': 'response.output_text.delta', 'sequence_number': sequence,
+                         'item_id': item_id, 'output_index': len(response['output']) - 1,
+                         'content_index': 0, 'delta': text[pos:pos + options.chunk_size], 'logprobs': []})
+            if options.chunk_delay:
+                time.sleep(options.chunk_delay)
+        response['status'] = 'completed'
+        self._event({'type': 'response.completed', 'sequence_number': sequence + 1, 'response': response})
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _content(self, data):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        if path == '/_stats':
+            return self._json(self.state.stats())
+        self.state.count('GET ' + re.sub(r'/(batch_|file-)[\w-]+', '/{id}', path))
+        match = re.search(r'/batches/([\w-]+)$', path)
+        if match and match.group(1) in self.state.batches:
+            return self._json(batch_status(self.state.batches[match.group(1)], self.state.options.batch_delay))
+        match = re.search(r'/files/([\w-]+)/content$', path)
+        if match and match.group(1) in self.state.files:
+            return self._content(self.state.files[match.group(1)])
+        self._json({'error': {'message': 'Not found'}}, 404)
+
+    def do_DELETE(self):
+        self.state.count('DELETE ' + re.sub(r'/[^/]+$', '/{id}', self.path))
+        object_id = self.path.rstrip('/').rsplit('/', 1)[-1]
+        kind = 'vector_store.deleted' if '/vector_stores/' in self.path else 'file'
+        self._json({'id': object_id, 'object': kind, 'deleted': True})
+
+    def do_POST(self):
+        length, raw = self._read_body()
+        path = self.path.split('?')[0]
+        if path == '/_reset':
+            self.state.reset()
+            return self._json({'ok': True})
+        route = re.sub(r'/(vs_|file-)[\w-]+', '/{id}', path)
+        self.state.count('POST ' + route)
+        if self.state.should_fail():
+            return self._error()
+        now = int(time.time())
+        if path.endswith('/responses'):
+            return self._responses(json.loads(raw or b'{}'))
+        if path.endswith('/files') and '/vector_stores/' in path:
+            body = json.loads(raw or b'{}')
+            vs_id = path.split('/vector_stores/')[1].split('/')[0]
+            return self._json({'id': body.get('file_id'), 'object': 'vector_store.file', 'status': 'completed',
+                               'vector_store_id': vs_id, 'created_at': now, 'usage_bytes': 0,
+                               'last_error': None})
+        if path.endswith('/files'):
+            fields = {}
+            if self.headers.get('Content-Type', '').startswith('multipart/form-data'):
+                fields = multipart_fields(self.headers['Content-Type'], raw)
+            purpose = (fields.get('purpose') or b'assistants').decode()
+            file_id = self.state.add_file(fields.get('file') or b'') if purpose == 'batch' else \
+                'file-%s' % uuid.uuid4().hex
+            return self._json({'id': file_id, 'object': 'file', 'bytes': length,
+                               'created_at': now, 'filename': 'upload', 'purpose': purpose,
+                               'status': 'processed'})
+        if path.endswith('/batches'):
+            batch = run_batch(self.state, json.loads(raw or b'{}'))
+            with self.state.lock:
+                self.state.batches[batch['id']] = batch
+            return self._json(batch_status(batch, self.state.options.batch_delay))
+        if path.endswith('/vector_stores'):
+            body = json.loads(raw or b'{}')
+            return self._json({'id': 'vs_%s' % uuid.uuid4().hex, 'object': 'vector_store', 'created_at': now,
+                               'name': body.get('name'), 'status': 'completed', 'usage_bytes': 0,
+                               'file_counts': {'in_progress': 0, 'completed': 0, 'failed': 0,
+                                               'cancelled': 0, 'total': 0},
+                               'last_active_at': now, 'metadata': {}})
+        self._json({'error': {'message': 'Not found'}}, 404)
+
+
+def make_server(options):
+    handler = type('MockHandler', (Handler,), {'state': MockState(options)})
+    server = ThreadingHTTPServer((options.host, options.port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds before the first byte of a response")
+    parser.add_argument('--chunk-size', type=int, default=32, help="characters per streamed text delta")
+    parser.add_argument('--chunk-delay', type=float, default=0.0, help="seconds between streamed deltas")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of requests answered with an error")
+    parser.add_argument('--error-status', type=int, default=429)
+    parser.add_argument('--retry-after', type=float, default=0.0)
+    parser.add_argument('--description-words', type=int, default=120)
+    parser.add_argument('--extra-specs', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cache-speedup', type=float, default=0.5,
+                        help="share of the latency saved on the cached share of a prompt")
+    parser.add_argument('--batch-delay', type=float, default=0.0, help="seconds before a batch completes")
+    parser.add_argument('--batch-error-rate', type=float, default=0.0,
+                        help="share of batch requests written to the error file")
+    parser.add_argument('--verbose', action='store_true')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    print("Mock OpenAI server on http://%s:%s/v1" % (args.host, args.port), flush=True)
+    make_server(args).serve_forever()
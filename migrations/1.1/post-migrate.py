@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""Move specification names from every motorstate.spec line to the shared motorstate.spec.key table."""
+import logging
+
+from odoo import SUPERUSER_ID, api
+from odoo.tools.sql import column_exists
+
+from odoo.addons.ai_field_generator.tools.spec_sync import normalize_spec_key
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    if not column_exists(cr, 'motorstate_spec', 'name'):
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    cr.execute("SELECT DISTINCT name FROM motorstate_spec WHERE key_id IS NULL AND btrim(coalesce(name, '')) <> ''")
+    names = [row[0] for row in cr.fetchall()]
+    key_ids = env['motorstate.spec.key']._resolve_ids(names)
+
+    # One join over the lines instead of an UPDATE per distinct name
+    cr.execute("CREATE TEMPORARY TABLE motorstate_spec_key_map (name varchar, key_id integer) ON COMMIT DROP")
+    cr.execute("INSERT INTO motorstate_spec_key_map SELECT * FROM unnest(%s::varchar[], %s::integer[])",
+               [names, [key_ids[normalize_spec_key(name)] for name in names]])
+    cr.execute("""
+        UPDATE motorstate_spec s
+           SET key_id = m.key_id
+          FROM motorstate_spec_key_map m
+         WHERE s.name = m.name
+           AND s.key_id IS NULL
+    """)
+    _logger.info("Linked %s specification line(s) to %s key(s)", cr.rowcount, len(set(key_ids.values())))
+    cr.execute("ALTER TABLE motorstate_spec DROP COLUMN name")
+
+    env['ai.spec.option'].search([])._link_spec_keys()
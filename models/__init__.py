@@ -1,2 +1,15 @@
 from . import motorstate_product
-from . import ai_spec_option
\ No newline at end of file
+from . import ai_spec_option
+from . import product_template
+from . import ai_generation_options
+from . import ai_generation_job
+from . import ai_generation_batch
+from . import ai_document_cache
+from . import ai_response_cache
+from . import ai_document_index
+from . import ir_attachment
+from . import ir_config_parameter
+from . import ai_rate_limit
+from . import ai_generation_log
+from . import ai_generation_route
+from . import ai_feed_export
\ No newline at end of file
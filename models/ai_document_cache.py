@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+from odoo import fields, models, api, _
+from odoo.exceptions import UserError
+from datetime import timedelta
+import logging
+import psycopg2
+from ..tools.file_stream import file_size, hash_file
+_logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_DAYS = 30
+DEFAULT_MAX_ENTRIES = 200
+
+
+class AIDocumentCache(models.Model):
+    """Maps the SHA-256 of a supporting document to its OpenAI file and vector store.
+
+    Lets repeat runs with the same brand catalogue skip the upload and indexing.
+    """
+    _name = 'ai.document.cache'
+    _description = 'AI Document Cache'
+    _order = 'last_used desc'
+
+    checksum = fields.Char("SHA-256", required=True, index=True, readonly=True)
+    filename = fields.Char(readonly=True)
+    file_size = fields.Integer("Size (bytes)", readonly=True)
+    file_id = fields.Char("OpenAI File ID", readonly=True)
+    vector_store_id = fields.Char("Vector Store ID", readonly=True)
+    last_used = fields.Datetime(default=fields.Datetime.now, index=True, readonly=True)
+    use_count = fields.Integer(default=1, readonly=True)
+
+    _sql_constraints = [
+        ('checksum_unique', 'unique(checksum)', 'A document can only be cached once.')
+    ]
+
+    @api.model
+    def _get_vector_store(self, client, fileobj, file_name):
+        """Return the id of a vector store containing ``fileobj``, uploading it on a cache miss.
+
+        ``fileobj`` is a seekable binary file; it is hashed and uploaded in chunks.
+        """
+        checksum = hash_file(fileobj)
+        entry = self.search([('checksum', '=', checksum)], limit=1)
+        if entry:
+            entry.sudo().write({'last_used': fields.Datetime.now(), 'use_count': entry.use_count + 1})
+            _logger.info("Document cache hit for %s (vector store %s)", file_name, entry.vector_store_id)
+            return entry.vector_store_id
+
+        # The multipart body is streamed from the file object, not built in memory
+        upload = client.files.create(
+            file=(file_name, fileobj),
+            purpose="assistants"
+        )
+        f_id = upload.id
+        if not f_id:
+            raise UserError(_("OpenAI upload failed: no file id returned."))
+        vector_store = client.vector_stores.create(
+            name=f"Knowledge_base_{file_name}",
+        )
+        vs_id = vector_store.id
+        if not vs_id:
+            raise UserError(_("Vector store creation returned no id."))
+        client.vector_stores.files.create(
+            vector_store_id=vs_id,
+            file_id=f_id
+        )
+
+        try:
+            with self.env.cr.savepoint():
+                self.sudo().create({
+                    'checksum': checksum,
+                    'filename': file_name,
+                    'file_size': file_size(fileobj),
+                    'file_id': f_id,
+                    'vector_store_id': vs_id,
+                })
+        except psycopg2.IntegrityError:
+            # Another run cached the same document meanwhile: drop our copies and reuse theirs.
+            _logger.info("Document %s was cached concurrently, discarding duplicate upload", file_name)
+            self._delete_remote(client, f_id, vs_id)
+            return self.search([('checksum', '=', checksum)], limit=1).vector_store_id
+        return vs_id
+
+    @api.model
+    def _delete_remote(self, client, file_id, vector_store_id):
+        for delete, remote_id in ((client.vector_stores.delete, vector_store_id), (client.files.delete, file_id)):
+            if not remote_id:
+                continue
+            try:
+                delete(remote_id)
+            except Exception as e:
+                _logger.warning("Could not delete OpenAI object %s: %s", remote_id, e)
+
+    @api.model
+    def _get_referenced_vector_stores(self):
+        """Vector store ids that queued work or the stored options of generated products still use."""
+        referenced = set(self.env['ai.generation.job'].search(
+            [('state', 'in', ('queued', 'running')), ('vector_store_id', '!=', False)]).mapped('vector_store_id'))
+        referenced.update(self.env['ai.generation.batch'].search(
+            [('state', 'in', ('draft', 'submitted')), ('vector_store_id', '!=', False)]).mapped('vector_store_id'))
+        self.env['motorstate.product'].flush_model(['ai_generation_settings'])
+        self.env.cr.execute("""
+            SELECT DISTINCT ai_generation_settings->>'vector_store_id'
+              FROM motorstate_product
+             WHERE ai_generation_settings->>'vector_store_id' IS NOT NULL
+        """)
+        referenced.update(row[0] for row in self.env.cr.fetchall())
+        return referenced
+
+    @api.model
+    def _cron_cleanup(self):
+        """Evict entries unused for longer than the TTL, then the least recently used above the size cap.
+
+        Vector stores still referenced (see ``_get_referenced_vector_stores``) are kept, so
+        queued tasks and regenerations do not search a deleted store.
+        """
+        ICP = self.env['ir.config_parameter'].sudo()
+        ttl_days = ICP._get_number_param('ai_field_generator.document_cache_ttl_days', DEFAULT_TTL_DAYS)
+        max_entries = ICP._get_number_param('ai_field_generator.document_cache_max_entries', DEFAULT_MAX_ENTRIES)
+
+        expired = self.search([('last_used', '<', fields.Datetime.now() - timedelta(days=ttl_days))])
+        overflow = self.search([('id', 'not in', expired.ids)], order='last_used desc', offset=max_entries)
+        referenced = self._get_referenced_vector_stores()
+        to_evict = (expired | overflow).filtered(lambda entry: entry.vector_store_id not in referenced)
+        if not to_evict:
+            return
+        client = self.env['ai.generated.fields.multiple']._get_openai_client()
+        for entry in to_evict:
+            self._delete_remote(client, entry.file_id, entry.vector_store_id)
+            entry.unlink()
+            self.env.cr.commit()
+        _logger.info("Evicted %s document cache entries", len(to_evict))
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+from odoo import models, api, _
+from odoo.exceptions import UserError
+from odoo.tools import config
+from collections import OrderedDict
+import logging
+import os
+import shutil
+import threading
+from ..tools.doc_index import DocumentIndex, iter_pages, iter_passages
+from ..tools.file_stream import CHUNK_SIZE, atomic_write, hash_file
+_logger = logging.getLogger(__name__)
+
+DEFAULT_TOP_K = 5
+LOADED_INDEXES_MAX = 4
+
+# Indexes recently used by this process, by document checksum
+_loaded_lock = threading.Lock()
+_loaded = OrderedDict()
+
+
+class AIDocumentIndex(models.AbstractModel):
+    """Local keyword index of supporting documents, stored on disk by SHA-256.
+
+    Alternative to the OpenAI vector store: the best matching passages of the document
+    are put in each product prompt, so nothing is uploaded and no file search tool runs.
+
+    The file under the data directory is a local copy: each index is also kept as an
+    attachment, from which a host that does not have the file (another worker machine,
+    a cleared data directory) restores it.
+    """
+    _name = 'ai.document.index'
+    _description = 'AI Local Document Index'
+
+    @api.model
+    def _index_path(self, checksum):
+        path = os.path.join(config['data_dir'], 'ai_field_generator', 'doc_index', self.env.cr.dbname)
+        os.makedirs(path, exist_ok=True)
+        return os.path.join(path, '%s.json.gz' % checksum)
+
+    @api.model
+    def _get_index_attachment(self, checksum):
+        return self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('name', '=', '%s.json.gz' % checksum),
+        ], limit=1)
+
+    @api.model
+    def _store_index_attachment(self, checksum, path):
+        if self._get_index_attachment(checksum):
+            return
+        with open(path, 'rb') as fh:
+            self.env['ir.attachment'].sudo()._create_from_file({
+                'name': '%s.json.gz' % checksum,
+                'res_model': self._name,
+                'mimetype': 'application/gzip',
+            }, fh)
+
+    @api.model
+    def _restore_index(self, checksum, path):
+        """Copy the index of ``checksum`` from its attachment to ``path``; False if there is none."""
+        attachment = self._get_index_attachment(checksum)
+        if not attachment:
+            return False
+        with attachment._open_content() as src, atomic_write(path) as dst:
+            shutil.copyfileobj(src, dst, CHUNK_SIZE)
+        _logger.info("Restored the local document index %s from its attachment", checksum)
+        return True
+
+    @api.model
+    def _ensure_index(self, fileobj, file_name):
+        """Index ``fileobj`` unless an index for the same content exists; return its checksum."""
+        checksum = hash_file(fileobj)
+        path = self._index_path(checksum)
+        if not os.path.exists(path) and not self._restore_index(checksum, path):
+            try:
+                index = DocumentIndex.build(iter_passages(iter_pages(fileobj, file_name)))
+            except ImportError as e:
+                raise UserError(_("Cannot index %(file)s locally: %(error)s", file=file_name, error=e))
+            index.save(path)
+            _logger.info("Indexed %s locally: %s passages", file_name, len(index.passages))
+        self._store_index_attachment(checksum, path)
+        return checksum
+
+    @api.model
+    def _get_index(self, checksum):
+        """Loaded index of ``checksum``, or ``None`` when neither its file nor its attachment exists."""
+        with _loaded_lock:
+            index = _loaded.get(checksum)
+            if index is not None:
+                _loaded.move_to_end(checksum)
+                return index
+        path = self._index_path(checksum)
+        if not os.path.exists(path) and not self._restore_index(checksum, path):
+            _logger.warning("Local document index %s not found, prompts go without document passages", checksum)
+            return None
+        index = DocumentIndex.load(path)
+        with _loaded_lock:
+            _loaded[checksum] = index
+            while len(_loaded) > LOADED_INDEXES_MAX:
+                _loaded.popitem(last=False)
+        return index
+
+    @api.model
+    def _search_product(self, checksum, product, k=None):
+        """Best passages of the document for ``product``, matched on part number, brand and name."""
+        k = k or self.env['ir.config_parameter']._get_number_param(
+            'ai_field_generator.local_doc_top_k', DEFAULT_TOP_K)
+        index = self._get_index(checksum)
+        if index is None:
+            return []
+        query = " ".join(filter(None, [product.part_number, product.part_brand, product.part_name]))
+        return index.search(query, k)
+
+    @api.model
+    def _format_passages(self, checksum, product):
+        """Prompt section with the passages found for ``product``, or an empty string."""
+        if not checksum:
+            return ""
+        passages = self._search_product(checksum, product)
+        if not passages:
+            return ""
+        lines = ["Relevant extracts from the supporting document:"]
+        lines += ["[page %s] %s" % (page_no, text) for score, page_no, text in passages]
+        return "\n".join(lines)
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+from odoo import fields, models, api, _
+from odoo.exceptions import UserError
+from collections import defaultdict
+from datetime import timedelta
+import logging
+import os
+import tempfile
+import time
+from ..tools.feed_writer import WRITERS
+from ..tools.file_stream import atomic_write
+_logger = logging.getLogger(__name__)
+
+DEFAULT_FEED_BATCH_SIZE = 2000
+# Transactions still open when an export read the database commit rows with an older
+# write_date, which the next incremental export must not miss
+DEFAULT_FEED_OVERLAP_MINUTES = 10
+
+# motorstate_product columns read for each feed row, in the order of the SELECT
+FEED_PRODUCT_COLUMNS = (
+    'id',
+    'part_number',
+    'part_brand',
+    'product_title',
+    'short_description',
+    'ecom_description',
+    'ecom_keywords',
+    'ecom_disclaimer',
+    'write_date',
+)
+
+
+class AIFeedExport(models.Model):
+    """Export of the generated content of motorstate products as an ecommerce feed.
+
+    Products are read in batches of ``batch_size`` by id, on a cursor of their own so the
+    whole feed is one snapshot, with the specification lines of each batch fetched in one
+    query. Rows are written to a temporary file as they come, so memory use does not grow
+    with the catalogue.
+    """
+    _name = 'ai.feed.export'
+    _description = 'AI Content Feed Export'
+    _order = 'id desc'
+
+    name = fields.Char(required=True, default=lambda self: _("Feed %s") % fields.Datetime.now())
+    file_format = fields.Selection([
+        ('jsonl', 'JSON Lines'),
+        ('csv', 'CSV'),
+    ], string="Format", default='jsonl', required=True)
+    destination = fields.Selection([
+        ('attachment', 'Attachment'),
+        ('file', 'Server File'),
+    ], default='attachment', required=True,
+        help="Server File writes into the directory set in the ai_field_generator.feed_directory parameter.")
+    file_name = fields.Char(help="Name of the server file; defaults to the export name.")
+    only_generated = fields.Boolean("Only Products with AI Content", default=True)
+    incremental = fields.Boolean(
+        "Since Last Export",
+        help="Only export the products changed since the start of the last completed export, "
+             "minus the ai_field_generator.feed_overlap_minutes margin.")
+    changed_since = fields.Datetime(help="Only export the products changed since this date.")
+    batch_size = fields.Integer(default=lambda self: self._default_batch_size())
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('done', 'Done'),
+    ], default='draft', required=True, readonly=True)
+    started_at = fields.Datetime(readonly=True, help="Start of the transaction the feed was read in.")
+    duration = fields.Float("Duration (s)", readonly=True)
+    product_count = fields.Integer("Products", readonly=True)
+    file_size = fields.Integer(readonly=True)
+    attachment_id = fields.Many2one('ir.attachment', readonly=True, ondelete='set null')
+    file_path = fields.Char(readonly=True)
+
+    @api.model
+    def _default_batch_size(self):
+        return self.env['ir.config_parameter']._get_number_param(
+            'ai_field_generator.feed_batch_size', DEFAULT_FEED_BATCH_SIZE)
+
+    def _get_changed_since(self):
+        if not self.incremental:
+            return self.changed_since
+        last = self.search([('state', '=', 'done'), ('id', '!=', self.id)], order='started_at desc', limit=1)
+        if not last.started_at:
+            return self.changed_since
+        # Products of the overlap are exported twice rather than missed
+        overlap = self.env['ir.config_parameter']._get_number_param(
+            'ai_field_generator.feed_overlap_minutes', DEFAULT_FEED_OVERLAP_MINUTES)
+        return last.started_at - timedelta(minutes=overlap)
+
+    def _get_file_path(self):
+        directory = self.env['ir.config_parameter'].sudo().get_param('ai_field_generator.feed_directory')
+        if not directory:
+            raise UserError(_("Set the ai_field_generator.feed_directory parameter to export feeds to server files."))
+        file_name = self.file_name or "%s.%s" % (self.name, self.file_format)
+        if os.path.basename(file_name) != file_name or file_name.startswith('.'):
+            raise UserError(_("The file name %s must not contain a directory.", file_name))
+        return os.path.join(directory, file_name)
+
+    def _fetch_specifications(self, cr, product_ids):
+        """``{product id: {name: value}}`` for ``product_ids``, in one query on ``cr``."""
+        cr.execute("""
+            SELECT s.product_id, k.name, s.value
+              FROM motorstate_spec s
+              JOIN motorstate_spec_key k ON k.id = s.key_id
+             WHERE s.product_id = ANY(%s)
+          ORDER BY s.product_id, s.sequence, s.id
+        """, [product_ids])
+        specs = defaultdict(dict)
+        for product_id, name, value in cr.fetchall():
+            specs[product_id][name] = value or ''
+        return specs
+
+    def _iter_rows(self, cr, changed_since=None):
+        """Feed rows read on ``cr``, ``batch_size`` products per query in id order.
+
+        With ``changed_since``, a product is exported when it, one of its specification
+        lines or the key (name) of one of them was written since then.
+        """
+        self.ensure_one()
+        batch_size = max(self.batch_size or DEFAULT_FEED_BATCH_SIZE, 1)
+        conditions, params = ["p.id > %s"], []
+        if self.only_generated:
+            conditions.append("p.ai_fields_generated")
+        if changed_since:
+            conditions.append("""(p.write_date >= %s OR EXISTS (
+                SELECT 1
+                  FROM motorstate_spec s
+             LEFT JOIN motorstate_spec_key k ON k.id = s.key_id
+                 WHERE s.product_id = p.id
+                   AND (s.write_date >= %s OR k.write_date >= %s)
+            ))""")
+            params += [changed_since] * 3
+        query = "SELECT %s FROM motorstate_product p WHERE %s ORDER BY p.id LIMIT %%s" % (
+            ", ".join("p.%s" % column for column in FEED_PRODUCT_COLUMNS), " AND ".join(conditions))
+        last_id = 0
+        while True:
+            cr.execute(query, [last_id] + params + [batch_size])
+            batch = cr.fetchall()
+            if not batch:
+                break
+            specs = self._fetch_specifications(cr, [row[0] for row in batch])
+            for row in batch:
+                values = dict(zip(FEED_PRODUCT_COLUMNS, row))
+                write_date = values.pop('write_date')
+                values['specifications'] = specs.get(values['id'], {})
+                values['updated_at'] = write_date and write_date.isoformat()
+                yield values
+            last_id = batch[-1][0]
+
+    def action_export(self):
+        for export in self:
+            export._export()
+        return True
+
+    def _export(self):
+        self.ensure_one()
+        start = time.perf_counter()
+        changed_since = self._get_changed_since()
+        write = WRITERS[self.file_format]
+        # Committed data only, read in one repeatable read transaction: every batch sees the same snapshot
+        self.env.flush_all()
+        with self.pool.cursor() as cr:
+            # The feed shows the database as of this transaction: the next incremental export starts there
+            started_at = cr.now()
+            try:
+                if self.destination == 'file':
+                    path = self._get_file_path()
+                    # Readers of the previous feed keep a complete file until the new one replaces it
+                    with atomic_write(path) as fh:
+                        count = write(fh, self._iter_rows(cr, changed_since))
+                    vals = {'file_path': path, 'file_size': os.path.getsize(path)}
+                else:
+                    with tempfile.TemporaryFile() as fh:
+                        count = write(fh, self._iter_rows(cr, changed_since))
+                        attachment = self.env['ir.attachment']._create_from_file({
+                            'name': "%s.%s" % (self.name, self.file_format),
+                            'res_model': self._name,
+                            'res_id': self.id,
+                            'mimetype': 'text/csv' if self.file_format == 'csv' else 'application/jsonl',
+                        }, fh)
+                    vals = {'attachment_id': attachment.id, 'file_size': attachment.file_size}
+            except OSError as e:
+                raise UserError(_("The feed could not be written: %s", e))
+        duration = time.perf_counter() - start
+        self.write(dict(vals, state='done', started_at=started_at, duration=duration, product_count=count))
+        _logger.info("Exported %s product(s) to the %s feed %s in %.1fs", count, self.file_format, self.name, duration)
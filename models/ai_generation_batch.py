@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+from odoo import fields, models, api, _
+from odoo.exceptions import UserError
+import json
+import logging
+import tempfile
+_logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = '/v1/responses'
+DEFAULT_INGEST_CHUNK = 200
+
+# OpenAI batch statuses that will not change anymore
+FINAL_REMOTE_STATUSES = ('completed', 'failed', 'expired', 'cancelled')
+
+
+class AIGenerationBatch(models.Model):
+    _name = 'ai.generation.batch'
+    _inherit = 'ai.generation.options'
+    _description = 'AI Generation Batch'
+    _order = 'id desc'
+
+    name = fields.Char(required=True, default=lambda self: _("AI Batch %s") % fields.Datetime.now())
+    state = fields.Selection([
+        ('draft', 'To Submit'),
+        ('submitted', 'Submitted'),
+        ('ingested', 'Ingested'),
+        ('failed', 'Failed'),
+    ], default='draft', required=True, index=True)
+    product_ids = fields.Many2many('motorstate.product', 'ai_generation_batch_product_rel',
+                                   string="Products")
+    remote_status = fields.Char("OpenAI Status", readonly=True)
+    input_file_id = fields.Char("Input File ID", readonly=True)
+    batch_id = fields.Char("OpenAI Batch ID", readonly=True)
+    output_file_id = fields.Char("Output File ID", readonly=True)
+    error_file_id = fields.Char("Error File ID", readonly=True)
+    request_count = fields.Integer("Requests", readonly=True)
+    ingested_count = fields.Integer("Ingested", readonly=True)
+    failed_count = fields.Integer("Failed", readonly=True)
+    failed_product_ids = fields.Many2many('motorstate.product', 'ai_generation_batch_failed_product_rel',
+                                          string="Failed Products", readonly=True,
+                                          help="Products listed in the error file or whose result could not be read.")
+    error = fields.Text(readonly=True)
+
+    def _trigger_processing(self):
+        cron = self.env.ref('ai_field_generator.ir_cron_process_ai_generation_batches', raise_if_not_found=False)
+        if cron:
+            cron._trigger()
+
+    # ------------------------------------------------------------------
+    # Submit
+    # ------------------------------------------------------------------
+
+    def _write_request_file(self, wizard, fh):
+        """Serialize one Batch API request line per product into ``fh``, returns the line count.
+
+        ``custom_id`` is the motorstate.product id, which is how results are routed back.
+        Web search is not available to batched Responses calls, so only file search is kept,
+        and the prompt does not point the model to the internet.
+        """
+        mandatory = wizard._get_mandatory_specs()
+        route = wizard._get_batch_route()
+        schema = wizard._get_product_schema(mandatory, route)
+        count = 0
+        for product in self.product_ids:
+            line = {
+                'custom_id': str(product.id),
+                'method': 'POST',
+                'url': BATCH_ENDPOINT,
+                'body': wizard._prepare_response_request(
+                    wizard._build_prompt(product, mandatory, route, self.vector_store_id),
+                    self.vector_store_id, schema, web_search=False),
+            }
+            fh.write(json.dumps(line).encode() + b'\n')
+            count += 1
+        return count
+
+    def action_submit(self):
+        for batch in self.filtered(lambda b: b.state == 'draft'):
+            if not batch.product_ids:
+                raise UserError(_("Batch '%s' has no products.") % batch.name)
+            wizard = batch._get_generation_wizard()
+            client = wizard._get_openai_client()
+            with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as fh:
+                count = batch._write_request_file(wizard, fh)
+                fh.seek(0)
+                upload = client.files.create(file=('ai_batch_%s.jsonl' % batch.id, fh), purpose='batch')
+            remote = client.batches.create(
+                input_file_id=upload.id,
+                endpoint=BATCH_ENDPOINT,
+                completion_window='24h',
+                metadata={'odoo_batch_id': str(batch.id)},
+            )
+            batch.write({
+                'state': 'submitted',
+                'input_file_id': upload.id,
+                'batch_id': remote.id,
+                'remote_status': remote.status,
+                'request_count': count,
+            })
+
+    # ------------------------------------------------------------------
+    # Poll and ingest
+    # ------------------------------------------------------------------
+
+    def action_poll(self):
+        for batch in self.filtered(lambda b: b.state == 'submitted'):
+            wizard = batch._get_generation_wizard()
+            client = wizard._get_openai_client()
+            remote = client.batches.retrieve(batch.batch_id)
+            batch.write({
+                'remote_status': remote.status,
+                'output_file_id': remote.output_file_id,
+                'error_file_id': remote.error_file_id,
+            })
+            if remote.status not in FINAL_REMOTE_STATUSES:
+                continue
+            if remote.output_file_id or remote.error_file_id:
+                batch._ingest_output(wizard, client, remote.output_file_id, remote.error_file_id)
+            if remote.status == 'completed':
+                batch.state = 'ingested'
+            else:
+                batch.write({
+                    'state': 'failed',
+                    'error': _("OpenAI batch ended with status '%s'.") % remote.status,
+                })
+
+    @staticmethod
+    def _extract_output_text(body):
+        """Concatenate the ``output_text`` parts of a Responses API response body."""
+        if body.get('output_text'):
+            return body['output_text']
+        texts = []
+        for item in body.get('output') or []:
+            if item.get('type') != 'message':
+                continue
+            for part in item.get('content') or []:
+                if part.get('type') == 'output_text':
+                    texts.append(part.get('text') or '')
+        return ''.join(texts)
+
+    def _parse_result_line(self, line):
+        """Return ``(product id, content, error)`` for one line of an output or error file.
+
+        The product id is ``None`` when the line cannot be read far enough to tell it.
+        """
+        product_id = None
+        try:
+            result = json.loads(line)
+            product_id = int(result['custom_id'])
+            response_data = result.get('response') or {}
+            if result.get('error') or response_data.get('status_code') != 200:
+                body = response_data.get('body') or {}
+                raise ValueError(result.get('error') or body.get('error') or response_data.get('status_code'))
+            return product_id, json.loads(self._extract_output_text(response_data.get('body') or {})), None
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            return product_id, None, e
+
+    def _ingest_output(self, wizard, client, file_id, error_file_id=None):
+        """Stream the output and error JSONL files and write results back, committing every chunk.
+
+        Every line of the error file, and every output line that cannot be parsed, counts as a
+        failure; the products concerned are added to ``failed_product_ids``.
+        """
+        self.ensure_one()
+        chunk_size = self.env['ir.config_parameter']._get_number_param(
+            'ai_field_generator.batch_ingest_chunk', DEFAULT_INGEST_CHUNK)
+        Product = self.env['motorstate.product']
+        pending = {}
+        failed_ids = set()
+        key_cache = {}
+        ingested = failed = 0
+
+        def flush():
+            vals = {}
+            for product in Product.browse(list(pending)).exists():
+                wizard._collect_product_vals(vals, product, [pending[product.id]], {})
+            wizard._write_product_vals(vals, key_cache)
+            self.write({
+                'ingested_count': ingested,
+                'failed_count': failed,
+                'failed_product_ids': [(4, product_id) for product_id in Product.browse(list(failed_ids)).exists().ids],
+            })
+            self.env.cr.commit()
+            pending.clear()
+            failed_ids.clear()
+
+        for result_file_id in filter(None, (file_id, error_file_id)):
+            with client.files.with_streaming_response.content(result_file_id) as response:
+                for line in response.iter_lines():
+                    if not line.strip():
+                        continue
+                    product_id, data, error = self._parse_result_line(line)
+                    if error is None:
+                        pending[product_id] = data
+                        ingested += 1
+                    else:
+                        _logger.warning("AI batch %s: request %s failed: %s", self.id, product_id, error)
+                        failed += 1
+                        if product_id:
+                            failed_ids.add(product_id)
+                    if len(pending) + len(failed_ids) >= chunk_size:
+                        flush()
+        flush()
+
+    def action_retry_failed(self):
+        """Submit the failed products of the batch again, in a new batch with the same options."""
+        self.ensure_one()
+        if not self.failed_product_ids:
+            raise UserError(_("There are no failed products to retry."))
+        batch = self.create(dict(self._prepare_wizard_vals(), product_ids=[(6, 0, self.failed_product_ids.ids)]))
+        batch._trigger_processing()
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': batch.id,
+            'view_mode': 'form',
+            'target': 'current',
+        }
+
+    @api.model
+    def _cron_process_batches(self):
+        """Submit draft batches, then poll submitted ones and ingest finished outputs."""
+        for batch in self.search([('state', '=', 'draft')]):
+            try:
+                batch.action_submit()
+            except Exception as e:
+                self.env.cr.rollback()
+                _logger.exception("AI batch %s could not be submitted", batch.id)
+                batch.write({'state': 'failed', 'error': str(e)})
+            self.env.cr.commit()
+        for batch in self.search([('state', '=', 'submitted')]):
+            try:
+                batch.action_poll()
+            except Exception:
+                self.env.cr.rollback()
+                _logger.exception("AI batch %s could not be polled", batch.id)
+            self.env.cr.commit()
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+from odoo import fields, models, api, _
+from odoo.exceptions import UserError
+from odoo.tools import config
+from datetime import timedelta
+import logging
+import time
+_logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 20
+DEFAULT_STALE_MINUTES = 30
+# Scheduled actions processing the queue; each runs in at most one cron worker at a time
+DEFAULT_TASK_CRONS = 2
+# Share of the cron worker's real time limit a run may spend before it stops claiming tasks
+DEFAULT_TIME_BUDGET_SHARE = 0.6
+
+
+class AIGenerationJob(models.Model):
+    _name = 'ai.generation.job'
+    _inherit = 'ai.generation.options'
+    _description = 'AI Generation Job'
+    _order = 'id desc'
+
+    name = fields.Char(required=True, default=lambda self: _("AI Generation %s") % fields.Datetime.now())
+    state = fields.Selection([
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('cancelled', 'Cancelled'),
+    ], default='queued', required=True, index=True)
+    task_ids = fields.One2many('ai.generation.task', 'job_id', string='Tasks')
+    max_attempts = fields.Integer("Max Attempts", default=3,
+                                  help="How many times a product is tried before its task is marked as failed.")
+
+    task_count = fields.Integer(compute='_compute_progress')
+    done_count = fields.Integer("Done", compute='_compute_progress')
+    failed_count = fields.Integer("Failed", compute='_compute_progress')
+    pending_count = fields.Integer("Pending", compute='_compute_progress')
+    running_count = fields.Integer("Running", compute='_compute_progress')
+    progress = fields.Float(compute='_compute_progress')
+
+    @api.depends('task_ids.state')
+    def _compute_progress(self):
+        counts = {}
+        for job, state, count in self.env['ai.generation.task']._read_group(
+                [('job_id', 'in', self.ids)], ['job_id', 'state'], ['__count']):
+            counts.setdefault(job.id, {})[state] = count
+        for job in self:
+            job_counts = counts.get(job.id, {})
+            job.done_count = job_counts.get('done', 0)
+            job.failed_count = job_counts.get('failed', 0)
+            job.pending_count = job_counts.get('pending', 0)
+            job.running_count = job_counts.get('running', 0)
+            job.task_count = sum(job_counts.values())
+            finished = job.done_count + job.failed_count
+            job.progress = 100.0 * finished / job.task_count if job.task_count else 0.0
+
+    def _update_state(self):
+        for job in self.filtered(lambda j: j.state in ('queued', 'running')):
+            job.invalidate_recordset(['pending_count', 'running_count'])
+            if job.pending_count or job.running_count:
+                job.state = 'running'
+            else:
+                job.state = 'done'
+
+    @api.model
+    def _get_task_crons(self):
+        """Scheduled actions processing the task queue, creating the missing ones.
+
+        Odoo never runs a scheduled action in two workers at once, so the queue is
+        processed in parallel by as many copies of the shipped one as
+        ai_field_generator.job_cron_count asks for. Copies made by hand count too.
+        """
+        primary = self.env.ref('ai_field_generator.ir_cron_process_ai_generation_tasks', raise_if_not_found=False)
+        if not primary or not primary.active:
+            return self.env['ir.cron']
+        Cron = self.env['ir.cron'].sudo().with_context(active_test=False)
+        crons = Cron.search([('model_id', '=', primary.model_id.id), ('code', '=', primary.code)])
+        wanted = self.env['ir.config_parameter']._get_number_param(
+            'ai_field_generator.job_cron_count', DEFAULT_TASK_CRONS)
+        for number in range(len(crons) + 1, wanted + 1):
+            crons |= primary.sudo().copy({'name': "%s (%s)" % (primary.name, number)})
+        return crons.filtered('active')
+
+    def _trigger_processing(self):
+        for cron in self._get_task_crons():
+            cron._trigger()
+
+    def action_cancel(self):
+        self.task_ids.filtered(lambda t: t.state == 'pending').write({'state': 'failed', 'error': _("Cancelled")})
+        self.write({'state': 'cancelled'})
+
+    def action_retry_failed(self):
+        failed = self.task_ids.filtered(lambda t: t.state == 'failed')
+        if not failed:
+            raise UserError(_("There are no failed tasks to retry."))
+        failed.write({'state': 'pending', 'attempts': 0, 'error': False})
+        self.write({'state': 'queued'})
+        self._trigger_processing()
+
+    def _prepare_processing(self):
+        """Wizard, OpenAI client, mandatory specifications and spec key cache shared by the tasks of a run."""
+        self.ensure_one()
+        wizard = self._get_generation_wizard()
+        return wizard, wizard._get_openai_client(), wizard._get_mandatory_specs(), {}
+
+    def _process_task(self, task, processing):
+        """Generate content for ``task`` (belonging to ``self``) and commit its outcome."""
+        self.ensure_one()
+        wizard, client, mandatory, key_cache = processing
+        try:
+            with self.env.cr.savepoint():
+                records = wizard._generate_product(client, task.product_id, mandatory, self.vector_store_id,
+                                                   key_cache)
+                if not records:
+                    raise UserError(_("The AI response did not contain any product content."))
+        except Exception as e:
+            _logger.warning("AI generation task %s (product %s) failed: %s",
+                            task.id, task.product_id.display_name, e)
+            attempts = task.attempts + 1
+            task.write({
+                'state': 'failed' if attempts >= self.max_attempts else 'pending',
+                'attempts': attempts,
+                'error': str(e),
+            })
+        else:
+            task.write({'state': 'done', 'attempts': task.attempts + 1, 'error': False})
+        self.env.cr.commit()
+
+    @api.model
+    def _get_time_budget(self):
+        """Seconds a cron run may spend on tasks, ``None`` when cron workers have no real time limit.
+
+        The ai_field_generator.job_time_budget parameter overrides the default share of
+        ``limit_time_real_cron`` (or ``limit_time_real`` when it is -1).
+        """
+        budget = self.env['ir.config_parameter']._get_number_param('ai_field_generator.job_time_budget', 0.0)
+        if budget > 0:
+            return budget
+        limit = config.get('limit_time_real_cron', -1)
+        if limit is None or limit < 0:
+            limit = config.get('limit_time_real') or 0
+        return limit * DEFAULT_TIME_BUDGET_SHARE if limit > 0 else None
+
+    @api.model
+    def _claim_task(self, exclude_ids=()):
+        """Lock the next pending task, mark it as running and commit; returns it or an empty recordset.
+
+        ``FOR UPDATE SKIP LOCKED`` makes several cron jobs calling this method never pick the same task.
+        Tasks of ``exclude_ids`` are left for another run.
+        """
+        self.env.cr.execute("""
+            SELECT t.id
+              FROM ai_generation_task t
+              JOIN ai_generation_job j ON j.id = t.job_id
+             WHERE t.state = 'pending'
+               AND j.state IN ('queued', 'running')
+               AND t.id != ALL(%s)
+          ORDER BY t.job_id, t.id
+             LIMIT 1
+               FOR UPDATE OF t SKIP LOCKED
+        """, [list(exclude_ids)])
+        row = self.env.cr.fetchone()
+        task = self.env['ai.generation.task'].browse(row[0] if row else ())
+        if task:
+            task.write({'state': 'running', 'started_at': fields.Datetime.now()})
+            task.job_id.filtered(lambda j: j.state != 'running').write({'state': 'running'})
+            self.env.cr.commit()
+        return task
+
+    @api.model
+    def _cron_process_tasks(self, batch_size=None):
+        """Process pending tasks one transaction each, within the time budget of the cron worker.
+
+        Claiming stops after ``batch_size`` tasks or once the time budget is spent, so a run
+        ends well before ``limit_time_real`` kills it; the cron is triggered again while
+        tasks remain.
+        """
+        ICP = self.env['ir.config_parameter'].sudo()
+        batch_size = batch_size or ICP._get_number_param('ai_field_generator.job_batch_size', DEFAULT_BATCH_SIZE)
+        budget = self._get_time_budget()
+        deadline = budget and time.monotonic() + budget
+        self.env['ai.generation.task']._requeue_stale_tasks()
+        self.env.cr.commit()
+
+        jobs = self.browse()
+        processing = {}
+        # A task that failed goes back to the queue; it is retried by a later run, not right away
+        processed = []
+        for _index in range(batch_size):
+            if deadline and time.monotonic() >= deadline:
+                break
+            task = self._claim_task(processed)
+            if not task:
+                break
+            processed.append(task.id)
+            job = task.job_id
+            if job.id not in processing:
+                processing[job.id] = job._prepare_processing()
+            job._process_task(task, processing[job.id])
+            jobs |= job
+        jobs._update_state()
+        # Calls of the last failed tasks are still buffered
+        self.env['ai.generation.log']._flush_buffer()
+        self.env.cr.commit()
+
+        if self.env['ai.generation.task'].search_count([('state', '=', 'pending')], limit=1):
+            self._trigger_processing()
+
+
+class AIGenerationTask(models.Model):
+    _name = 'ai.generation.task'
+    _description = 'AI Generation Task'
+    _order = 'job_id, id'
+
+    job_id = fields.Many2one('ai.generation.job', required=True, ondelete='cascade', index=True)
+    product_id = fields.Many2one('motorstate.product', required=True, ondelete='cascade')
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], default='pending', required=True, index=True)
+    attempts = fields.Integer(default=0)
+    started_at = fields.Datetime("Started At")
+    error = fields.Text()
+
+    @api.model
+    def _requeue_stale_tasks(self):
+        """Put back tasks left running by a worker that crashed or was killed, or fail them at ``max_attempts``."""
+        minutes = self.env['ir.config_parameter']._get_number_param(
+            'ai_field_generator.job_stale_minutes', DEFAULT_STALE_MINUTES)
+        stale = self.search([
+            ('state', '=', 'running'),
+            ('started_at', '<', fields.Datetime.now() - timedelta(minutes=minutes)),
+        ])
+        if not stale:
+            return
+        _logger.info("Requeuing %s stale AI generation task(s)", len(stale))
+        # The interrupted run counts as an attempt, so a product that kills its worker every time ends up failed
+        for task in stale:
+            attempts = task.attempts + 1
+            task.write({
+                'state': 'failed' if attempts >= task.job_id.max_attempts else 'pending',
+                'attempts': attempts,
+                'error': _("Interrupted: the worker processing this task stopped before it finished."),
+            })
+        stale.job_id._update_state()
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+from odoo import fields, models, api, tools
+import logging
+import threading
+_logger = logging.getLogger(__name__)
+
+# USD per million tokens and per web search call, overridable with ai_field_generator.price_*
+DEFAULT_PRICES = {
+    'input': 2.50,
+    'cached_input': 1.25,
+    'output': 10.00,
+    'web_search_call': 0.025,
+}
+
+# Entries waiting for the next write of generated content, per database
+_buffer_lock = threading.Lock()
+_buffer = {}
+
+
+class AIGenerationLog(models.Model):
+    """One OpenAI generation call: timings, token usage, tools and outcome.
+
+    Requests answered from ``ai.response.cache`` are logged too, as ``cached`` entries
+    without timings or tokens.
+
+    Calls are buffered in memory (worker threads included) and inserted together
+    with the next batch of generated values, so logging adds no commit of its own;
+    only failure paths and the end of a concurrent run commit them on their own cursor.
+    """
+    _name = 'ai.generation.log'
+    _description = 'AI Generation Log'
+    _order = 'id desc'
+
+    product_id = fields.Many2one('motorstate.product', ondelete='set null', index=True, readonly=True)
+    route_id = fields.Many2one('ai.generation.route', ondelete='set null', index=True, readonly=True)
+    model_name = fields.Char("Model", readonly=True)
+    source = fields.Selection([
+        ('single', 'Single Product'),
+        ('bulk', 'Bulk'),
+    ], readonly=True)
+    product_count = fields.Integer("Products", default=1, readonly=True)
+    outcome = fields.Selection([
+        ('success', 'Success'),
+        ('empty', 'No Content'),
+        ('error', 'Error'),
+        ('cached', 'Cache Hit'),
+    ], required=True, index=True, readonly=True)
+    error = fields.Text(readonly=True)
+    ttft = fields.Float("Time to First Token (s)", aggregator='avg', readonly=True)
+    latency = fields.Float("Latency (s)", aggregator='avg', readonly=True)
+    limiter_wait = fields.Float("Rate Limit Wait (s)", aggregator='avg', readonly=True)
+    input_tokens = fields.Integer(readonly=True)
+    cached_tokens = fields.Integer(readonly=True)
+    output_tokens = fields.Integer(readonly=True)
+    web_search_calls = fields.Integer(readonly=True)
+    file_search_calls = fields.Integer(readonly=True)
+    retries = fields.Integer(readonly=True)
+    cost = fields.Float("Estimated Cost (USD)", digits=(16, 6), readonly=True)
+
+    @api.model
+    def _usage_vals(self, usage):
+        """Token counts of a Responses API ``usage`` object."""
+        if usage is None:
+            return {}
+        details = getattr(usage, 'input_tokens_details', None)
+        return {
+            'input_tokens': getattr(usage, 'input_tokens', 0) or 0,
+            'cached_tokens': getattr(details, 'cached_tokens', 0) or 0,
+            'output_tokens': getattr(usage, 'output_tokens', 0) or 0,
+        }
+
+    @api.model
+    def _tool_call_vals(self, output):
+        """Web and file search calls among the output items of a response."""
+        types = [getattr(item, 'type', None) for item in output or []]
+        return {
+            'web_search_calls': types.count('web_search_call'),
+            'file_search_calls': types.count('file_search_call'),
+        }
+
+    @api.model
+    def _buffer_log(self, vals):
+        """Queue one entry; safe to call from worker threads, nothing touches the database."""
+        with _buffer_lock:
+            _buffer.setdefault(self.pool.db_name, []).append(vals)
+
+    @api.model
+    def _get_prices(self):
+        ICP = self.env['ir.config_parameter'].sudo()
+        return {name: ICP._get_number_param('ai_field_generator.price_%s' % name, default)
+                for name, default in DEFAULT_PRICES.items()}
+
+    @api.model
+    def _flush_buffer(self):
+        """Insert the queued entries of this database in the current transaction."""
+        with _buffer_lock:
+            entries = _buffer.pop(self.pool.db_name, [])
+        if not entries:
+            return
+        prices = self._get_prices()
+        product_ids = {vals['product_id'] for vals in entries if vals.get('product_id')}
+        existing = set(self.env['motorstate.product'].browse(product_ids).exists().ids)
+        for vals in entries:
+            if vals.get('product_id') not in existing:
+                vals['product_id'] = False
+            uncached = vals.get('input_tokens', 0) - vals.get('cached_tokens', 0)
+            vals['cost'] = (
+                uncached * prices['input']
+                + vals.get('cached_tokens', 0) * prices['cached_input']
+                + vals.get('output_tokens', 0) * prices['output']
+            ) / 1e6 + vals.get('web_search_calls', 0) * prices['web_search_call']
+        self.sudo().create(entries)
+
+    @api.model
+    def _commit_buffer(self):
+        """Insert the queued entries on a cursor of their own and commit them.
+
+        For failure paths, whose transaction is rolled back: the entries of the failed
+        calls are kept. A failure to write them is logged and does not hide the original error.
+        """
+        try:
+            with self.pool.cursor() as cr:
+                self.with_env(self.env(cr=cr))._flush_buffer()
+        except Exception:
+            _logger.exception("AI generation log entries could not be written")
+
+
+class AIGenerationLogStats(models.Model):
+    """Daily latency percentiles, cache hit rate and totals per model, computed from ``ai.generation.log``.
+
+    Percentiles cannot be combined across rows, so each row is a whole day of one model;
+    per route figures are on ``ai.generation.route``.
+    """
+    _name = 'ai.generation.log.stats'
+    _description = 'AI Generation Statistics'
+    _auto = False
+    _order = 'day desc, model_name'
+
+    day = fields.Date(readonly=True)
+    model_name = fields.Char("Model", readonly=True)
+    calls = fields.Integer(readonly=True)
+    errors = fields.Integer(readonly=True)
+    cache_hits = fields.Integer("Cache Hits", readonly=True)
+    cache_hit_ratio = fields.Float("Cache Hit Rate", aggregator='avg', readonly=True,
+                                   help="Share of the requested products answered from the response cache.")
+    latency_p50 = fields.Float("Latency p50 (s)", aggregator='max', readonly=True)
+    latency_p95 = fields.Float("Latency p95 (s)", aggregator='max', readonly=True)
+    ttft_p50 = fields.Float("TTFT p50 (s)", aggregator='max', readonly=True)
+    ttft_p95 = fields.Float("TTFT p95 (s)", aggregator='max', readonly=True)
+    input_tokens = fields.Integer(readonly=True)
+    cached_tokens = fields.Integer(readonly=True)
+    cached_share = fields.Float("Cached Input", aggregator='avg', readonly=True,
+                                help="Share of the input tokens served from OpenAI's prompt prefix cache.")
+    output_tokens = fields.Integer(readonly=True)
+    cost = fields.Float("Estimated Cost (USD)", digits=(16, 4), readonly=True)
+
+    def init(self):
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute("""
+            CREATE OR REPLACE VIEW %s AS (
+                SELECT row_number() OVER (ORDER BY date_trunc('day', create_date), model_name) AS id,
+                       date_trunc('day', create_date)::date AS day,
+                       model_name,
+                       count(*) FILTER (WHERE outcome != 'cached') AS calls,
+                       count(*) FILTER (WHERE outcome = 'error') AS errors,
+                       count(*) FILTER (WHERE outcome = 'cached') AS cache_hits,
+                       count(*) FILTER (WHERE outcome = 'cached')::float / NULLIF(
+                           count(*) FILTER (WHERE outcome = 'cached')
+                           + coalesce(sum(product_count) FILTER (WHERE outcome != 'cached'), 0), 0
+                       ) AS cache_hit_ratio,
+                       percentile_cont(0.5) WITHIN GROUP (ORDER BY latency) AS latency_p50,
+                       percentile_cont(0.95) WITHIN GROUP (ORDER BY latency) AS latency_p95,
+                       percentile_cont(0.5) WITHIN GROUP (ORDER BY ttft) AS ttft_p50,
+                       percentile_cont(0.95) WITHIN GROUP (ORDER BY ttft) AS ttft_p95,
+                       sum(input_tokens) AS input_tokens,
+                       sum(cached_tokens) AS cached_tokens,
+                       sum(cached_tokens)::float / NULLIF(sum(input_tokens), 0) AS cached_share,
+                       sum(output_tokens) AS output_tokens,
+                       sum(cost) AS cost
+                  FROM ai_generation_log
+                 GROUP BY date_trunc('day', create_date), model_name
+            )
+        """ % self._table)
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+from odoo import fields, models
+
+
+class AIGenerationOptions(models.AbstractModel):
+    """Generation options snapshotted from the multi-product wizard.
+
+    Used by records that generate content outside of the wizard (queued jobs,
+    Batch API runs) and need to rebuild the same prompt and field mapping later.
+    """
+    _name = 'ai.generation.options'
+    _description = 'AI Generation Options'
+
+    global_prompt = fields.Char("Global Prompt")
+    generate_title = fields.Boolean("Generate Product Title")
+    generate_description = fields.Boolean("Generate Ecom Description")
+    generate_keywords = fields.Boolean("Generate Ecom Keywords")
+    generate_disclaimer = fields.Boolean("Generate Ecom Disclaimer")
+    generate_shortDesc = fields.Boolean("Generate Short Description")
+    generate_specifications = fields.Boolean("Generate Specifications")
+    required_spec_option_ids = fields.Many2many('ai.spec.option', string="Required Specifications")
+    force_refresh = fields.Boolean("Force Refresh")
+    vector_store_id = fields.Char("Vector Store ID", readonly=True,
+                                  help="OpenAI vector store built from the supporting document.")
+    doc_checksum = fields.Char("Local Document Index", readonly=True,
+                               help="SHA-256 of the supporting document indexed locally.")
+
+    def _prepare_wizard_vals(self):
+        self.ensure_one()
+        return {
+            'global_prompt': self.global_prompt,
+            'generate_title': self.generate_title,
+            'generate_description': self.generate_description,
+            'generate_keywords': self.generate_keywords,
+            'generate_disclaimer': self.generate_disclaimer,
+            'generate_shortDesc': self.generate_shortDesc,
+            'generate_specifications': self.generate_specifications,
+            'required_spec_option_ids': [(6, 0, self.required_spec_option_ids.ids)],
+            'force_refresh': self.force_refresh,
+            'doc_checksum': self.doc_checksum,
+            'vector_store_id': self.vector_store_id,
+        }
+
+    def _get_generation_wizard(self):
+        """Return a multi-product wizard configured like ``self``, to reuse its prompt and write logic."""
+        self.ensure_one()
+        return self.env['ai.generated.fields.multiple'].create(self._prepare_wizard_vals())
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+from odoo import fields, models, api, tools
+from ..tools.product_schema import selected_content_fields
+from ..tools.routing import Route
+
+
+class AIGenerationRoute(models.Model):
+    """Sends some content fields to another model, with or without tools.
+
+    Each selected field goes to the first active route accepting it, by sequence;
+    fields no route accepts keep the default model with web and file search. The
+    partial answers of all routes are merged before the product is written.
+    """
+    _name = 'ai.generation.route'
+    _description = 'AI Generation Route'
+    _order = 'sequence, id'
+
+    name = fields.Char(required=True)
+    sequence = fields.Integer(default=10)
+    active = fields.Boolean(default=True)
+    model_name = fields.Char("Model", required=True, default='gpt-4o-mini')
+    web_search = fields.Boolean("Web Search")
+    file_search = fields.Boolean("File Search", help="Search the supporting document, when one is given.")
+    generate_title = fields.Boolean("Product Title")
+    generate_description = fields.Boolean("Ecom Description")
+    generate_keywords = fields.Boolean("Ecom Keywords")
+    generate_disclaimer = fields.Boolean("Ecom Disclaimer")
+    generate_shortDesc = fields.Boolean("Short Description")
+    generate_specifications = fields.Boolean("Specifications")
+    call_count = fields.Integer("Calls", compute='_compute_latency_stats')
+    avg_latency = fields.Float("Average Latency (s)", compute='_compute_latency_stats')
+    error_count = fields.Integer("Errors", compute='_compute_latency_stats')
+
+    def _compute_latency_stats(self):
+        stats = {
+            route: (count, latency)
+            for route, count, latency in self.env['ai.generation.log']._read_group(
+                [('route_id', 'in', self.ids)], ['route_id'], ['__count', 'latency:avg'])
+        }
+        errors = dict(self.env['ai.generation.log']._read_group(
+            [('route_id', 'in', self.ids), ('outcome', '=', 'error')], ['route_id'], ['__count']))
+        for route in self:
+            route.call_count, route.avg_latency = stats.get(route, (0, 0.0))
+            route.error_count = errors.get(route, 0)
+
+    @api.model
+    @tools.ormcache()
+    def _get_rules(self):
+        """Active routes as plain ``Route`` tuples, in priority order."""
+        return tuple(
+            Route(route.id, route.name, route.model_name, selected_content_fields(route),
+                  route.web_search, route.file_search)
+            for route in self.sudo().search([])
+        )
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        self.env.registry.clear_cache()
+        return super().create(vals_list)
+
+    def write(self, vals):
+        self.env.registry.clear_cache()
+        return super().write(vals)
+
+    def unlink(self):
+        self.env.registry.clear_cache()
+        return super().unlink()
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+from odoo import fields, models, api, _
+from odoo.exceptions import UserError
+import hashlib
+import logging
+import time
+_logger = logging.getLogger(__name__)
+
+DEFAULT_RPM = 500
+DEFAULT_TPM = 450000
+# Share of each bucket that only interactive calls may use
+DEFAULT_INTERACTIVE_RESERVE = 0.2
+DEFAULT_MAX_WAIT = 600
+MAX_SLEEP = 2.0
+
+
+class AIRateLimit(models.Model):
+    """Token buckets shared by every worker calling OpenAI with the same key.
+
+    One row per API key and base URL holds the requests and tokens left in the current
+    minute. Callers lock the row, refill it for the elapsed time and take their share,
+    each on a short transaction of its own, so no lock is held while waiting. Bulk
+    generation cannot dip into the last ``interactive_reserve`` of either bucket, which
+    keeps room for the single-product wizard.
+    """
+    _name = 'ai.rate.limit'
+    _description = 'AI Rate Limit Bucket'
+    _order = 'name'
+
+    name = fields.Char(required=True, readonly=True)
+    requests_available = fields.Float("Requests Left", readonly=True)
+    tokens_available = fields.Float("Tokens Left", readonly=True)
+    refreshed_at = fields.Datetime(readonly=True)
+    wait_count = fields.Integer("Delayed Calls", readonly=True)
+    wait_total = fields.Float("Total Wait (s)", readonly=True)
+    last_wait = fields.Float("Last Wait (s)", readonly=True)
+    avg_wait = fields.Float("Average Wait (s)", compute='_compute_avg_wait')
+
+    _sql_constraints = [
+        ('name_unique', 'unique(name)', 'There is one rate limit bucket per API key.')
+    ]
+
+    @api.depends('wait_count', 'wait_total')
+    def _compute_avg_wait(self):
+        for rec in self:
+            rec.avg_wait = rec.wait_total / rec.wait_count if rec.wait_count else 0.0
+
+    @api.model
+    def _get_limits(self):
+        """Bucket name, requests and tokens per minute, and the interactive reserve ratio."""
+        ICP = self.env['ir.config_parameter'].sudo()
+        key = "%s|%s" % (ICP.get_param('openai_api_key') or '', ICP.get_param('ai_field_generator.openai_base_url') or '')
+        return (
+            'openai-%s' % hashlib.sha256(key.encode()).hexdigest()[:12],
+            ICP._get_number_param('ai_field_generator.rate_limit_rpm', DEFAULT_RPM),
+            ICP._get_number_param('ai_field_generator.rate_limit_tpm', DEFAULT_TPM),
+            ICP._get_number_param('ai_field_generator.rate_limit_interactive_reserve', DEFAULT_INTERACTIVE_RESERVE),
+        )
+
+    @api.model
+    def _take(self, name, rpm, tpm, tokens, reserve, waited):
+        """Take one request and ``tokens`` from the bucket if it allows; return the seconds still to wait."""
+        cr = self.env.cr
+        cr.execute("""
+            INSERT INTO ai_rate_limit (name, requests_available, tokens_available, refreshed_at,
+                                       wait_count, wait_total, last_wait, create_date, write_date)
+            VALUES (%s, %s, %s, clock_timestamp() at time zone 'UTC', 0, 0, 0,
+                    now() at time zone 'UTC', now() at time zone 'UTC')
+            ON CONFLICT (name) DO NOTHING
+        """, [name, rpm, tpm])
+        cr.execute("""
+            SELECT requests_available, tokens_available,
+                   EXTRACT(EPOCH FROM (clock_timestamp() at time zone 'UTC') - refreshed_at)
+              FROM ai_rate_limit
+             WHERE name = %s
+               FOR UPDATE
+        """, [name])
+        requests, available_tokens, elapsed = cr.fetchone()
+        elapsed = max(float(elapsed or 0.0), 0.0)
+
+        wait = 0.0
+        if rpm:
+            requests = min(requests + elapsed * rpm / 60.0, rpm)
+            needed = reserve * rpm + 1
+            if requests < needed:
+                wait = max(wait, (needed - requests) * 60.0 / rpm)
+        if tpm:
+            available_tokens = min(available_tokens + elapsed * tpm / 60.0, tpm)
+            # A request larger than the bucket only waits for a full one
+            needed = reserve * tpm + min(tokens, tpm * (1 - reserve))
+            if available_tokens < needed:
+                wait = max(wait, (needed - available_tokens) * 60.0 / tpm)
+
+        if wait:
+            cr.execute("""
+                UPDATE ai_rate_limit
+                   SET requests_available = %s, tokens_available = %s,
+                       refreshed_at = clock_timestamp() at time zone 'UTC'
+                 WHERE name = %s
+            """, [requests, available_tokens, name])
+            return wait
+        cr.execute("""
+            UPDATE ai_rate_limit
+               SET requests_available = %s, tokens_available = %s,
+                   refreshed_at = clock_timestamp() at time zone 'UTC',
+                   wait_count = wait_count + %s, wait_total = wait_total + %s, last_wait = %s,
+                   write_date = now() at time zone 'UTC'
+             WHERE name = %s
+        """, [requests - 1, available_tokens - tokens, int(waited > 0), waited, waited, name])
+        return 0.0
+
+    @api.model
+    def _acquire(self, tokens, interactive=False):
+        """Block until one request of about ``tokens`` tokens is allowed; return the seconds waited.
+
+        Only uses private cursors, so it is safe to call from generation worker threads.
+        """
+        start = time.monotonic()
+        while True:
+            with self.pool.cursor() as cr:
+                limiter = self.with_env(self.env(cr=cr)).sudo()
+                name, rpm, tpm, reserve = limiter._get_limits()
+                if not (rpm or tpm):
+                    return 0.0
+                waited = time.monotonic() - start
+                wait = limiter._take(name, rpm, tpm, tokens, 0.0 if interactive else reserve, waited)
+                max_wait = limiter.env['ir.config_parameter']._get_number_param(
+                    'ai_field_generator.rate_limit_max_wait', DEFAULT_MAX_WAIT)
+            if not wait:
+                if waited >= 1:
+                    _logger.info("Rate limiter held a %s call for %.1fs",
+                                 'interactive' if interactive else 'bulk', waited)
+                return waited
+            if waited + wait > max_wait:
+                raise UserError(_("The OpenAI rate limit did not free up within %s seconds.", max_wait))
+            time.sleep(min(wait, MAX_SLEEP))
+
+    @api.model
+    def _settle(self, estimated, actual):
+        """Correct the token bucket once the real usage of a call is known."""
+        if actual is None or actual == estimated:
+            return
+        with self.pool.cursor() as cr:
+            limiter = self.with_env(self.env(cr=cr)).sudo()
+            name, rpm, tpm, reserve = limiter._get_limits()
+            if tpm:
+                cr.execute("UPDATE ai_rate_limit SET tokens_available = tokens_available - %s WHERE name = %s",
+                           [actual - estimated, name])
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+from odoo import fields, models, api
+from datetime import timedelta
+import hashlib
+import json
+import logging
+from ..tools.product_schema import build_product_schema
+_logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_DAYS = 7
+DEFAULT_MAX_ENTRIES = 10000
+
+
+class AIResponseCache(models.Model):
+    """Generated content keyed by a hash of everything that went into the request.
+
+    A hit means the same product inputs, prompt options, model and schema were already
+    sent to OpenAI, so the stored answer can be applied without a network call. Hits are
+    recorded in ``ai.generation.log`` next to the calls, which gives the hit rate.
+    """
+    _name = 'ai.response.cache'
+    _description = 'AI Response Cache'
+    _order = 'last_used desc'
+
+    key = fields.Char(required=True, index=True, readonly=True)
+    model_name = fields.Char("Model", readonly=True)
+    product_id = fields.Many2one('motorstate.product', ondelete='set null', readonly=True)
+    response = fields.Json(readonly=True)
+    hit_count = fields.Integer(default=0, readonly=True)
+    last_used = fields.Datetime(default=fields.Datetime.now, index=True, readonly=True)
+
+    _sql_constraints = [
+        ('key_unique', 'unique(key)', 'Response cache keys must be unique.')
+    ]
+
+    @api.model
+    def _make_key(self, product, model_name, schema, **options):
+        """Hash the normalized source fields of ``product`` with the prompt options, model and schema."""
+        payload = {
+            'product': product._get_ai_source_values(),
+            'model': model_name,
+            'schema': schema,
+            'options': options,
+        }
+        raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    @api.model
+    def _make_route_key(self, product, route, mandatory, global_prompt=None, vector_store_id=None, document=None):
+        """Key of the answer of ``route`` for ``product``, the same in both wizards and the job queue."""
+        return self._make_key(
+            product, route.model,
+            build_product_schema(route.content_fields, tuple(mandatory), with_part_number=True),
+            tools=(route.web_search, route.file_search),
+            global_prompt=(global_prompt or '').strip(),
+            mandatory=list(mandatory),
+            vector_store_id=vector_store_id or None,
+            document=document or None,
+            prompt_version=product._get_prompt_version(),
+        )
+
+    @api.model
+    def _get_ttl_cutoff(self):
+        days = self.env['ir.config_parameter']._get_number_param(
+            'ai_field_generator.response_cache_ttl_days', DEFAULT_TTL_DAYS)
+        return fields.Datetime.now() - timedelta(days=days)
+
+    @api.model
+    def _lookup(self, key, source='bulk'):
+        """Return the cached response for ``key`` or ``None``; a hit is logged with the calls."""
+        entry = self.sudo().search([('key', '=', key), ('create_date', '>=', self._get_ttl_cutoff())], limit=1)
+        if not entry:
+            return None
+        entry.write({'hit_count': entry.hit_count + 1, 'last_used': fields.Datetime.now()})
+        self.env['ai.generation.log']._buffer_log({
+            'product_id': entry.product_id.id,
+            'model_name': entry.model_name,
+            'source': source,
+            'outcome': 'cached',
+        })
+        return entry.response
+
+    @api.model
+    def _store(self, key, response, model_name=None, product=None):
+        """Insert or refresh the entry for ``key``."""
+        self.env.cr.execute("""
+            INSERT INTO ai_response_cache (key, model_name, product_id, response, hit_count, last_used,
+                                           create_date, write_date, create_uid, write_uid)
+            VALUES (%s, %s, %s, %s, 0, now() at time zone 'UTC', now() at time zone 'UTC',
+                    now() at time zone 'UTC', %s, %s)
+            ON CONFLICT (key) DO UPDATE
+               SET response = EXCLUDED.response,
+                   last_used = EXCLUDED.last_used,
+                   create_date = EXCLUDED.create_date,
+                   write_date = EXCLUDED.write_date
+        """, [key, model_name, product.id if product else None, json.dumps(response), self.env.uid, self.env.uid])
+
+    @api.model
+    def _get_stats(self):
+        """Cache hits and OpenAI calls logged within the cache TTL, and the number of entries."""
+        Log = self.env['ai.generation.log'].sudo()
+        domain = [('create_date', '>=', self._get_ttl_cutoff())]
+        hits = Log.search_count(domain + [('outcome', '=', 'cached')])
+        [[requested]] = Log._read_group(domain + [('outcome', '!=', 'cached')], [], ['product_count:sum'])
+        total = hits + (requested or 0)
+        return {
+            'hits': hits,
+            'misses': requested or 0,
+            'hit_ratio': hits / total if total else 0.0,
+            'entries': self.sudo().search_count([]),
+        }
+
+    @api.model
+    def _cron_evict(self):
+        """Drop expired entries, then the least recently used ones above the size cap."""
+        max_entries = self.env['ir.config_parameter']._get_number_param(
+            'ai_field_generator.response_cache_max_entries', DEFAULT_MAX_ENTRIES)
+        self.env.cr.execute("DELETE FROM ai_response_cache WHERE create_date < %s", [self._get_ttl_cutoff()])
+        expired = self.env.cr.rowcount
+        self.env.cr.execute("""
+            DELETE FROM ai_response_cache
+             WHERE id IN (SELECT id FROM ai_response_cache ORDER BY last_used DESC OFFSET %s)
+        """, [max_entries])
+        _logger.info("Response cache eviction: %s expired, %s over the size cap; stats %s",
+                     expired, self.env.cr.rowcount, self._get_stats())
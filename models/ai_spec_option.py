@@ -1,4 +1,5 @@
-from odoo import fields, models
+from odoo import api, fields, models
+from ..tools.spec_sync import normalize_spec_key
 
 class AISpecOption(models.Model):
     _name = 'ai.spec.option'
@@ -7,6 +8,25 @@ class AISpecOption(models.Model):
 
     name = fields.Char(required=True)
     code = fields.Char()
+    key_id = fields.Many2one('motorstate.spec.key', string="Specification Key", readonly=True, ondelete='set null')
     _sql_constraints = [
         ('name_unique', 'unique(name)', 'Specification option names must be unique.')
-    ]
\ No newline at end of file
+    ]
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        options = super().create(vals_list)
+        options._link_spec_keys()
+        return options
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'name' in vals:
+            self._link_spec_keys()
+        return res
+
+    def _link_spec_keys(self):
+        """Point each option to the specification key of its name, creating it if needed."""
+        key_ids = self.env['motorstate.spec.key']._resolve_ids(self.mapped('name'))
+        for option in self:
+            option.key_id = key_ids.get(normalize_spec_key(option.name), False)
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+from odoo import models, api
+from contextlib import contextmanager
+from io import BytesIO
+import os
+import shutil
+from ..tools.file_stream import CHUNK_SIZE, atomic_write, file_size, hash_file
+
+
+class IrAttachment(models.Model):
+    _inherit = 'ir.attachment'
+
+    @api.model
+    def _get_field_attachment(self, record, field_name):
+        """Attachment behind the ``attachment=True`` binary field ``field_name`` of ``record``.
+
+        Going through the attachment avoids reading the field, which would load the whole
+        file base64 encoded into the record cache.
+        """
+        record.ensure_one()
+        return self.sudo().search([
+            ('res_model', '=', record._name),
+            ('res_id', '=', record.id),
+            ('res_field', '=', field_name),
+        ], limit=1)
+
+    @contextmanager
+    def _open_content(self):
+        """Binary file object on the attachment content, read from the filestore when possible."""
+        self.ensure_one()
+        if self.store_fname:
+            with open(self._full_path(self.store_fname), 'rb') as fh:
+                yield fh
+        else:
+            # Database storage: the content has to be loaded anyway
+            yield BytesIO(self.raw or b'')
+
+    @api.model
+    def _create_from_file(self, vals, fileobj):
+        """Create an attachment with the content of the seekable binary ``fileobj``.
+
+        With filestore storage the file is copied there in chunks, so its content is
+        never held in memory; database storage has to load it.
+        """
+        if self._storage() != 'file':
+            fileobj.seek(0)
+            return self.create(dict(vals, raw=fileobj.read()))
+        checksum = hash_file(fileobj, 'sha1')
+        fname = checksum[:2] + '/' + checksum
+        full_path = self._full_path(fname)
+        if not os.path.isfile(full_path):
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            # Threads of one process may store the same content at once: each copies to its own file
+            with atomic_write(full_path) as fh:
+                shutil.copyfileobj(fileobj, fh, CHUNK_SIZE)
+            fileobj.seek(0)
+        # Removed by the filestore garbage collector if this transaction does not commit
+        self._mark_for_gc(fname)
+        return self.create(dict(vals, store_fname=fname, checksum=checksum, file_size=file_size(fileobj)))
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from odoo import models, api
+import logging
+_logger = logging.getLogger(__name__)
+
+
+class IrConfigParameter(models.Model):
+    _inherit = 'ir.config_parameter'
+
+    @api.model
+    def _get_number_param(self, key, default):
+        """Value of ``key`` converted to the type of ``default`` (int or float).
+
+        A missing or empty parameter gives ``default``, and so does a malformed one,
+        with a warning, rather than breaking every run that reads it.
+        """
+        value = self.sudo().get_param(key)
+        if value in (None, False, ''):
+            return default
+        try:
+            return type(default)(value)
+        except (TypeError, ValueError):
+            _logger.warning("Invalid value %r for system parameter %s, using %s", value, key, default)
+            return default
@@ -1,16 +1,53 @@
 # -*- coding: utf-8 -*-
-from odoo import fields, models, api, _
+from odoo import fields, models, api, tools, _
 import logging
 import base64
+import hashlib
+import json
 import requests
+import re
+import time
+from collections import defaultdict
 from odoo.exceptions import UserError
+from ..tools.spec_sync import normalize_spec_key, sync_specifications
 _logger = logging.getLogger(__name__)
 
+DEFAULT_PUSH_CHUNK_SIZE = 500
+DEFAULT_RECOMPUTE_CHUNK_SIZE = 5000
+DEFAULT_STALE_REGENERATION_LIMIT = 500
+DEFAULT_PROMPT_VERSION = '1'
+
+_TAG_RE = re.compile(r'<[^>]*>|&nbsp;')
+
+
+def _has_text(value):
+    """Whether ``value`` has visible text; the fields are edited with an HTML widget."""
+    if not value:
+        return False
+    if '<' in value or '&' in value:
+        value = _TAG_RE.sub('', value)
+    return bool(value.strip())
+
 AI_TEXT_FIELDS = (
     'product_title',
     'ecom_description',
     'short_description',
     'ecom_keywords',
+    'ecom_disclaimer',
+)
+
+# Fields the AI prompt is built from; unchanged values mean an unchanged request
+AI_SOURCE_FIELDS = (
+    'part_number',
+    'part_name',
+    'part_brand',
+    'part_length',
+    'part_width',
+    'part_height',
+    'part_description',
+    'categ_lvl_1',
+    'categ_lvl_2',
+    'categ_lvl_3',
 )
 
 class MotorState(models.Model):
@@ -25,11 +62,16 @@ class MotorState(models.Model):
     value = fields.Char(string='Specification Value')
     specification_ids = fields.One2many(
         'motorstate.spec', 'product_id', string='Specifications')
+    spec_filter = fields.Char(
+        "Specification Filter", compute='_compute_spec_filter', search='_search_spec_filter',
+        help="Search products by specification, e.g. \"Material = Aluminum\", or by name only.")
     doc_filename = fields.Char("Document Filename")
     doc_attachment = fields.Binary("Supporting Document",
                                    attachment=True, help="Upload a PDF/DOCX/TXT that will be sent to the AI")
+    part_number = fields.Char(index=True)
     hide_update_btn = fields.Boolean(
         compute='_compute_hide_update_btn',
+        store=True,
         default=False,
     )
     ai_fields_generated = fields.Boolean(
@@ -42,45 +84,232 @@ class MotorState(models.Model):
         compute="_compute_product_created",
         store=True
     )
+    ai_generated_fingerprint = fields.Char(
+        "AI Input Fingerprint", readonly=True, copy=False,
+        help="Hash of the source fields and generation options the AI content was generated from.")
+    ai_generation_settings = fields.Json("AI Generation Settings", readonly=True, copy=False)
+    ai_content_stale = fields.Boolean(
+        string="AI Content Stale",
+        compute="_compute_ai_content_stale",
+        store=True,
+        index=True,
+        help="The source fields or the prompt version changed since the AI content was generated.")
+
+    def init(self):
+        super().init()
+        # Incremental feed exports select on write_date (see ai.feed.export)
+        tools.create_index(self.env.cr, 'motorstate_product_write_date_index', self._table, ['write_date'])
+
+    def _compute_spec_filter(self):
+        self.spec_filter = False
+
+    def _search_spec_filter(self, operator, value):
+        # Resolved to key ids first, so the lines are found through the (key_id, value) index.
+        # With '=' the name and value must match exactly (case-insensitively for the name),
+        # with 'ilike' both are matched on a part of the text.
+        if operator not in ('=', 'ilike') or not isinstance(value, str):
+            raise UserError(_("Specifications can only be searched with a text such as \"Material = Aluminum\"."))
+        name, sep, spec_value = value.partition('=') if '=' in value else value.partition(':')
+        if operator == 'ilike':
+            key_domain = [('name', 'ilike', name.strip())]
+        else:
+            key_domain = [('normalized', '=', normalize_spec_key(name))]
+        keys = self.env['motorstate.spec.key'].search(key_domain)
+        line_domain = [('key_id', 'in', keys.ids)]
+        if sep and spec_value.strip():
+            line_domain.append(('value', operator, spec_value.strip()))
+        return [('specification_ids', 'any', line_domain)]
 
     @api.depends('part_number')
     def _compute_hide_update_btn(self):
+        codes = [code for code in self.mapped('part_number') if code]
+        existing = set()
+        if codes:
+            existing = set(self.env['product.template'].search([
+                ('default_code', 'in', codes)
+            ]).mapped('default_code'))
         for record in self:
-            product = self.env['product.template'].search([
-                ('default_code', '=', record.part_number)
-            ], limit=1)
-            record.hide_update_btn = not bool(product)
+            # As before, a product without a part number keeps the button
+            record.hide_update_btn = bool(record.part_number) and record.part_number not in existing
+
+    @api.model
+    def _refresh_hide_update_btn(self, codes):
+        """Recompute ``hide_update_btn`` of the products matching template ``codes`` (created, renamed or removed)."""
+        codes = [code for code in set(codes) if code]
+        if not codes:
+            return
+        records = self.search([('part_number', 'in', codes)])
+        if records:
+            self.env.add_to_compute(self._fields['hide_update_btn'], records)
 
     @api.depends('product_title','ecom_description','short_description','ecom_keywords',
                  'ecom_disclaimer','specification_ids','specification_ids.name','specification_ids.value')
     def _compute_ai_fields_generated(self):
-        def clean(v):
-            if not v:
-                return ''
-            try:
-                return html2plaintext(v).strip()
-            except Exception:
-                return str(v).strip()
+        # Records already in the database: one query tells which ones have a non-empty spec line.
+        # Records being edited in a form (NewId) are checked on their cached lines instead.
+        stored = self.browse([rec.id for rec in self if isinstance(rec.id, int)])
+        with_specs = set()
+        if stored:
+            self.env['motorstate.spec'].flush_model(['product_id', 'key_id', 'value'])
+            self.env.cr.execute("""
+                SELECT DISTINCT product_id
+                  FROM motorstate_spec
+                 WHERE product_id IN %s
+                   AND (key_id IS NOT NULL OR btrim(coalesce(value, '')) <> '')
+            """, [tuple(stored.ids)])
+            with_specs = {row[0] for row in self.env.cr.fetchall()}
 
         for rec in self:
-            has_text = any([
-                clean(rec.product_title),
-                clean(rec.ecom_description),
-                clean(rec.short_description),
-                clean(rec.ecom_keywords),
-                clean(rec.ecom_disclaimer),
-            ])
-            has_specs = any(clean(l.name) or clean(l.value) for l in rec.specification_ids)
+            has_text = any(_has_text(rec[fname]) for fname in AI_TEXT_FIELDS)
+            if isinstance(rec.id, int):
+                has_specs = rec.id in with_specs
+            else:
+                has_specs = any(_has_text(l.name) or _has_text(l.value) for l in rec.specification_ids)
             rec.ai_fields_generated = bool(has_text or has_specs)
-    
+
+    def _recompute_ai_fields_generated(self, chunk_size=None, commit=False):
+        """Recompute ``ai_fields_generated`` in SQL for ``self``, or the whole table if empty.
+
+        Each chunk of ids is evaluated by a single UPDATE that only touches rows whose flag
+        changes. With ``commit``, every chunk is committed so huge tables can be processed
+        without one long transaction.
+        """
+        chunk_size = chunk_size or self.env['ir.config_parameter']._get_number_param(
+            'ai_field_generator.recompute_chunk_size', DEFAULT_RECOMPUTE_CHUNK_SIZE)
+        self.env.flush_all()
+        if self:
+            ids = sorted(self.ids)
+        else:
+            self.env.cr.execute("SELECT id FROM motorstate_product ORDER BY id")
+            ids = [row[0] for row in self.env.cr.fetchall()]
+
+        has_text = " OR ".join(
+            "btrim(regexp_replace(coalesce(p.%s, ''), '<[^>]*>|&nbsp;', '', 'g')) <> ''" % fname
+            for fname in AI_TEXT_FIELDS
+        )
+        query = """
+            WITH flags AS (
+                SELECT p.id, (%s OR EXISTS (
+                           SELECT 1 FROM motorstate_spec s
+                            WHERE s.product_id = p.id
+                              AND (s.key_id IS NOT NULL OR btrim(coalesce(s.value, '')) <> '')
+                       )) AS flag
+                  FROM motorstate_product p
+                 WHERE p.id IN %%s
+            )
+            UPDATE motorstate_product p
+               SET ai_fields_generated = flags.flag
+              FROM flags
+             WHERE p.id = flags.id
+               AND p.ai_fields_generated IS DISTINCT FROM flags.flag
+        """ % has_text
+
+        changed = 0
+        for offset in range(0, len(ids), chunk_size):
+            chunk = ids[offset:offset + chunk_size]
+            self.env.cr.execute(query, [tuple(chunk)])
+            changed += self.env.cr.rowcount
+            if commit:
+                self.env.cr.commit()
+            _logger.info("ai_fields_generated recompute: %s/%s products processed, %s changed",
+                         offset + len(chunk), len(ids), changed)
+        self.invalidate_model(['ai_fields_generated'])
+        return changed
+
     @api.depends('product_temp_id')
     def _compute_product_created(self):
         for record in self:
-            product = self.env['product.template'].search([
-                ('id', '=', record.product_temp_id.id)
-            ], limit=1)
-            record.product_created = True if product else False
-                           
+            record.product_created = bool(record.product_temp_id)
+
+    def _get_ai_source_values(self):
+        """Normalized values of the prompt source fields, stable across whitespace-only edits."""
+        self.ensure_one()
+        values = {}
+        for fname in AI_SOURCE_FIELDS:
+            value = self[fname]
+            values[fname] = ' '.join(str(value).split()) if value else ''
+        return values
+
+    @api.model
+    def _get_prompt_version(self):
+        return self.env['ir.config_parameter'].sudo().get_param(
+            'ai_field_generator.prompt_version', DEFAULT_PROMPT_VERSION)
+
+    @api.model
+    def _make_generation_settings(self, content_fields, spec_options, global_prompt,
+                                  doc_checksum=None, vector_store_id=None):
+        """Options a generation ran with, stored on the products it wrote to."""
+        return {
+            'fields': list(content_fields),
+            'required_spec_option_ids': sorted(spec_options.ids),
+            'global_prompt': (global_prompt or '').strip(),
+            'doc_checksum': doc_checksum or None,
+            'vector_store_id': vector_store_id or None,
+            'prompt_version': self._get_prompt_version(),
+        }
+
+    def _get_ai_fingerprint(self, settings):
+        """Hash of the current source values of ``self`` generated with ``settings``."""
+        self.ensure_one()
+        raw = json.dumps({'source': self._get_ai_source_values(), 'settings': settings},
+                         sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _prepare_ai_generated_vals(self, settings):
+        """Fingerprint values to write along with content generated with ``settings``."""
+        return {
+            'ai_generated_fingerprint': self._get_ai_fingerprint(settings),
+            'ai_generation_settings': settings,
+        }
+
+    @api.depends(*AI_SOURCE_FIELDS, 'ai_generated_fingerprint')
+    def _compute_ai_content_stale(self):
+        version = self._get_prompt_version()
+        for rec in self:
+            settings = rec.ai_generation_settings
+            if not rec.ai_generated_fingerprint or not settings:
+                rec.ai_content_stale = False
+                continue
+            current = rec._get_ai_fingerprint(dict(settings, prompt_version=version))
+            rec.ai_content_stale = current != rec.ai_generated_fingerprint
+
+    @api.model
+    def _flag_outdated_prompt_version(self):
+        """Mark stale the content generated with another prompt version than the current one."""
+        self.env.cr.execute("""
+            UPDATE motorstate_product
+               SET ai_content_stale = true
+             WHERE ai_generated_fingerprint IS NOT NULL
+               AND ai_content_stale IS NOT TRUE
+               AND ai_generation_settings->>'prompt_version' IS DISTINCT FROM %s
+        """, [self._get_prompt_version()])
+        if self.env.cr.rowcount:
+            self.invalidate_model(['ai_content_stale'])
+            _logger.info("Prompt version changed: %s product(s) marked stale", self.env.cr.rowcount)
+
+    @api.model
+    def _cron_regenerate_stale(self, limit=None):
+        """Queue background generation of stale products, with the options they were generated with."""
+        self._flag_outdated_prompt_version()
+        limit = limit or self.env['ir.config_parameter']._get_number_param(
+            'ai_field_generator.stale_regeneration_limit', DEFAULT_STALE_REGENERATION_LIMIT)
+        queued = self.env['ai.generation.task'].search([('state', 'in', ('pending', 'running'))]).product_id
+        stale = self.search([('ai_content_stale', '=', True), ('id', 'not in', queued.ids)], limit=limit)
+        if not stale:
+            return
+        groups = defaultdict(list)
+        for product in stale:
+            groups[json.dumps(product.ai_generation_settings, sort_keys=True)].append(product.id)
+        Wizard = self.env['ai.generated.fields.multiple']
+        for key, product_ids in groups.items():
+            job = self.env['ai.generation.job'].create(dict(
+                Wizard._prepare_options_from_settings(json.loads(key)),
+                name=_("Stale AI content (%s products)", len(product_ids)),
+                task_ids=[(0, 0, {'product_id': product_id}) for product_id in product_ids],
+            ))
+            job._trigger_processing()
+        _logger.info("Queued regeneration of %s stale product(s) in %s job(s)", len(stale), len(groups))
+
     def action_generate_ai_fields(self):
         return {
             'type': 'ir.actions.act_window',
@@ -92,47 +321,78 @@ class MotorState(models.Model):
             }
         }
 
+    def _prepare_template_vals(self, pt):
+        """Values pushed to the linked product.template, in a single write."""
+        self.ensure_one()
+        # Map fields exactly as requested
+        vals = {}
+        if 'name' in pt._fields:
+            vals['name'] = (self.product_title or pt.name or '').strip()
+        if 'ecommerce_description' in pt._fields:
+            vals['ecommerce_description'] = self.ecom_description or ''
+        if 'description_ecommerce' in pt._fields:
+            vals['description_ecommerce'] = self.short_description or ''
+        if 'ecommerce_disclaimer' in pt._fields:
+            vals['ecommerce_disclaimer'] = self.ecom_disclaimer or ''
+        #Add status and upc to the product template
+        vals['x_studio_motorstate_status'] = self.status
+        vals['x_studio_upc'] = self.upc
+        return vals
+
+    def _push_to_templates(self, timings):
+        """Push fields and specifications of ``self`` to their templates with set-based writes.
+
+        Names and descriptions differ on every template, so each template gets its own
+        write; the ORM turns the pending updates into batched UPDATE queries on flush.
+        """
+        start = time.perf_counter()
+        writes = []
+        template_specs = {}
+        for rec in self:
+            pt = rec.product_temp_id
+            writes.append((pt, rec._prepare_template_vals(pt)))
+            template_specs[pt.id] = [
+                (ms_spec.name or '', ms_spec.value or '')
+                for ms_spec in rec.specification_ids.sorted('sequence')
+            ]
+        timings['prepare'] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        for pt, vals in writes:
+            pt.write(vals)
+        self.env.flush_all()
+        timings['write'] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        counts = sync_specifications(self.env['product.specification'], 'product_tmpl_id', template_specs)
+        self.env.flush_all()
+        timings['specifications'] += time.perf_counter() - start
+        return counts
+
     def action_create_products_from_data(self):
         res = super().action_create_products_from_data()
         """
         Push mapped fields/specs to linked product.template for each selected record.
         """
+        missing = self.filtered(lambda r: not r.product_temp_id)
+        if missing:
+            # Raise on the offending record (shows clean popup)
+            raise UserError(_(
+                "Motorstate product '%s' is not linked to a product template."
+            ) % (missing[0].display_name,))
 
-        Spec = self.env['product.specification']
-
-        for rec in self:
-            pt = rec.product_temp_id
-            if not pt:
-                # Raise on the offending record (shows clean popup)
-                raise UserError(_(
-                    "Motorstate product '%s' is not linked to a product template."
-                ) % (rec.display_name,))
-
-            # Map fields exactly as requested
-            vals = {}
-            if 'name' in pt._fields:
-                vals['name'] = (rec.product_title or pt.name or '').strip()
-            if 'ecommerce_description' in pt._fields:
-                vals['ecommerce_description'] = rec.ecom_description or ''
-            if 'description_ecommerce' in pt._fields:
-                vals['description_ecommerce'] = rec.short_description or ''
-            if 'ecommerce_disclaimer' in pt._fields:
-                vals['ecommerce_disclaimer'] = rec.ecom_disclaimer or ''
-            if vals:
-                pt.write(vals)
-            # Replace specifications for this template
-            Spec.search([('product_tmpl_id', '=', pt.id)]).unlink()
-            for ms_spec in rec.specification_ids:
-                Spec.create({
-                    'product_tmpl_id': pt.id,
-                    'name': ms_spec.name or '',
-                    'value': ms_spec.value or '',
-                })
-            #Add status and upc to the product template
-            pt.write({
-                'x_studio_motorstate_status': rec.status,
-                'x_studio_upc': rec.upc,
-            })
+        chunk_size = self.env['ir.config_parameter']._get_number_param(
+            'ai_field_generator.push_chunk_size', DEFAULT_PUSH_CHUNK_SIZE)
+        timings = defaultdict(float)
+        counts = defaultdict(int)
+        for offset in range(0, len(self), chunk_size):
+            chunk = self[offset:offset + chunk_size]
+            for key, value in chunk._push_to_templates(timings).items():
+                counts[key] += value
+            # Keep the cache bounded on very large selections; everything is flushed already
+            self.env.invalidate_all()
+        _logger.info("Pushed %s product(s) to templates in %s; specifications %s",
+                     len(self), {k: round(v, 3) for k, v in timings.items()}, dict(counts))
 
         return {
             'type': 'ir.actions.client',
@@ -149,6 +409,125 @@ class MotorStateProductSpecification(models.Model):
     _description = 'Product Specification'
     
     sequence = fields.Integer(string='Sequence', default=10)
+    # Both columns lead a composite index, see init()
     product_id = fields.Many2one('motorstate.product', string='Product')
-    name = fields.Char(string='Specification Name')
-    value = fields.Char(string='Specification Value')
\ No newline at end of file
+    key_id = fields.Many2one('motorstate.spec.key', string='Specification', ondelete='restrict')
+    name = fields.Char(string='Specification Name', compute='_compute_name',
+                       inverse='_inverse_name', search='_search_name')
+    value = fields.Char(string='Specification Value')
+
+    def init(self):
+        tools.create_index(self.env.cr, 'motorstate_spec_product_id_key_id_index', self._table,
+                           ['product_id', 'key_id'])
+        tools.create_index(self.env.cr, 'motorstate_spec_key_id_value_index', self._table, ['key_id', 'value'])
+
+    @api.depends('key_id.name')
+    def _compute_name(self):
+        for line in self:
+            line.name = line.key_id.name
+
+    def _inverse_name(self):
+        key_ids = self.env['motorstate.spec.key']._resolve_ids(self.mapped('name'))
+        for line in self:
+            line.key_id = key_ids.get(normalize_spec_key(line.name), False)
+
+    def _search_name(self, operator, value):
+        return [('key_id.name', operator, value)]
+
+
+class MotorStateSpecKey(models.Model):
+    """Specification names, stored once and shared by all specification lines.
+
+    Names differing only by case or surrounding spaces are the same key; the first
+    spelling seen is kept for display.
+    """
+    _name = 'motorstate.spec.key'
+    _description = 'Specification Key'
+    _order = 'name'
+
+    name = fields.Char(required=True)
+    normalized = fields.Char(required=True, readonly=True)
+    spec_option_ids = fields.One2many('ai.spec.option', 'key_id', string="AI Specification Options")
+    line_count = fields.Integer("Lines", compute='_compute_line_count')
+
+    _sql_constraints = [
+        ('normalized_unique', 'unique(normalized)', 'Specification keys must be unique, case insensitively.')
+    ]
+
+    def _compute_line_count(self):
+        counts = dict(self.env['motorstate.spec']._read_group(
+            [('key_id', 'in', self.ids)], ['key_id'], ['__count']))
+        for key in self:
+            key.line_count = counts.get(key, 0)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            vals['normalized'] = normalize_spec_key(vals.get('name'))
+        return super().create(vals_list)
+
+    def write(self, vals):
+        if 'name' in vals:
+            vals['normalized'] = normalize_spec_key(vals['name'])
+        return super().write(vals)
+
+    @api.model
+    def _resolve_ids(self, names, cache=None):
+        """Key ids of ``names`` as ``{normalized name: id}``, creating the missing keys.
+
+        ``cache`` is a dict kept for the duration of a run: names found in it cost no
+        query, and keys found in the database are added to it. Keys created here only
+        join it once a later call finds them, after this transaction has committed.
+        """
+        cache = {} if cache is None else cache
+        result, missing = {}, {}
+        for name in names:
+            key = normalize_spec_key(name)
+            if not key:
+                continue
+            if key in cache:
+                result[key] = cache[key]
+            else:
+                missing.setdefault(key, name.strip())
+        if not missing:
+            return result
+
+        self.flush_model(['normalized'])
+        cr = self.env.cr
+        cr.execute("SELECT normalized, id FROM motorstate_spec_key WHERE normalized IN %s", [tuple(missing)])
+        found = dict(cr.fetchall())
+        cache.update(found)
+        result.update(found)
+        new = {key: name for key, name in missing.items() if key not in found}
+        if new:
+            cr.execute("""
+                INSERT INTO motorstate_spec_key (name, normalized, create_uid, write_uid, create_date, write_date)
+                SELECT name, normalized, %s, %s, now() at time zone 'UTC', now() at time zone 'UTC'
+                  FROM unnest(%s::varchar[], %s::varchar[]) AS new(name, normalized)
+                ON CONFLICT (normalized) DO NOTHING
+                RETURNING normalized, id
+            """, [self.env.uid, self.env.uid, list(new.values()), list(new)])
+            result.update(cr.fetchall())
+            # Created meanwhile by another transaction: only visible here under READ COMMITTED,
+            # which is why concurrent writers go through _ensure_keys()
+            lost = [key for key in new if key not in result]
+            if lost:
+                cr.execute("SELECT normalized, id FROM motorstate_spec_key WHERE normalized IN %s", [tuple(lost)])
+                result.update(cr.fetchall())
+        return result
+
+    @api.model
+    def _ensure_keys(self, names, cache):
+        """Create the keys of ``names`` in a committed transaction of their own and cache them.
+
+        For writers on private cursors running side by side (concurrent generation):
+        resolving before opening their cursor means they all see the same committed keys.
+        """
+        keys = {normalize_spec_key(name) for name in names} - {''}
+        if keys <= cache.keys():
+            return
+        with self.pool.cursor() as cr:
+            # Each statement sees the keys other workers committed in the meantime
+            cr.execute("SET TRANSACTION ISOLATION LEVEL READ COMMITTED")
+            result = self.with_env(self.env(cr=cr)).sudo()._resolve_ids(names)
+        cache.update(result)
\ No newline at end of file
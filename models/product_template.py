@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+from odoo import fields, models, api
+
+
+class ProductTemplate(models.Model):
+    _inherit = 'product.template'
+
+    # motorstate.product looks templates up by default_code for its Create/Update button
+    default_code = fields.Char(index=True)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        templates = super().create(vals_list)
+        self.env['motorstate.product']._refresh_hide_update_btn(templates.mapped('default_code'))
+        return templates
+
+    def write(self, vals):
+        if 'default_code' not in vals and 'active' not in vals:
+            return super().write(vals)
+        old_codes = self.mapped('default_code')
+        res = super().write(vals)
+        self.env['motorstate.product']._refresh_hide_update_btn(old_codes + self.mapped('default_code'))
+        return res
+
+    def unlink(self):
+        codes = self.mapped('default_code')
+        res = super().unlink()
+        self.env['motorstate.product']._refresh_hide_update_btn(codes)
+        return res
+
+
+class ProductProduct(models.Model):
+    _inherit = 'product.product'
+
+    def write(self, vals):
+        # The template code is computed from its variant, without going through template.write()
+        if 'default_code' not in vals:
+            return super().write(vals)
+        old_codes = self.mapped('default_code')
+        res = super().write(vals)
+        self.env['motorstate.product']._refresh_hide_update_btn(old_codes + self.mapped('default_code'))
+        return res
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+from . import test_concurrent_generation
+from . import test_json_stream
+from . import test_spec_sync
+from . import test_openai_client
+from . import test_rate_limit
+from . import test_stale_content
+from . import test_routing
+from . import test_generation_batch
+from . import test_doc_index
+from . import test_generation_job
+from . import test_document_cache
+from . import test_response_cache
+from . import test_template_push
+from . import test_update_button
+from . import test_generation_log
+from . import test_feed_export
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+import json
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+from odoo.exceptions import UserError
+from odoo.tests import TransactionCase, tagged
+
+LATENCY = 0.2
+
+
+class FakeLatencyClient:
+    """Responses API stand-in streaming a title for each prompt after ``latency`` seconds.
+
+    Counts the calls and the highest number of calls in flight at once.
+    """
+
+    def __init__(self, latency=LATENCY, fail_part=None):
+        self.responses = self
+        self.latency = latency
+        self.fail_part = fail_part
+        self.lock = threading.Lock()
+        self.calls = self.active = self.max_active = 0
+
+    def create(self, input, stream=False, **kwargs):
+        part_number = re.search(r"Part Number: (\S+)", input).group(1)
+        with self.lock:
+            self.calls += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.latency)
+        finally:
+            with self.lock:
+                self.active -= 1
+        if part_number == self.fail_part:
+            raise RuntimeError("Mock failure")
+        payload = json.dumps({'part_number': part_number, 'product_title': "Title %s" % part_number})
+        events = [SimpleNamespace(type='response.output_text.delta', delta=payload[pos:pos + 7],
+                                  output_text=payload[pos:pos + 7])
+                  for pos in range(0, len(payload), 7)]
+        events.append(SimpleNamespace(type='response.completed', output_text=None,
+                                      response=SimpleNamespace(usage=None, output=[])))
+        return iter(events)
+
+
+@tagged('post_install', '-at_install')
+class TestConcurrentGeneration(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        ICP = cls.env['ir.config_parameter'].sudo()
+        ICP.set_param('ai_field_generator.rate_limit_rpm', '0')
+        ICP.set_param('ai_field_generator.rate_limit_tpm', '0')
+        cls.products = cls.env['motorstate.product'].create([{
+            'part_number': 'TEST-CONC-%02d' % i,
+            'part_name': 'Test Part %02d' % i,
+            'part_brand': 'ACME',
+        } for i in range(6)])
+
+    def setUp(self):
+        super().setUp()
+        # Workers write on cursors of their own; in tests they share the test transaction
+        if self.registry.test_cr is None:
+            self.registry.enter_test_mode(self.cr)
+            self.addCleanup(self.registry.leave_test_mode)
+        self.patch(self.env.cr, 'commit', lambda: None)
+        self.wizard = self.env['ai.generated.fields.multiple'].create({
+            'product_ids': [(6, 0, self.products.ids)],
+            'generate_title': True,
+            'run_mode': 'concurrent',
+            'max_workers': 3,
+        })
+
+    def test_requests_run_in_parallel(self):
+        client = FakeLatencyClient()
+        start = time.perf_counter()
+        self.wizard._generate_concurrent(client, self.products, [], None)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(client.calls, len(self.products))
+        self.assertGreater(client.max_active, 1)
+        self.assertLessEqual(client.max_active, 3)
+        self.assertLess(elapsed, LATENCY * len(self.products))
+        self.products.invalidate_recordset()
+        for product in self.products:
+            self.assertEqual(product.product_title, "Title %s" % product.part_number)
+
+    def test_failed_product_does_not_stop_the_others(self):
+        failing = self.products[0]
+        client = FakeLatencyClient(fail_part=failing.part_number)
+        with self.assertRaisesRegex(UserError, failing.part_number):
+            self.wizard._generate_concurrent(client, self.products, [], None)
+
+        self.assertEqual(client.calls, len(self.products))
+        self.products.invalidate_recordset()
+        self.assertFalse(failing.product_title)
+        for product in self.products - failing:
+            self.assertEqual(product.product_title, "Title %s" % product.part_number)
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+import io
+import os
+import tempfile
+
+from odoo.tests import BaseCase, TransactionCase, tagged
+
+from odoo.addons.ai_field_generator.models import ai_document_index
+from odoo.addons.ai_field_generator.tools.doc_index import DocumentIndex, iter_pages, iter_passages, tokenize
+
+CATALOGUE = (
+    "Front brake rotors\n"
+    "Part BR-1234/F vented rotor 300 mm for sport models.\n"
+    "Rear brake pads\n"
+    "Part PD-778 ceramic pads, low dust, quiet operation.\n"
+)
+
+
+@tagged('post_install', '-at_install')
+class TestDocIndexTools(BaseCase):
+
+    def test_tokenize_part_numbers(self):
+        self.assertEqual(tokenize("Rotor BR-1234/F"), ['rotor', 'br-1234/f', 'br1234f'])
+
+    def test_iter_passages_overlap(self):
+        words = ["w%s" % i for i in range(25)]
+        passages = list(iter_passages([" ".join(words), "", "last page"], size=10, overlap=3))
+        self.assertEqual([page_no for page_no, _text in passages], [1, 1, 1, 1, 3])
+        self.assertEqual(passages[0][1].split(), words[0:10])
+        self.assertEqual(passages[1][1].split(), words[7:17])
+        self.assertEqual(passages[3][1].split(), words[21:25])
+        self.assertEqual(passages[4], (3, "last page"))
+
+    def test_iter_pages_text(self):
+        lines = ["line %s\n" % i for i in range(130)]
+        pages = list(iter_pages(io.BytesIO("".join(lines).encode()), 'catalogue.txt'))
+        self.assertEqual(len(pages), 3)
+        self.assertEqual("".join(pages), "".join(lines))
+
+    def test_search(self):
+        index = DocumentIndex.build(iter_passages(iter_pages(io.BytesIO(CATALOGUE.encode()), 'catalogue.txt'),
+                                                  size=8, overlap=0))
+        results = index.search("BR1234F rotor", k=1)
+        self.assertEqual(len(results), 1)
+        self.assertIn("BR-1234/F", results[0][2])
+        self.assertIn("PD-778", index.search("pd-778", k=1)[0][2])
+        self.assertEqual(index.search("unknown"), [])
+        self.assertEqual(DocumentIndex().search("rotor"), [])
+
+    def test_save_and_load(self):
+        index = DocumentIndex.build(iter_passages([CATALOGUE], size=8, overlap=2))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'index.json.gz')
+            index.save(path)
+            index.save(path)
+            self.assertEqual(os.listdir(tmp), ['index.json.gz'])
+            loaded = DocumentIndex.load(path)
+        self.assertEqual(loaded.passages, index.passages)
+        self.assertEqual(loaded.postings, index.postings)
+        self.assertEqual(loaded.search("ceramic pads"), index.search("ceramic pads"))
+
+
+@tagged('post_install', '-at_install')
+class TestDocumentIndex(TransactionCase):
+
+    def setUp(self):
+        super().setUp()
+        self.Index = self.env['ai.document.index']
+        self.product = self.env['motorstate.product'].new({'part_number': 'BR-1234/F', 'part_name': 'Rotor'})
+        self.checksum = self.Index._ensure_index(io.BytesIO(CATALOGUE.encode()), 'catalogue.txt')
+        self.path = self.Index._index_path(self.checksum)
+        self.addCleanup(self._forget_index)
+
+    def _forget_index(self):
+        ai_document_index._loaded.pop(self.checksum, None)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def test_format_passages(self):
+        section = self.Index._format_passages(self.checksum, self.product)
+        self.assertIn("[page 1]", section)
+        self.assertIn("BR-1234/F", section)
+        self.assertEqual(self.Index._format_passages(False, self.product), "")
+
+    def test_restore_missing_file(self):
+        self.assertTrue(self.Index._get_index_attachment(self.checksum))
+        self._forget_index()
+        self.assertTrue(self.Index._search_product(self.checksum, self.product))
+        self.assertTrue(os.path.exists(self.path))
+
+    def test_missing_everywhere(self):
+        self.Index._get_index_attachment(self.checksum).unlink()
+        self._forget_index()
+        self.assertEqual(self.Index._search_product(self.checksum, self.product), [])
+        self.assertEqual(self.Index._format_passages(self.checksum, self.product), "")
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+from types import SimpleNamespace
+
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+
+
+class FakeDeleteClient:
+    """Records the OpenAI files and vector stores deleted through it."""
+
+    def __init__(self):
+        self.deleted = []
+        self.files = SimpleNamespace(delete=self.deleted.append)
+        self.vector_stores = SimpleNamespace(delete=self.deleted.append)
+
+
+@tagged('post_install', '-at_install')
+class TestDocumentCache(TransactionCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = FakeDeleteClient()
+        self.patch(type(self.env['ai.generated.fields.multiple']), '_get_openai_client', lambda wizard: self.client)
+        self.patch(self.env.cr, 'commit', lambda: None)
+        self.Cache = self.env['ai.document.cache']
+        self.Cache.search([]).unlink()
+        long_ago = fields.Datetime.now() - timedelta(days=365)
+        self.entries = self.Cache.create([{
+            'checksum': 'checksum-%s' % name,
+            'file_id': 'file-%s' % name,
+            'vector_store_id': 'vs-%s' % name,
+            'last_used': long_ago,
+        } for name in ('unused', 'job', 'batch', 'product')])
+
+    def test_referenced_stores_are_kept(self):
+        unused, job_entry, batch_entry, product_entry = self.entries
+        self.env['ai.generation.job'].create({'vector_store_id': 'vs-job'})
+        self.env['ai.generation.batch'].create({'vector_store_id': 'vs-batch'})
+        product = self.env['motorstate.product'].create({'part_number': 'TEST-DOC-CACHE', 'part_name': 'Rotor'})
+        product.ai_generation_settings = {'fields': ['product_title'], 'vector_store_id': 'vs-product'}
+
+        self.Cache._cron_cleanup()
+        self.assertFalse(unused.exists())
+        self.assertEqual(sorted(self.client.deleted), ['file-unused', 'vs-unused'])
+        self.assertEqual(self.entries.exists(), job_entry | batch_entry | product_entry)
+
+    def test_finished_work_releases_stores(self):
+        self.env['ai.generation.job'].create({'vector_store_id': 'vs-job', 'state': 'done'})
+        self.env['ai.generation.batch'].create({'vector_store_id': 'vs-batch', 'state': 'ingested'})
+        self.Cache._cron_cleanup()
+        self.assertFalse(self.entries.exists())
+
+    def test_size_cap(self):
+        self.env['ir.config_parameter'].sudo().set_param('ai_field_generator.document_cache_ttl_days', '1000')
+        self.env['ir.config_parameter'].sudo().set_param('ai_field_generator.document_cache_max_entries', '1')
+        self.entries[0].last_used = fields.Datetime.now()
+        self.Cache._cron_cleanup()
+        self.assertEqual(self.entries.exists(), self.entries[0])
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+import json
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestFeedExport(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.products = cls.env['motorstate.product'].create([{
+            'part_number': 'TEST-FEED-%02d' % i,
+            'part_name': 'Test Part %02d' % i,
+            'product_title': 'Title %02d' % i,
+        } for i in range(5)])
+        cls.lines = cls.env['motorstate.spec'].create([
+            {'product_id': cls.products[2].id, 'name': 'Test Feed Color', 'value': 'Red'},
+            {'product_id': cls.products[3].id, 'name': 'Test Feed Material', 'value': 'Steel'},
+        ])
+
+    def setUp(self):
+        super().setUp()
+        # The export reads on a cursor of its own; in tests it shares the test transaction
+        if self.registry.test_cr is None:
+            self.registry.enter_test_mode(self.cr)
+            self.addCleanup(self.registry.leave_test_mode)
+
+    def _export(self, **vals):
+        export = self.env['ai.feed.export'].create(dict({'file_format': 'jsonl'}, **vals))
+        export.action_export()
+        rows = [json.loads(line) for line in export.attachment_id.raw.decode().splitlines()]
+        return export, [row['part_number'] for row in rows if row['part_number'].startswith('TEST-FEED-')]
+
+    def _set_write_date(self, table, records, value):
+        self.env.flush_all()
+        self.env.cr.execute("UPDATE %s SET write_date = %%s WHERE id IN %%s" % table, [value, tuple(records.ids)])
+        self.env.invalidate_all()
+
+    def test_keyset_paging(self):
+        export, part_numbers = self._export(batch_size=2)
+        self.assertEqual(part_numbers, self.products.sorted('id').mapped('part_number'))
+        self.assertEqual(export.state, 'done')
+        self.assertGreaterEqual(export.product_count, len(self.products))
+
+    def test_incremental_overlap(self):
+        # Later than any other export of the database, so it is the one the next export starts from
+        started_at = fields.Datetime.now().replace(microsecond=0) + timedelta(days=1)
+        self.env['ai.feed.export'].create({'state': 'done', 'started_at': started_at})
+        self.env['ir.config_parameter'].sudo().set_param('ai_field_generator.feed_overlap_minutes', '10')
+        old = started_at - timedelta(days=1)
+        self._set_write_date('motorstate_product', self.products, old)
+        self._set_write_date('motorstate_spec', self.lines, old)
+        self._set_write_date('motorstate_spec_key', self.lines.key_id, old)
+        # Within the overlap, before it, through a specification line and through a key
+        self._set_write_date('motorstate_product', self.products[0], started_at - timedelta(minutes=5))
+        self._set_write_date('motorstate_product', self.products[1], started_at - timedelta(minutes=20))
+        self._set_write_date('motorstate_spec', self.lines[0], started_at + timedelta(minutes=1))
+        self._set_write_date('motorstate_spec_key', self.lines[1].key_id, started_at + timedelta(minutes=1))
+
+        _export, part_numbers = self._export(incremental=True)
+        expected = self.products[0] | self.products[2] | self.products[3]
+        self.assertEqual(part_numbers, expected.mapped('part_number'))
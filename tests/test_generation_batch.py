@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+import json
+import re
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from odoo.tests import TransactionCase, tagged
+
+from odoo.addons.ai_field_generator.tools.prompt_builder import SOURCES_DETAILS
+
+
+class FakeBatchClient:
+    """Batch API stand-in answering every uploaded request, except those of ``fail_ids``.
+
+    Failed requests go to the error file; the output file ends with a truncated line.
+    """
+
+    def __init__(self, fail_ids=()):
+        self.fail_ids = {str(product_id) for product_id in fail_ids}
+        self.requests = []
+        self.contents = {}
+        self.files = SimpleNamespace(
+            create=self._create_file,
+            with_streaming_response=SimpleNamespace(content=self._file_content),
+        )
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._retrieve_batch)
+
+    def _create_file(self, file, purpose):
+        _name, fh = file
+        self.requests = [json.loads(line) for line in fh.read().splitlines()]
+        return SimpleNamespace(id='file-input')
+
+    def _create_batch(self, input_file_id, endpoint, completion_window, metadata):
+        return SimpleNamespace(id='batch-1', status='validating')
+
+    def _retrieve_batch(self, batch_id):
+        output, errors = [], []
+        for request in self.requests:
+            custom_id = request['custom_id']
+            if custom_id in self.fail_ids:
+                errors.append({'custom_id': custom_id, 'response': None,
+                               'error': {'code': 'server_error', 'message': "Mock failure"}})
+                continue
+            part_number = re.search(r"Part Number: (\S+)", request['body']['input']).group(1)
+            text = json.dumps({'part_number': part_number, 'product_title': "Title %s" % part_number})
+            output.append({'custom_id': custom_id, 'error': None, 'response': {'status_code': 200, 'body': {
+                'output': [{'type': 'message', 'content': [{'type': 'output_text', 'text': text}]}],
+            }}})
+        self.contents = {
+            'file-output': [json.dumps(line) for line in output] + ['{"custom_id": "trunc'],
+            'file-errors': [json.dumps(line) for line in errors],
+        }
+        return SimpleNamespace(status='completed', output_file_id='file-output', error_file_id='file-errors')
+
+    @contextmanager
+    def _file_content(self, file_id):
+        yield SimpleNamespace(iter_lines=lambda: iter(self.contents[file_id]))
+
+
+@tagged('post_install', '-at_install')
+class TestGenerationBatch(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.products = cls.env['motorstate.product'].create([{
+            'part_number': 'TEST-BATCH-%02d' % i,
+            'part_name': 'Test Part %02d' % i,
+            'part_brand': 'ACME',
+        } for i in range(4)])
+        cls.failing = cls.products[0]
+
+    def setUp(self):
+        super().setUp()
+        self.client = FakeBatchClient(fail_ids=self.failing.ids)
+        self.patch(type(self.env['ai.generated.fields.multiple']), '_get_openai_client', lambda wizard: self.client)
+        self.patch(self.env.cr, 'commit', lambda: None)
+        self.batch = self.env['ai.generation.batch'].create({
+            'product_ids': [(6, 0, self.products.ids)],
+            'generate_title': True,
+        })
+
+    def test_submit_poll_and_ingest(self):
+        self.batch.action_submit()
+        self.assertEqual(self.batch.state, 'submitted')
+        self.assertEqual(self.batch.batch_id, 'batch-1')
+        self.assertEqual(self.batch.request_count, len(self.products))
+        self.assertEqual({r['custom_id'] for r in self.client.requests}, {str(i) for i in self.products.ids})
+        # Web search is not available to batched calls, and the prompt does not ask for it
+        self.assertFalse(any(r['body']['tools'] for r in self.client.requests))
+        self.assertFalse(any('internet' in r['body']['input'] for r in self.client.requests))
+        self.assertIn(SOURCES_DETAILS, self.client.requests[0]['body']['input'])
+
+        self.batch.action_poll()
+        self.assertEqual(self.batch.state, 'ingested')
+        self.assertEqual(self.batch.ingested_count, len(self.products) - 1)
+        # The error file line and the truncated output line
+        self.assertEqual(self.batch.failed_count, 2)
+        self.assertEqual(self.batch.failed_product_ids, self.failing)
+        self.assertFalse(self.failing.product_title)
+        for product in self.products - self.failing:
+            self.assertEqual(product.product_title, "Title %s" % product.part_number)
+
+    def test_retry_failed_products(self):
+        self.batch.action_submit()
+        self.batch.action_poll()
+        action = self.batch.action_retry_failed()
+        retry = self.env['ai.generation.batch'].browse(action['res_id'])
+        self.assertEqual(retry.state, 'draft')
+        self.assertEqual(retry.product_ids, self.failing)
+        self.assertTrue(retry.generate_title)
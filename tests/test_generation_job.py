@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+from odoo import SUPERUSER_ID, api, fields, sql_db
+from odoo.exceptions import UserError
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestGenerationJob(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.products = cls.env['motorstate.product'].create([{
+            'part_number': 'TEST-JOB-%02d' % i,
+            'part_name': 'Test Part %02d' % i,
+        } for i in range(3)])
+
+    def setUp(self):
+        super().setUp()
+        self.patch(self.env.cr, 'commit', lambda: None)
+        Wizard = type(self.env['ai.generated.fields.multiple'])
+        self.patch(Wizard, '_get_openai_client', lambda wizard: None)
+        self.failing = self.env['motorstate.product']
+        self.generated = []
+
+        def generate_product(wizard, client, product, mandatory, vs_id, key_cache=None):
+            if product in self.failing:
+                raise UserError("Mock failure")
+            self.generated.append(product)
+            return [{'part_number': product.part_number, 'product_title': "Title %s" % product.part_number}]
+        self.patch(Wizard, '_generate_product', generate_product)
+
+    def _create_job(self, products, **vals):
+        return self.env['ai.generation.job'].create(dict(
+            generate_title=True,
+            task_ids=[(0, 0, {'product_id': p.id}) for p in products],
+            **vals,
+        ))
+
+    def test_process_tasks(self):
+        job = self._create_job(self.products)
+        self.env['ai.generation.job']._cron_process_tasks(batch_size=2)
+        self.assertEqual(job.task_ids.mapped('state'), ['done', 'done', 'pending'])
+        self.assertEqual(job.state, 'running')
+        self.assertEqual(job.progress, 100.0 * 2 / 3)
+        self.env['ai.generation.job']._cron_process_tasks(batch_size=2)
+        self.assertEqual(job.task_ids.mapped('state'), ['done'] * 3)
+        self.assertEqual(job.task_ids.mapped('attempts'), [1] * 3)
+        self.assertEqual(job.state, 'done')
+
+    def test_retry_counting(self):
+        self.failing = self.products[0]
+        job = self._create_job(self.products[:2], max_attempts=2)
+        failing_task = job.task_ids.filtered(lambda t: t.product_id == self.failing)
+        Job = self.env['ai.generation.job']
+        Job._cron_process_tasks()
+        # Failed once, back in the queue
+        self.assertEqual((failing_task.state, failing_task.attempts), ('pending', 1))
+        self.assertIn("Mock failure", failing_task.error)
+        Job._cron_process_tasks()
+        self.assertEqual((failing_task.state, failing_task.attempts), ('failed', 2))
+        self.assertEqual(job.state, 'done')
+        self.assertEqual(job.failed_count, 1)
+
+        self.failing = self.env['motorstate.product']
+        job.action_retry_failed()
+        self.assertEqual((failing_task.state, failing_task.attempts), ('pending', 0))
+        Job._cron_process_tasks()
+        self.assertEqual((failing_task.state, failing_task.attempts), ('done', 1))
+
+    def test_time_budget(self):
+        job = self._create_job(self.products)
+        self.env['ir.config_parameter'].sudo().set_param('ai_field_generator.job_time_budget', '0.000001')
+        self.env['ai.generation.job']._cron_process_tasks()
+        self.assertEqual(job.task_ids.mapped('state'), ['pending'] * 3)
+        self.assertFalse(self.generated)
+
+    def test_requeue_stale_tasks(self):
+        job = self._create_job(self.products[:2], max_attempts=2)
+        stale, recent = job.task_ids
+        long_ago = fields.Datetime.now() - timedelta(hours=2)
+        (stale | recent).write({'state': 'running', 'started_at': long_ago, 'attempts': 0})
+        recent.started_at = fields.Datetime.now()
+        job.state = 'running'
+
+        self.env['ai.generation.task']._requeue_stale_tasks()
+        self.assertEqual((stale.state, stale.attempts), ('pending', 1))
+        self.assertEqual(recent.state, 'running')
+
+        # A task interrupted again at its last attempt is failed rather than requeued
+        stale.write({'state': 'running', 'started_at': long_ago})
+        recent.write({'state': 'done'})
+        self.env['ai.generation.task']._requeue_stale_tasks()
+        self.assertEqual((stale.state, stale.attempts), ('failed', 2))
+        self.assertIn("Interrupted", stale.error)
+        self.assertEqual(job.state, 'done')
+
+    def test_trigger_all_task_crons(self):
+        self.env['ir.config_parameter'].sudo().set_param('ai_field_generator.job_cron_count', '3')
+        job = self._create_job(self.products)
+        job._trigger_processing()
+        crons = self.env['ai.generation.job']._get_task_crons()
+        self.assertEqual(len(crons), 3)
+        self.assertEqual(len(set(crons.mapped('code'))), 1)
+        triggers = self.env['ir.cron.trigger'].search([('cron_id', 'in', crons.ids)])
+        self.assertEqual(triggers.cron_id, crons)
+        # Existing copies are reused
+        job._trigger_processing()
+        self.assertEqual(self.env['ai.generation.job']._get_task_crons(), crons)
+
+    def test_claim_skips_locked_tasks(self):
+        # Needs transactions of their own, so the data is committed and removed afterwards
+        db = sql_db.db_connect(self.env.cr.dbname)
+        with db.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            product = env['motorstate.product'].create({'part_number': 'TEST-JOB-LOCK', 'part_name': 'Lock'})
+            job = env['ai.generation.job'].create({
+                'generate_title': True,
+                'task_ids': [(0, 0, {'product_id': product.id}), (0, 0, {'product_id': product.id})],
+            })
+            first, second = job.task_ids.ids
+            cr.commit()
+        self.addCleanup(self._delete_committed, db, job.id, product.id)
+
+        with db.cursor() as locker, db.cursor() as cr:
+            locker.execute("SELECT id FROM ai_generation_task WHERE id = %s FOR UPDATE", [first])
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            # Does not wait for the locked task and takes the next one
+            self.assertEqual(env['ai.generation.job']._claim_task().id, second)
+            self.assertFalse(env['ai.generation.job']._claim_task())
+            locker.rollback()
+            claimed = env['ai.generation.job']._claim_task()
+            self.assertEqual(claimed.id, first)
+            self.assertEqual(claimed.state, 'running')
+            self.assertTrue(claimed.started_at)
+
+    def _delete_committed(self, db, job_id, product_id):
+        with db.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            env['ai.generation.job'].browse(job_id).unlink()
+            env['motorstate.product'].browse(product_id).unlink()
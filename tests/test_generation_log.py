@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+import json
+from types import SimpleNamespace
+
+from odoo import SUPERUSER_ID, api, sql_db
+from odoo.exceptions import UserError
+from odoo.tests import TransactionCase, tagged
+
+from odoo.addons.ai_field_generator.tools.routing import Route
+
+ROUTES = (
+    Route(False, 'Titles', 'test-log-route-a', ('product_title',), False, False),
+    Route(False, 'Descriptions', 'test-log-route-b', ('short_description',), False, False),
+)
+
+
+class FakeClient:
+    """Responses API stand-in answering the first route and failing on the second."""
+
+    def __init__(self):
+        self.responses = self
+
+    def create(self, model, **kwargs):
+        if model == ROUTES[1].model:
+            raise RuntimeError("Mock failure")
+        return SimpleNamespace(output_text=json.dumps({'part_number': 'TEST-LOG', 'product_title': 'Title'}),
+                               usage=None, output=[])
+
+
+@tagged('post_install', '-at_install')
+class TestGenerationLog(TransactionCase):
+
+    def setUp(self):
+        super().setUp()
+        self.patch(type(self.env['ai.generated.fields.multiple']), '_get_openai_client',
+                   lambda wizard: FakeClient())
+        self.patch(type(self.env['ai.generation.route']), '_get_rules', lambda self: ROUTES)
+        Limiter = type(self.env['ai.rate.limit'])
+        self.patch(Limiter, '_acquire', lambda self, tokens, interactive=False: 0.0)
+        self.patch(Limiter, '_settle', lambda self, estimated, actual: None)
+
+    def test_entries_survive_a_failing_route(self):
+        # Outside test mode the log is committed on a real cursor of its own
+        self.assertIsNone(self.registry.test_cr)
+        db = sql_db.db_connect(self.env.cr.dbname)
+        self.addCleanup(self._delete_committed, db)
+        product = self.env['motorstate.product'].create({'part_number': 'TEST-LOG', 'part_name': 'Log'})
+        wizard = self.env['ai.generated.fields.wizard'].create({
+            'product_id': product.id,
+            'generate_title': True,
+            'generate_shortDesc': True,
+        })
+
+        with self.assertRaisesRegex(UserError, "Mock failure"):
+            wizard.action_generate_ai_fields()
+
+        with db.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            entries = env['ai.generation.log'].search([('model_name', 'in', [r.model for r in ROUTES])])
+            self.assertEqual(sorted(entries.mapped(lambda e: (e.model_name, e.outcome))), [
+                (ROUTES[0].model, 'success'),
+                (ROUTES[1].model, 'error'),
+            ])
+
+    def _delete_committed(self, db):
+        with db.cursor() as cr:
+            cr.execute("DELETE FROM ai_generation_log WHERE model_name IN %s", [tuple(r.model for r in ROUTES)])
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+import json
+import random
+
+from odoo.tests import BaseCase, tagged
+
+from odoo.addons.ai_field_generator.tools.json_stream import JsonStreamParser
+
+OBJECTS = [
+    {'part_number': 'A-1', 'product_title': 'Brake {Rotor}', 'specifications': {'Diameter': '300 mm'}},
+    {'part_number': 'B"2', 'short_description': 'Back\\slash \\"quoted\\" and }{ braces'},
+    {'part_number': 'C-3', 'ecom_keywords': 'unicode éè \\u0041', 'nested': {'a': {'b': {}}}},
+]
+STREAM = 'Sure, here it is: ' + ' \n'.join(json.dumps(obj) for obj in OBJECTS) + ' done.'
+
+
+def feed_chunks(chunks):
+    parser = JsonStreamParser()
+    objs = []
+    for chunk in chunks:
+        objs.extend(parser.feed(chunk))
+    return objs, parser
+
+
+@tagged('post_install', '-at_install')
+class TestJsonStreamParser(BaseCase):
+
+    def test_whole_text(self):
+        objs, parser = feed_chunks([STREAM])
+        self.assertEqual(objs, OBJECTS)
+        self.assertEqual(parser.pending_size, 0)
+
+    def test_every_split_point(self):
+        for pos in range(len(STREAM) + 1):
+            objs, _parser = feed_chunks([STREAM[:pos], STREAM[pos:]])
+            self.assertEqual(objs, OBJECTS, "split at %s" % pos)
+
+    def test_one_character_at_a_time(self):
+        self.assertEqual(feed_chunks(STREAM)[0], OBJECTS)
+
+    def test_random_chunking(self):
+        rnd = random.Random(42)
+        for _attempt in range(200):
+            chunks, pos = [], 0
+            while pos < len(STREAM):
+                size = rnd.randint(1, 12)
+                chunks.append(STREAM[pos:pos + size])
+                pos += size
+            self.assertEqual(feed_chunks(chunks)[0], OBJECTS, "chunks %r" % chunks)
+
+    def test_objects_yielded_once(self):
+        parser = JsonStreamParser()
+        text = json.dumps(OBJECTS[0])
+        self.assertEqual(parser.feed(text[:-1]), [])
+        self.assertEqual(parser.feed(text[-1:]), [OBJECTS[0]])
+        self.assertEqual(parser.feed(' '), [])
+
+    def test_invalid_object_is_skipped(self):
+        objs, parser = feed_chunks(['{"a": 1,}', '{"b": ', '2}'])
+        self.assertEqual(objs, [{'b': 2}])
+        self.assertEqual(parser.pending_size, 0)
+
+    def test_pending_size(self):
+        parser = JsonStreamParser()
+        parser.feed('noise {"a": ')
+        self.assertEqual(parser.pending_size, len('{"a": '))
+        parser.feed('"x"')
+        self.assertEqual(parser.pending_size, len('{"a": "x"'))
+        parser.feed('} trailing')
+        self.assertEqual(parser.pending_size, 0)
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+import email.utils
+import time
+from unittest.mock import patch
+
+import httpx
+
+from odoo.tests import BaseCase, tagged
+
+from odoo.addons.ai_field_generator.tools import openai_client
+from odoo.addons.ai_field_generator.tools.openai_client import (
+    RetryTransport, get_retry_count, parse_duration, reset_retry_count, retry_after,
+)
+
+URL = 'https://api.openai.com/v1/responses'
+
+
+@tagged('post_install', '-at_install')
+class TestRetryAfter(BaseCase):
+
+    def test_parse_duration(self):
+        self.assertEqual(parse_duration('1h2m3.5s'), 3723.5)
+        self.assertEqual(parse_duration('6m0s'), 360.0)
+        self.assertAlmostEqual(parse_duration('20ms'), 0.02)
+        self.assertIsNone(parse_duration(''))
+        self.assertIsNone(parse_duration(None))
+
+    def test_retry_after_seconds(self):
+        self.assertEqual(retry_after(httpx.Headers({'Retry-After': '7'})), 7.0)
+        self.assertEqual(retry_after(httpx.Headers({'retry-after': '-3'})), 0.0)
+
+    def test_retry_after_milliseconds_first(self):
+        headers = httpx.Headers({'retry-after-ms': '1500', 'retry-after': '7'})
+        self.assertEqual(retry_after(headers), 1.5)
+
+    def test_retry_after_http_date(self):
+        date = email.utils.formatdate(time.time() + 30, usegmt=True)
+        delay = retry_after(httpx.Headers({'retry-after': date}))
+        self.assertTrue(25 <= delay <= 30, delay)
+        past = email.utils.formatdate(time.time() - 30, usegmt=True)
+        self.assertEqual(retry_after(httpx.Headers({'retry-after': past})), 0.0)
+
+    def test_rate_limit_headers(self):
+        headers = httpx.Headers({
+            'x-ratelimit-remaining-requests': '0',
+            'x-ratelimit-reset-requests': '1s',
+            'x-ratelimit-remaining-tokens': '0',
+            'x-ratelimit-reset-tokens': '6m0s',
+        })
+        self.assertEqual(retry_after(headers), 360.0)
+        headers['x-ratelimit-remaining-tokens'] = '1200'
+        self.assertEqual(retry_after(headers), 1.0)
+        headers['x-ratelimit-remaining-requests'] = '5'
+        self.assertIsNone(retry_after(headers))
+        self.assertIsNone(retry_after(httpx.Headers({'retry-after': 'soon'})))
+
+
+@tagged('post_install', '-at_install')
+class TestRetryTransport(BaseCase):
+
+    def setUp(self):
+        super().setUp()
+        self.request = httpx.Request('POST', URL)
+        self.sleep = self.startPatcher(patch.object(openai_client.time, 'sleep'))
+        reset_retry_count()
+
+    def _respond(self, *outcomes):
+        """Make the underlying transport answer or raise ``outcomes`` in turn."""
+        return self.startPatcher(patch.object(httpx.HTTPTransport, 'handle_request', side_effect=[
+            httpx.Response(outcome[0], headers=outcome[1], request=self.request)
+            if isinstance(outcome, tuple) else outcome
+            for outcome in outcomes
+        ]))
+
+    def test_waits_for_retry_after(self):
+        handle = self._respond((429, {'retry-after': '2'}), (200, {}))
+        response = RetryTransport().handle_request(self.request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(handle.call_count, 2)
+        self.sleep.assert_called_once_with(2.0)
+        self.assertEqual(get_retry_count(), 1)
+
+    def test_retry_after_capped(self):
+        self._respond((503, {'retry-after': '120'}), (200, {}))
+        RetryTransport(backoff_max=30).handle_request(self.request)
+        self.sleep.assert_called_once_with(30)
+
+    def test_backoff_without_hint(self):
+        self._respond((502, {}), (502, {}), (502, {}))
+        response = RetryTransport(max_retries=2, backoff_base=0.5).handle_request(self.request)
+        self.assertEqual(response.status_code, 502)
+        delays = [call.args[0] for call in self.sleep.call_args_list]
+        self.assertEqual(len(delays), 2)
+        self.assertTrue(0 <= delays[0] <= 0.5 and 0 <= delays[1] <= 1.0, delays)
+        self.assertEqual(get_retry_count(), 2)
+
+    def test_other_errors_not_retried(self):
+        handle = self._respond((400, {'retry-after': '1'}))
+        self.assertEqual(RetryTransport().handle_request(self.request).status_code, 400)
+        self.assertEqual(handle.call_count, 1)
+        self.sleep.assert_not_called()
+
+    def test_connection_errors(self):
+        error = httpx.ConnectError("refused")
+        self._respond(error, (200, {}))
+        self.assertEqual(RetryTransport().handle_request(self.request).status_code, 200)
+        self._respond(error, error)
+        with self.assertRaises(httpx.ConnectError):
+            RetryTransport(max_retries=1).handle_request(self.request)
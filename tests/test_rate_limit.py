@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+from odoo.exceptions import UserError
+from odoo.tests import TransactionCase, tagged
+
+from odoo.addons.ai_field_generator.models.ai_rate_limit import DEFAULT_INTERACTIVE_RESERVE, DEFAULT_RPM
+
+RPM = 60
+TPM = 6000
+
+
+@tagged('post_install', '-at_install')
+class TestRateLimit(TransactionCase):
+
+    def setUp(self):
+        super().setUp()
+        # The limiter works on cursors of its own; in tests they share the test transaction
+        if self.registry.test_cr is None:
+            self.registry.enter_test_mode(self.cr)
+            self.addCleanup(self.registry.leave_test_mode)
+        ICP = self.env['ir.config_parameter'].sudo()
+        ICP.set_param('ai_field_generator.rate_limit_rpm', str(RPM))
+        ICP.set_param('ai_field_generator.rate_limit_tpm', str(TPM))
+        ICP.set_param('ai_field_generator.rate_limit_interactive_reserve', '0.2')
+        ICP.set_param('ai_field_generator.rate_limit_max_wait', '0')
+        self.Limiter = self.env['ai.rate.limit']
+        self.name = self.Limiter._get_limits()[0]
+
+    def _set_bucket(self, requests, tokens, age=0):
+        """Put ``requests`` and ``tokens`` in the bucket, as refilled ``age`` seconds ago."""
+        self.Limiter._take(self.name, RPM, TPM, 0, 0.0, 0)
+        self.env.cr.execute("""
+            UPDATE ai_rate_limit
+               SET requests_available = %s, tokens_available = %s,
+                   refreshed_at = (clock_timestamp() at time zone 'UTC') - %s * interval '1 second'
+             WHERE name = %s
+        """, [requests, tokens, age, self.name])
+
+    def _bucket(self):
+        self.env.cr.execute("SELECT requests_available, tokens_available FROM ai_rate_limit WHERE name = %s",
+                            [self.name])
+        return self.env.cr.fetchone()
+
+    def test_refill(self):
+        self._set_bucket(0, 0, age=30)
+        self.assertEqual(self.Limiter._take(self.name, RPM, TPM, 100, 0.2, 0), 0.0)
+        requests, tokens = self._bucket()
+        self.assertAlmostEqual(requests, RPM / 2 - 1, delta=0.5)
+        self.assertAlmostEqual(tokens, TPM / 2 - 100, delta=50)
+
+    def test_refill_capped(self):
+        self._set_bucket(0, 0, age=3600)
+        self.Limiter._take(self.name, RPM, TPM, 100, 0.2, 0)
+        self.assertEqual(self._bucket(), (RPM - 1, TPM - 100))
+
+    def test_empty_bucket_waits(self):
+        self._set_bucket(0, TPM)
+        wait = self.Limiter._take(self.name, RPM, TPM, 100, 0.0, 0)
+        self.assertAlmostEqual(wait, 1.0, delta=0.1)
+        self._set_bucket(RPM, 0)
+        wait = self.Limiter._take(self.name, RPM, TPM, 600, 0.0, 0)
+        self.assertAlmostEqual(wait, 6.0, delta=0.1)
+
+    def test_reserve_kept_for_interactive_calls(self):
+        # Within the last 20% of the requests: bulk calls wait, interactive ones go through
+        self._set_bucket(RPM * 0.2, TPM)
+        with self.assertRaisesRegex(UserError, "rate limit"):
+            self.Limiter._acquire(100)
+        self.assertEqual(self.Limiter._acquire(100, interactive=True), 0.0)
+        requests, _tokens = self._bucket()
+        self.assertAlmostEqual(requests, RPM * 0.2 - 1, delta=0.1)
+
+    def test_bulk_call_above_reserve(self):
+        self._set_bucket(RPM, TPM)
+        self.assertEqual(self.Limiter._acquire(100), 0.0)
+        self.assertAlmostEqual(self._bucket()[1], TPM - 100, delta=5)
+
+    def test_settle(self):
+        self._set_bucket(RPM, TPM)
+        self.Limiter._acquire(1000)
+        self.Limiter._settle(1000, 400)
+        self.assertAlmostEqual(self._bucket()[1], TPM - 400, delta=5)
+        self.Limiter._settle(400, None)
+        self.assertAlmostEqual(self._bucket()[1], TPM - 400, delta=5)
+
+    def test_disabled(self):
+        ICP = self.env['ir.config_parameter'].sudo()
+        ICP.set_param('ai_field_generator.rate_limit_rpm', '0')
+        ICP.set_param('ai_field_generator.rate_limit_tpm', '0')
+        self.assertEqual(self.Limiter._acquire(10 ** 9), 0.0)
+
+    def test_malformed_limits_use_defaults(self):
+        ICP = self.env['ir.config_parameter'].sudo()
+        ICP.set_param('ai_field_generator.rate_limit_rpm', '60 rpm')
+        ICP.set_param('ai_field_generator.rate_limit_interactive_reserve', '')
+        with self.assertLogs('odoo.addons.ai_field_generator.models.ir_config_parameter', 'WARNING'):
+            name, rpm, tpm, reserve = self.Limiter._get_limits()
+        self.assertEqual((rpm, tpm, reserve), (DEFAULT_RPM, TPM, DEFAULT_INTERACTIVE_RESERVE))
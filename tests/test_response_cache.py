@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+import json
+from types import SimpleNamespace
+
+from odoo.tests import TransactionCase, tagged
+
+from odoo.addons.ai_field_generator.tools.routing import Route
+
+ROUTE = Route(False, 'Default', 'gpt-4o-mini', ('product_title',), True, True)
+
+
+class FakeClient:
+    """Responses API stand-in answering every request with the same title."""
+
+    def __init__(self):
+        self.responses = self
+        self.calls = 0
+
+    def create(self, input, stream=False, **kwargs):
+        self.calls += 1
+        return SimpleNamespace(output_text=json.dumps({'part_number': 'TEST-CACHE', 'product_title': 'Fresh'}),
+                               usage=None, output=[])
+
+
+@tagged('post_install', '-at_install')
+class TestResponseCache(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        ICP = cls.env['ir.config_parameter'].sudo()
+        ICP.set_param('ai_field_generator.rate_limit_rpm', '0')
+        ICP.set_param('ai_field_generator.rate_limit_tpm', '0')
+        ICP.set_param('ai_field_generator.response_cache_ttl_days', '7')
+        cls.Cache = cls.env['ai.response.cache']
+        cls.product = cls.env['motorstate.product'].create({
+            'part_number': 'TEST-CACHE',
+            'part_name': 'Brake Pad',
+            'part_brand': 'ACME',
+        })
+
+    def setUp(self):
+        super().setUp()
+        if self.registry.test_cr is None:
+            self.registry.enter_test_mode(self.cr)
+            self.addCleanup(self.registry.leave_test_mode)
+        self.patch(self.env.cr, 'commit', lambda: None)
+        self.client = FakeClient()
+        self.patch(type(self.env['ai.generated.fields.multiple']), '_get_openai_client',
+                   lambda wizard: self.client)
+
+    def _key(self, **kwargs):
+        return self.Cache._make_route_key(self.product, ROUTE, [], **kwargs)
+
+    def test_key_ignores_whitespace_edits(self):
+        key = self._key(global_prompt='Friendly tone')
+        self.product.part_name = '  Brake   Pad '
+        self.assertEqual(self._key(global_prompt=' Friendly tone\n'), key)
+        self.assertEqual(self._key(global_prompt='Friendly tone', vector_store_id=False, document=False), key)
+
+    def test_key_changes_with_inputs(self):
+        key = self._key()
+        self.assertNotEqual(self._key(global_prompt='Friendly tone'), key)
+        self.assertNotEqual(self.Cache._make_route_key(self.product, ROUTE._replace(web_search=False), []), key)
+        self.product.part_brand = 'OTHER'
+        self.assertNotEqual(self._key(), key)
+        self.product.part_brand = 'ACME'
+        self.env['ir.config_parameter'].sudo().set_param('ai_field_generator.prompt_version', 'test-next')
+        self.assertNotEqual(self._key(), key)
+
+    def test_wizards_share_keys(self):
+        wizard = self.env['ai.generated.fields.multiple'].create({
+            'product_ids': [(6, 0, self.product.ids)],
+            'generate_title': True,
+            'global_prompt': 'Friendly tone ',
+        })
+        self.assertEqual(wizard._get_response_cache_key(self.product, [], None, ROUTE),
+                         self._key(global_prompt='Friendly tone'))
+
+    def test_expired_entry_is_a_miss(self):
+        key = self._key()
+        self.Cache._store(key, [{'product_title': 'Cached'}], ROUTE.model, self.product)
+        self.assertEqual(self.Cache._lookup(key), [{'product_title': 'Cached'}])
+        self.env.cr.execute("UPDATE ai_response_cache SET create_date = now() - interval '8 days' WHERE key = %s",
+                            [key])
+        self.assertIsNone(self.Cache._lookup(key))
+
+    def test_single_wizard_hit_and_force_refresh(self):
+        key = self.Cache._make_route_key(self.product, ROUTE, [], 'Friendly tone')
+        self.Cache._store(key, [{'part_number': 'TEST-CACHE', 'product_title': 'Cached'}], ROUTE.model, self.product)
+        self.patch(type(self.env['ai.generation.route']), '_get_rules', lambda self: (ROUTE,))
+        wizard = self.env['ai.generated.fields.wizard'].create({
+            'product_id': self.product.id,
+            'generate_title': True,
+            'global_prompt': 'Friendly tone',
+        })
+
+        wizard.action_generate_ai_fields()
+        self.assertEqual(self.client.calls, 0)
+        self.assertEqual(self.product.product_title, 'Cached')
+
+        wizard.force_refresh = True
+        wizard.action_generate_ai_fields()
+        self.assertEqual(self.client.calls, 1)
+        self.assertEqual(self.product.product_title, 'Fresh')
+        self.assertEqual(self.Cache._lookup(key)[0]['product_title'], 'Fresh')
+
+    def test_hits_are_logged(self):
+        Log = self.env['ai.generation.log']
+        key = self._key()
+        self.Cache._store(key, [{'product_title': 'Cached'}], ROUTE.model, self.product)
+        self.Cache._lookup(key, source='single')
+        self.Cache._lookup(key)
+        Log._buffer_log({'product_id': self.product.id, 'model_name': ROUTE.model, 'source': 'bulk',
+                         'outcome': 'success', 'product_count': 2})
+        Log._flush_buffer()
+
+        entry = self.Cache.search([('key', '=', key)])
+        self.assertEqual(entry.hit_count, 2)
+        hits = Log.search([('product_id', '=', self.product.id), ('outcome', '=', 'cached')])
+        self.assertEqual(sorted(hits.mapped('source')), ['bulk', 'single'])
+        stats = self.Cache._get_stats()
+        self.assertGreaterEqual(stats['hits'], 2)
+        self.assertGreaterEqual(stats['misses'], 2)
+        self.assertGreater(stats['hit_ratio'], 0)
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import BaseCase, tagged
+
+from odoo.addons.ai_field_generator.tools.routing import Route, merge_route_records, plan_routes
+
+DEFAULT = Route(False, 'Default', 'gpt-4o', (), True, True)
+SHORT = Route(1, 'Short texts', 'gpt-4o-mini', ('product_title', 'short_description', 'ecom_keywords'), False, False)
+TITLES = Route(2, 'Titles', 'gpt-4.1-nano', ('product_title',), False, False)
+
+
+@tagged('post_install', '-at_install')
+class TestRouting(BaseCase):
+
+    def test_first_rule_wins(self):
+        routes = plan_routes(['product_title', 'ecom_description', 'ecom_keywords'], [SHORT, TITLES], DEFAULT)
+        self.assertEqual(routes, [
+            SHORT._replace(content_fields=('product_title', 'ecom_keywords')),
+            DEFAULT._replace(content_fields=('ecom_description',)),
+        ])
+        routes = plan_routes(['product_title', 'short_description'], [TITLES, SHORT], DEFAULT)
+        self.assertEqual([(r.id, r.content_fields) for r in routes], [(2, ('product_title',)),
+                                                                      (1, ('short_description',))])
+
+    def test_without_rules(self):
+        fields = ['product_title', 'specifications']
+        self.assertEqual(plan_routes(fields, [], DEFAULT), [DEFAULT._replace(content_fields=tuple(fields))])
+        self.assertEqual(plan_routes([], [SHORT], DEFAULT), [])
+
+    def test_routes_keep_their_settings(self):
+        route, = plan_routes(['short_description'], [SHORT], DEFAULT)
+        self.assertEqual((route.model, route.web_search, route.file_search), ('gpt-4o-mini', False, False))
+
+    def test_merge_single_part(self):
+        records = [{'part_number': 'A'}, {'part_number': 'B'}]
+        self.assertIs(merge_route_records([records]), records)
+        self.assertIs(merge_route_records([[], records, None]), records)
+        self.assertEqual(merge_route_records([]), [])
+        self.assertEqual(merge_route_records([[], None]), [])
+
+    def test_merge_parts(self):
+        merged = merge_route_records([
+            [{'part_number': 'A', 'product_title': 'Rotor'}],
+            [],
+            [{'part_number': 'A', 'ecom_description': 'Vented rotor'}],
+        ])
+        self.assertEqual(merged, [{'part_number': 'A', 'product_title': 'Rotor', 'ecom_description': 'Vented rotor'}])
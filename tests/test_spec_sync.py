@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import TransactionCase, tagged
+
+from odoo.addons.ai_field_generator.tools.spec_sync import normalize_spec_key, sync_specifications
+
+NO_CHANGE = {'created': 0, 'updated': 0, 'deleted': 0}
+
+
+@tagged('post_install', '-at_install')
+class TestSpecSync(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Spec = cls.env['motorstate.spec']
+        cls.product = cls.env['motorstate.product'].create({'part_number': 'TEST-SPEC-01', 'part_name': 'Rotor'})
+        cls.other = cls.env['motorstate.product'].create({'part_number': 'TEST-SPEC-02', 'part_name': 'Pad'})
+        cls.lines = cls.Spec.create([
+            {'product_id': cls.product.id, 'sequence': 1, 'name': 'Diameter', 'value': '300 mm'},
+            {'product_id': cls.product.id, 'sequence': 2, 'name': 'Color', 'value': 'Black'},
+            {'product_id': cls.product.id, 'sequence': 3, 'name': 'Weight', 'value': '2 kg'},
+            {'product_id': cls.product.id, 'sequence': 4, 'name': 'diameter ', 'value': '310 mm'},
+            {'product_id': cls.other.id, 'sequence': 1, 'name': 'Color', 'value': 'Red'},
+        ])
+
+    def _sync_keys(self, specs_by_parent):
+        names = [name for pairs in specs_by_parent.values() for name, _value in pairs]
+        key_ids = self.env['motorstate.spec.key']._resolve_ids(names)
+        return sync_specifications(self.Spec, 'product_id', specs_by_parent, key_ids=key_ids)
+
+    def _pairs(self, product):
+        lines = self.Spec.search([('product_id', '=', product.id)], order='sequence, id')
+        return [(line.name, line.value) for line in lines]
+
+    def test_diff_keeps_unchanged_lines(self):
+        diameter, color, weight, duplicate = self.lines[:4]
+        counts = sync_specifications(self.Spec, 'product_id', {self.product.id: [
+            ('Diameter', '300 mm'),
+            ('Color', 'Blue'),
+            ('Material', 'Steel'),
+        ]})
+        self.assertEqual(counts, {'created': 1, 'updated': 1, 'deleted': 2})
+        self.assertTrue(diameter.exists())
+        self.assertTrue(color.exists())
+        self.assertFalse((weight | duplicate).exists(), "Lines of removed or duplicate names are deleted")
+        self.assertEqual(color.value, 'Blue')
+        self.assertEqual(self._pairs(self.product), [
+            ('Diameter', '300 mm'),
+            ('Color', 'Blue'),
+            ('Material', 'Steel'),
+        ])
+        # Other owners are left alone
+        self.assertEqual(self._pairs(self.other), [('Color', 'Red')])
+
+    def test_same_pairs_write_nothing(self):
+        pairs = {self.other.id: [('Color', 'Red'), ('Finish', 'Matte')]}
+        self.assertEqual(sync_specifications(self.Spec, 'product_id', pairs),
+                         {'created': 1, 'updated': 0, 'deleted': 0})
+        self.assertEqual(sync_specifications(self.Spec, 'product_id', pairs), NO_CHANGE)
+        self.assertEqual(self._pairs(self.other), [('Color', 'Red'), ('Finish', 'Matte')])
+
+    def test_several_owners(self):
+        counts = sync_specifications(self.Spec, 'product_id', {
+            self.product.id: [],
+            self.other.id: [('Color', 'Green')],
+        })
+        self.assertEqual(counts, {'created': 0, 'updated': 1, 'deleted': 4})
+        self.assertEqual(self._pairs(self.product), [])
+        self.assertEqual(self._pairs(self.other), [('Color', 'Green')])
+
+    def test_no_owner(self):
+        self.assertEqual(sync_specifications(self.Spec, 'product_id', {}), NO_CHANGE)
+
+    def test_key_lines_compare_values_only(self):
+        diameter = self.lines[0]
+        counts = self._sync_keys({self.product.id: [('DIAMETER', '300 mm'), ('Color', 'Black')]})
+        self.assertEqual(counts, {'created': 0, 'updated': 0, 'deleted': 2})
+        self.assertEqual(diameter.name, 'Diameter', "The first spelling of a key is kept")
+        self.assertEqual(self._sync_keys({self.product.id: [('diameter', '305 mm'), ('Color', 'Black')]}),
+                         {'created': 0, 'updated': 1, 'deleted': 0})
+        self.assertEqual(diameter.value, '305 mm')
+
+    def test_lines_share_keys(self):
+        self._sync_keys({self.product.id: [('Color', 'Blue')], self.other.id: [('color ', 'Green')]})
+        lines = self.Spec.search([('product_id', 'in', (self.product | self.other).ids)])
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(len(lines.key_id), 1)
+        self.assertEqual(lines.key_id.normalized, normalize_spec_key(' COLOR'))
+
+    def test_spec_filter(self):
+        self._sync_keys({self.product.id: [('Material', 'Aluminum')], self.other.id: [('Material Grade', 'Steel')]})
+        Product = self.env['motorstate.product']
+        both = self.product | self.other
+        self.assertEqual(Product.search([('id', 'in', both.ids), ('spec_filter', '=', 'material = Aluminum')]),
+                         self.product)
+        self.assertFalse(Product.search([('id', 'in', both.ids), ('spec_filter', '=', 'Material = Alu')]))
+        self.assertEqual(Product.search([('id', 'in', both.ids), ('spec_filter', 'ilike', 'mater')]), both)
+        self.assertEqual(Product.search([('id', 'in', both.ids), ('spec_filter', 'ilike', 'Material: steel')]),
+                         self.other)
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestStaleContent(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.products = cls.env['motorstate.product'].create([{
+            'part_number': 'TEST-STALE-%02d' % i,
+            'part_name': 'Brake Rotor %02d' % i,
+            'part_brand': 'ACME',
+        } for i in range(3)])
+        cls.product = cls.products[0]
+        cls.wizard = cls.env['ai.generated.fields.multiple'].create({'generate_title': True})
+
+    def _generate(self, products):
+        for product in products:
+            self.wizard._apply_product_content(product, [{'product_title': "Title %s" % product.part_number}])
+
+    def test_never_generated_is_not_stale(self):
+        self.assertFalse(self.product.ai_generated_fingerprint)
+        self.assertFalse(self.product.ai_content_stale)
+
+    def test_source_edit_marks_stale(self):
+        self._generate(self.product)
+        self.assertTrue(self.product.ai_generated_fingerprint)
+        self.assertFalse(self.product.ai_content_stale)
+
+        self.product.part_name = ' Brake   Rotor 00 '
+        self.assertFalse(self.product.ai_content_stale, "Whitespace-only edits keep the content fresh")
+        self.product.product_title = "Edited by hand"
+        self.assertFalse(self.product.ai_content_stale, "Generated fields are not generation inputs")
+
+        self.product.part_name = 'Vented Brake Rotor'
+        self.assertTrue(self.product.ai_content_stale)
+        self.assertFalse(self.products[1].ai_content_stale)
+
+        self._generate(self.product)
+        self.assertFalse(self.product.ai_content_stale)
+
+    def test_prompt_version_marks_stale(self):
+        self._generate(self.products)
+        self.env['ir.config_parameter'].sudo().set_param('ai_field_generator.prompt_version', 'test-2')
+        self.env['motorstate.product']._flag_outdated_prompt_version()
+        self.assertEqual(self.products.mapped('ai_content_stale'), [True] * 3)
+
+        self._generate(self.product)
+        self.assertFalse(self.product.ai_content_stale)
+
+    def test_cron_respects_limit(self):
+        self._generate(self.products)
+        self.products.write({'part_brand': 'Other Brand'})
+        Task = self.env['ai.generation.task']
+        domain = [('product_id', 'in', self.products.ids)]
+
+        self.env['motorstate.product']._cron_regenerate_stale(limit=2)
+        tasks = Task.search(domain)
+        self.assertEqual(len(tasks), 2)
+        self.assertTrue(tasks.job_id.generate_title)
+        self.assertFalse(tasks.job_id.generate_description)
+
+        # Products already queued are left out of the next run
+        self.env['motorstate.product']._cron_regenerate_stale(limit=2)
+        self.assertEqual(Task.search(domain).product_id, self.products)
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+from collections import defaultdict
+from unittest import SkipTest
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestTemplatePush(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        Template = cls.env['product.template']
+        if not {'x_studio_motorstate_status', 'x_studio_upc'} <= set(Template._fields):
+            raise SkipTest("product.template lacks the Studio fields the push writes to")
+        cls.templates = Template.create([{'name': 'Template %s' % i} for i in range(3)])
+        cls.products = cls.env['motorstate.product'].create([{
+            'part_number': 'TEST-PUSH-%s' % i,
+            'part_name': 'Part %s' % i,
+            'product_title': 'Title %s' % i,
+            'product_temp_id': template.id,
+        } for i, template in enumerate(cls.templates)])
+
+    def test_each_template_gets_its_own_values(self):
+        self.products[0].specification_ids = [(0, 0, {'name': 'Color', 'value': 'Red'})]
+        self.products._push_to_templates(defaultdict(float))
+
+        self.templates.invalidate_recordset()
+        self.assertEqual(self.templates.mapped('name'), ['Title 0', 'Title 1', 'Title 2'])
+        specs = self.env['product.specification'].search([('product_tmpl_id', 'in', self.templates.ids)])
+        self.assertEqual(specs.product_tmpl_id, self.templates[0])
+
+    def test_empty_title_keeps_template_name(self):
+        self.products[1].product_title = False
+        self.products._push_to_templates(defaultdict(float))
+
+        self.templates.invalidate_recordset()
+        self.assertEqual(self.templates[1].name, 'Template 1')
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestUpdateButton(TransactionCase):
+
+    def test_hide_update_btn(self):
+        self.env['product.template'].create({'name': 'Existing', 'default_code': 'TEST-BTN-1'})
+        products = self.env['motorstate.product'].create([
+            {'part_number': 'TEST-BTN-1'},
+            {'part_number': 'TEST-BTN-2'},
+            {'part_number': False},
+        ])
+        self.assertEqual(products.mapped('hide_update_btn'), [False, True, False])
+
+        self.env['product.template'].create({'name': 'New', 'default_code': 'TEST-BTN-2'})
+        self.assertFalse(products[1].hide_update_btn)
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""Local text extraction and BM25 keyword retrieval for supporting documents.
+
+Kept free of Odoo imports so indexes can be built and queried offline.
+"""
+import gzip
+import json
+import math
+import os
+import re
+from collections import Counter
+
+from .file_stream import atomic_write
+
+try:
+    import pdfplumber
+except ImportError:
+    pdfplumber = None
+
+try:
+    import docx
+except ImportError:
+    docx = None
+
+INDEX_VERSION = 1
+PASSAGE_WORDS = 180
+PASSAGE_OVERLAP = 30
+DOCX_PARAGRAPHS_PER_PAGE = 40
+TEXT_LINES_PER_PAGE = 60
+
+# Keeps part numbers such as "A-1234/B" in one token
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-./][a-z0-9]+)*")
+
+
+def tokenize(text):
+    """Lowercase terms of ``text``; compound part numbers also yield their punctuation-free form."""
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        tokens.append(token)
+        if not token.isalnum():
+            tokens.append(re.sub(r"[-./]", "", token))
+    return tokens
+
+
+def iter_pages(fileobj, filename):
+    """Yield the text of ``fileobj`` page by page, without holding the whole document.
+
+    PDF pages are released after extraction; DOCX paragraphs and text lines are grouped
+    into pseudo pages.
+    """
+    ext = os.path.splitext(filename or '')[1].lower()
+    if ext == '.pdf':
+        if pdfplumber is None:
+            raise ImportError("pdfplumber is required to index PDF documents")
+        with pdfplumber.open(fileobj) as pdf:
+            for page in pdf.pages:
+                yield page.extract_text() or ''
+                # pdfplumber caches parsed objects on the page; drop them as we go
+                if hasattr(page, 'close'):
+                    page.close()
+                else:
+                    page.flush_cache()
+    elif ext == '.docx':
+        if docx is None:
+            raise ImportError("python-docx is required to index DOCX documents")
+        paragraphs = []
+        for paragraph in docx.Document(fileobj).paragraphs:
+            paragraphs.append(paragraph.text)
+            if len(paragraphs) >= DOCX_PARAGRAPHS_PER_PAGE:
+                yield "\n".join(paragraphs)
+                paragraphs = []
+        if paragraphs:
+            yield "\n".join(paragraphs)
+    else:
+        lines = []
+        for raw in fileobj:
+            lines.append(raw.decode('utf-8', 'replace') if isinstance(raw, bytes) else raw)
+            if len(lines) >= TEXT_LINES_PER_PAGE:
+                yield "".join(lines)
+                lines = []
+        if lines:
+            yield "".join(lines)
+
+
+def iter_passages(pages, size=PASSAGE_WORDS, overlap=PASSAGE_OVERLAP):
+    """Split page texts into overlapping word windows, yielding ``(page number, text)``."""
+    step = max(size - overlap, 1)
+    for page_no, text in enumerate(pages, 1):
+        words = text.split()
+        for start in range(0, len(words), step):
+            window = words[start:start + size]
+            if window:
+                yield page_no, " ".join(window)
+            if start + size >= len(words):
+                break
+
+
+class DocumentIndex:
+    """Okapi BM25 index over the passages of one document."""
+
+    k1 = 1.5
+    b = 0.75
+
+    def __init__(self, passages=None, postings=None, lengths=None):
+        self.passages = passages or []      # [(page number, text)]
+        self.postings = postings or {}      # term -> {passage index: term frequency}
+        self.lengths = lengths or []        # passage length in terms
+
+    @classmethod
+    def build(cls, passages):
+        index = cls()
+        for page_no, text in passages:
+            idx = len(index.passages)
+            terms = Counter(tokenize(text))
+            for term, tf in terms.items():
+                index.postings.setdefault(term, {})[idx] = tf
+            index.passages.append((page_no, text))
+            index.lengths.append(sum(terms.values()))
+        return index
+
+    def search(self, query, k=5):
+        """Return the ``k`` best passages for ``query`` as ``(score, page number, text)``."""
+        if not self.passages:
+            return []
+        n = len(self.passages)
+        avgdl = (sum(self.lengths) / n) or 1.0
+        scores = Counter()
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for idx, tf in postings.items():
+                norm = tf + self.k1 * (1 - self.b + self.b * self.lengths[idx] / avgdl)
+                scores[idx] += idf * tf * (self.k1 + 1) / norm
+        return [(score, *self.passages[idx]) for idx, score in scores.most_common(k)]
+
+    def save(self, path):
+        """Write the index to ``path``; other processes see the previous file or the complete new one."""
+        with atomic_write(path) as raw, gzip.open(raw, 'wt', encoding='utf-8') as fh:
+            json.dump({
+                'version': INDEX_VERSION,
+                'passages': self.passages,
+                'postings': self.postings,
+                'lengths': self.lengths,
+            }, fh)
+
+    @classmethod
+    def load(cls, path):
+        with gzip.open(path, 'rt', encoding='utf-8') as fh:
+            data = json.load(fh)
+        if data.get('version') != INDEX_VERSION:
+            raise ValueError("Unsupported document index version %s" % data.get('version'))
+        postings = {term: {int(idx): tf for idx, tf in docs.items()} for term, docs in data['postings'].items()}
+        return cls([tuple(p) for p in data['passages']], postings, data['lengths'])
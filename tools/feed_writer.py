@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""Line-by-line writers for the ecommerce feed export (JSON Lines and CSV).
+
+Rows are written as they come, so the size of a feed never depends on memory.
+"""
+import csv
+import io
+import json
+
+# Columns of a feed row, in output order; ``specifications`` is a {name: value} dict
+FEED_COLUMNS = (
+    'id',
+    'part_number',
+    'part_brand',
+    'product_title',
+    'short_description',
+    'ecom_description',
+    'ecom_keywords',
+    'ecom_disclaimer',
+    'specifications',
+    'updated_at',
+)
+
+
+def write_jsonl(fileobj, rows):
+    """Write one JSON object per row to the binary ``fileobj``; returns the row count."""
+    count = 0
+    for row in rows:
+        fileobj.write(json.dumps(row, ensure_ascii=False, default=str).encode() + b'\n')
+        count += 1
+    return count
+
+
+def write_csv(fileobj, rows):
+    """Write ``rows`` as UTF-8 CSV with a header to the binary ``fileobj``; returns the row count.
+
+    Specifications go in a single column as a JSON object, as their names vary by product.
+    """
+    text = io.TextIOWrapper(fileobj, encoding='utf-8', newline='')
+    writer = csv.writer(text)
+    writer.writerow(FEED_COLUMNS)
+    count = 0
+    for row in rows:
+        writer.writerow([
+            json.dumps(row[column], ensure_ascii=False) if column == 'specifications'
+            else ('' if row[column] is None else row[column])
+            for column in FEED_COLUMNS
+        ])
+        count += 1
+    text.flush()
+    # Hand the binary file back to the caller open
+    text.detach()
+    return count
+
+
+WRITERS = {
+    'jsonl': write_jsonl,
+    'csv': write_csv,
+}
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""Chunked helpers for large supporting documents, so they never sit in memory whole."""
+import hashlib
+import os
+import tempfile
+from contextlib import contextmanager
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def iter_chunks(fileobj, chunk_size=CHUNK_SIZE):
+    """Yield ``fileobj`` from its current position in blocks of ``chunk_size`` bytes."""
+    while True:
+        chunk = fileobj.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def hash_file(fileobj, algorithm='sha256', chunk_size=CHUNK_SIZE):
+    """Hex digest of ``fileobj`` read in chunks; the position is restored to the start."""
+    digest = hashlib.new(algorithm)
+    fileobj.seek(0)
+    for chunk in iter_chunks(fileobj, chunk_size):
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+def file_size(fileobj):
+    """Size of a seekable ``fileobj`` in bytes, without reading it."""
+    position = fileobj.tell()
+    size = fileobj.seek(0, os.SEEK_END)
+    fileobj.seek(position)
+    return size
+
+
+@contextmanager
+def atomic_write(path):
+    """Binary file object whose content replaces ``path`` in one step when the block exits.
+
+    The temporary file is unique and in the directory of ``path``, so concurrent writers
+    never share it and ``os.replace`` stays on one filesystem; it is removed on error.
+    The result keeps the permissions of the file it replaces, 0644 for a new one.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix='.tmp-')
+    try:
+        try:
+            mode = os.stat(path).st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o644
+        os.chmod(tmp_path, mode)
+        with os.fdopen(fd, 'wb') as fh:
+            yield fh
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
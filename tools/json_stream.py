@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""Incremental extraction of JSON objects from streamed model output.
+
+Kept free of Odoo imports so it can be benchmarked on its own.
+"""
+import json
+import re
+
+# Only these characters change the parser state; everything else is skipped by the regex engine
+_TOKEN_RE = re.compile(r'[{}"\\]')
+
+
+class JsonStreamParser:
+    """Yield each complete top-level JSON object of a text stream exactly once.
+
+    The scan position, string/escape state and brace depth are kept between calls to
+    :meth:`feed`, so every character is looked at once whatever the chunking. Text
+    outside objects is dropped immediately and a finished object's text is released
+    as soon as it is decoded, so memory is bounded by the largest single object.
+    """
+
+    def __init__(self):
+        self._parts = []        # text of the object being read, from earlier chunks
+        self._depth = 0
+        self._in_string = False
+        self._escape = False    # previous chunk ended on a backslash inside a string
+
+    @property
+    def pending_size(self):
+        """Number of buffered characters belonging to an unfinished object."""
+        return sum(len(p) for p in self._parts)
+
+    def feed(self, text):
+        """Consume ``text`` and return the list of objects completed by it."""
+        objs = []
+        if not text:
+            return objs
+        start = 0 if self._depth else None
+        skip = -1
+        if self._escape:
+            self._escape = False
+            skip = 0
+        for m in _TOKEN_RE.finditer(text):
+            i = m.start()
+            if i == skip:
+                continue
+            ch = m.group()
+            if self._in_string:
+                if ch == '\\':
+                    if i + 1 < len(text):
+                        skip = i + 1
+                    else:
+                        self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+            if not self._depth:
+                if ch == '{':
+                    self._depth = 1
+                    start = i
+                continue
+            if ch == '"':
+                self._in_string = True
+            elif ch == '{':
+                self._depth += 1
+            elif ch == '}':
+                self._depth -= 1
+                if not self._depth:
+                    self._parts.append(text[start:i + 1])
+                    chunk = ''.join(self._parts)
+                    self._parts = []
+                    start = None
+                    try:
+                        obj = json.loads(chunk)
+                    except json.JSONDecodeError:
+                        continue
+                    if isinstance(obj, dict):
+                        objs.append(obj)
+        if self._depth and start is not None:
+            self._parts.append(text[start:])
+        return objs
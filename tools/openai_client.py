@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""Per-process registry of pooled OpenAI clients with a retrying HTTP transport.
+
+Clients are shared by every run of the worker process, so connections and TLS sessions
+are reused. Retries are done at the transport level, which covers plain, streamed and
+upload requests alike; the SDK's own retries are disabled to avoid retrying twice.
+"""
+import email.utils
+import logging
+import random
+import re
+import threading
+import time
+
+import httpx
+from openai import OpenAI
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_MAX_KEEPALIVE = 10
+DEFAULT_KEEPALIVE_EXPIRY = 60.0
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_MAX = 30.0
+DEFAULT_TIMEOUT = httpx.Timeout(300.0, connect=10.0, pool=30.0)
+
+RETRY_STATUSES = frozenset({408, 409, 429, 500, 502, 503, 504})
+RETRY_EXCEPTIONS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError)
+
+# "1s", "6m0s", "20ms", "1h2m3.5s" as sent in x-ratelimit-reset-* headers
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {'h': 3600.0, 'm': 60.0, 's': 1.0, 'ms': 0.001}
+
+_clients_lock = threading.Lock()
+_clients = {}
+# Retries made by the requests of the current thread, see ``reset_retry_count``
+_retries = threading.local()
+
+
+def parse_duration(value):
+    """Seconds in a Go style duration such as ``6m0s``, or ``None``."""
+    matches = _DURATION_RE.findall(value or '')
+    if not matches:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in matches)
+
+
+def retry_after(headers):
+    """Delay requested by the server through ``Retry-After`` or the rate limit headers, or ``None``."""
+    if headers.get('retry-after-ms'):
+        try:
+            return float(headers['retry-after-ms']) / 1000
+        except ValueError:
+            pass
+    value = headers.get('retry-after')
+    if value:
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            try:
+                return max(email.utils.parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+            except (TypeError, ValueError):
+                pass
+    # Out of requests or tokens for the window: wait until the exhausted one resets
+    resets = []
+    for kind in ('requests', 'tokens'):
+        if headers.get('x-ratelimit-remaining-%s' % kind) == '0':
+            reset = parse_duration(headers.get('x-ratelimit-reset-%s' % kind))
+            if reset is not None:
+                resets.append(reset)
+    return max(resets) if resets else None
+
+
+def reset_retry_count():
+    _retries.count = 0
+
+
+def get_retry_count():
+    """Retries done in this thread since the last ``reset_retry_count``."""
+    return getattr(_retries, 'count', 0)
+
+
+class RetryTransport(httpx.HTTPTransport):
+    """HTTP transport retrying rate limited, overloaded and failed connections.
+
+    Waits for the delay asked by the server when there is one, otherwise for an
+    exponential backoff with full jitter, never longer than ``backoff_max``.
+    """
+
+    def __init__(self, max_retries=DEFAULT_MAX_RETRIES, backoff_base=DEFAULT_BACKOFF_BASE,
+                 backoff_max=DEFAULT_BACKOFF_MAX, **kwargs):
+        super().__init__(**kwargs)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def _delay(self, attempt, headers=None):
+        hinted = retry_after(headers) if headers is not None else None
+        if hinted is not None:
+            return min(hinted, self.backoff_max)
+        return random.uniform(0, min(self.backoff_base * 2 ** attempt, self.backoff_max))
+
+    def handle_request(self, request):
+        attempt = 0
+        while True:
+            try:
+                response = super().handle_request(request)
+            except RETRY_EXCEPTIONS as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._delay(attempt)
+                _logger.warning("OpenAI %s %s failed (%s), retry %s in %.1fs",
+                                request.method, request.url.path, e, attempt + 1, delay)
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    return response
+                delay = self._delay(attempt, response.headers)
+                response.close()
+                _logger.warning("OpenAI %s %s returned %s, retry %s in %.1fs",
+                                request.method, request.url.path, response.status_code, attempt + 1, delay)
+            time.sleep(delay)
+            attempt += 1
+            _retries.count = get_retry_count() + 1
+
+
+def get_client(api_key, base_url=None, max_connections=DEFAULT_MAX_CONNECTIONS,
+               max_keepalive=DEFAULT_MAX_KEEPALIVE, max_retries=DEFAULT_MAX_RETRIES):
+    """Shared client for ``api_key`` and ``base_url``, created on first use."""
+    key = (api_key, base_url or None)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            transport = RetryTransport(
+                max_retries=max_retries,
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_keepalive,
+                    keepalive_expiry=DEFAULT_KEEPALIVE_EXPIRY,
+                ),
+            )
+            client = OpenAI(
+                api_key=api_key,
+                base_url=base_url or None,
+                max_retries=0,
+                timeout=DEFAULT_TIMEOUT,
+                http_client=httpx.Client(transport=transport, timeout=DEFAULT_TIMEOUT),
+            )
+            _clients[key] = client
+            _logger.info("Created OpenAI client for %s", base_url or "api.openai.com")
+        return client
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""JSON schemas for generated product content, built from the fields the user asked for."""
+from functools import lru_cache
+
+# Wizard flag -> schema property, in the order properties are emitted
+CONTENT_FIELDS = (
+    ('generate_title', 'product_title'),
+    ('generate_shortDesc', 'short_description'),
+    ('generate_description', 'ecom_description'),
+    ('generate_keywords', 'ecom_keywords'),
+    ('generate_disclaimer', 'ecom_disclaimer'),
+    ('generate_specifications', 'specifications'),
+)
+
+FIELD_LABELS = {
+    'product_title': 'product_title (product title)',
+    'short_description': 'short_description (short description)',
+    'ecom_description': 'ecom_description (long ecommerce description)',
+    'ecom_keywords': 'ecom_keywords (comma separated SEO keywords)',
+    'ecom_disclaimer': 'ecom_disclaimer (ecommerce disclaimer)',
+    'specifications': 'specifications (specification name/value pairs)',
+}
+
+
+def selected_content_fields(record):
+    """Schema properties selected by the ``generate_*`` flags of ``record``, as a tuple."""
+    return tuple(prop for flag, prop in CONTENT_FIELDS if record[flag])
+
+
+@lru_cache(maxsize=128)
+def build_product_schema(content_fields, mandatory=(), with_part_number=False):
+    """Strict JSON schema asking only for ``content_fields``.
+
+    Compiled once per combination of fields, mandatory specification keys and
+    ``with_part_number``; the returned dict is shared and must not be modified.
+    """
+    properties = {}
+    if with_part_number:
+        properties['part_number'] = {"type": "string"}
+    for prop in content_fields:
+        if prop == 'specifications':
+            properties[prop] = {
+                "type": "object",
+                "properties": {key: {"type": "string"} for key in mandatory},
+                "required": list(mandatory),
+                "additionalProperties": {"type": "string"},
+            }
+        else:
+            properties[prop] = {"type": "string"}
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+
+def describe_fields(content_fields):
+    """Prompt line listing the fields to generate."""
+    return "Only generate these fields: %s." % ", ".join(FIELD_LABELS[prop] for prop in content_fields)
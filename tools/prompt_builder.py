@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""Prompts for product content generation, shared by the wizards and the batch jobs.
+
+OpenAI reuses the computation of a prompt prefix it saw recently (from 1024 tokens
+on, in 128 token steps), which cuts the time to first token and bills those tokens
+at the cached rate. Every prompt is therefore one stable block of instructions,
+byte identical for all products of a run, followed by the product details.
+
+The default instructions are only about 200 tokens, so with a short global prompt
+and few required specifications the stable prefix stays below the 1024 token
+minimum and nothing is cached. Padding it to the minimum would bill ~800 more
+input tokens per request (at the cached rate) to save the cached share of ~200,
+so the instructions are kept short; the ordering pays off for long global
+prompts and specification lists.
+"""
+import json
+from functools import lru_cache
+
+from .product_schema import describe_fields
+
+SOURCES_TOOLS = "the available information over the internet and the file provided"
+SOURCES_WEB = "the available information over the internet"
+SOURCES_FILE = "the file provided and the product details given at the end"
+SOURCES_DETAILS = "the product details given at the end only"
+
+
+def describe_sources(web_search, file_search):
+    """Sources the instructions point to, matching the tools actually sent with the request."""
+    if web_search and file_search:
+        return SOURCES_TOOLS
+    if web_search:
+        return SOURCES_WEB
+    if file_search:
+        return SOURCES_FILE
+    return SOURCES_DETAILS
+
+
+@lru_cache(maxsize=64)
+def build_instructions(content_fields, mandatory=(), global_prompt='', sources=SOURCES_TOOLS, packed=False):
+    """Stable prefix: task, fields to generate, required specification keys and formatting rules.
+
+    Only depends on its arguments, so it is identical for every product sharing them.
+    """
+    lines = [
+        "You are an AI assistant that generates product content for an ecommerce website.",
+    ]
+    if packed:
+        lines += [
+            "Generate the details of EACH product listed at the end using %s." % sources,
+            "Return one object per product in the 'products' array, with its exact part number in 'part_number'.",
+        ]
+    else:
+        lines.append("Generate the details of the product listed at the end using %s." % sources)
+    lines += ["", describe_fields(content_fields)]
+    if 'specifications' in content_fields:
+        lines += [
+            "",
+            "Required Specifications:",
+            "The JSON field 'specifications' must include ALL of these keys "
+            "(in addition to any others you find): %s." % json.dumps(list(mandatory)),
+            "Use EXACT sequence, casing for keys, and supply accurate string values.",
+            "Include all the relevant specifications related to the product.",
+            "Make sure the specification title and its value always start with an upper case letter.",
+        ]
+    if global_prompt:
+        lines += ["", "Consider the special requests mentioned here: %s" % global_prompt]
+    lines += [
+        "",
+        "Formatting instructions:",
+        "Use only Camel Case for everything you generate even if the information provided is all uppercase "
+        "(first letter uppercase, rest all lowercase).",
+    ]
+    return "\n".join(lines)
+
+
+def format_product_details(product, passages=''):
+    """Variable section describing one product (a record or any object with the same attributes)."""
+    details = (
+        "Part Number: %s\n"
+        "Part Name: %s\n"
+        "Brand: %s\n"
+        "Product Info: %s\n"
+        "Long Description: %s\n"
+        "Category: %s"
+    ) % (
+        product.part_number or '',
+        product.part_name or '',
+        product.part_brand or '',
+        json.dumps({
+            'part_length': product.part_length or '',
+            'part_width': product.part_width or '',
+            'part_height': product.part_height or '',
+        }),
+        product.part_description or '',
+        json.dumps({
+            'Category 1': product.categ_lvl_1 or '',
+            'Category 2': product.categ_lvl_2 or '',
+            'Category 3': product.categ_lvl_3 or '',
+        }),
+    )
+    return "%s\n%s" % (details, passages.strip()) if passages and passages.strip() else details
+
+
+def build_prompt(instructions, details):
+    """Full prompt: the stable ``instructions`` first, then the product ``details`` (one string or a list)."""
+    if isinstance(details, str):
+        return "%s\n\nProduct Details:\n%s" % (instructions, details)
+    sections = "\n\n".join("Product %s:\n%s" % (index, text) for index, text in enumerate(details, 1))
+    return "%s\n\nProduct Details (%s products):\n%s" % (instructions, len(details), sections)
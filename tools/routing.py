@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""Split the requested content fields over model and tool routes."""
+from collections import namedtuple
+
+# Plain values only, so routes can be handed to generation worker threads
+Route = namedtuple('Route', 'id name model content_fields web_search file_search')
+
+
+def plan_routes(content_fields, rules, default):
+    """Assign each of ``content_fields`` to the first of ``rules`` accepting it.
+
+    ``rules`` are routes in priority order, their ``content_fields`` being the fields
+    they accept; fields no rule accepts go to ``default``. Returns the routes that got
+    work, each restricted to its fields, in the order of ``content_fields``.
+    """
+    assigned = {}
+    for field in content_fields:
+        route = next((rule for rule in rules if field in rule.content_fields), default)
+        assigned.setdefault(route, []).append(field)
+    return [route._replace(content_fields=tuple(fields)) for route, fields in assigned.items()]
+
+
+def merge_route_records(parts):
+    """Combine the objects each route returned for one product into a single object.
+
+    A single part is returned as is, keeping the objects a model may have produced
+    for other part numbers.
+    """
+    parts = [records for records in parts if records]
+    if len(parts) <= 1:
+        return parts[0] if parts else []
+    merged = {}
+    for records in parts:
+        for rec in records:
+            merged.update(rec)
+    return [merged]
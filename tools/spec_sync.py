@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""Diff-based synchronization of specification lines (name/value pairs owned by a record)."""
+from collections import defaultdict
+import logging
+_logger = logging.getLogger(__name__)
+
+
+def normalize_spec_key(name):
+    """Case and space insensitive form of a specification name."""
+    return (name or '').strip().casefold()
+
+
+def sync_specifications(Spec, parent_field, specs_by_parent, key_ids=None):
+    """Make the specification lines of several owners match the given pairs.
+
+    Lines whose key (name, case-insensitive) is still present keep their id and
+    ``sequence`` and are only written when their name or value changed; new keys are
+    created in one ``create`` call after the existing lines, and keys that disappeared
+    are unlinked in one call.
+
+    With ``key_ids``, lines reference their name through a ``key_id`` (one shared row
+    per normalized name) and only their value is compared and written.
+
+    :param Spec: recordset of the line model, e.g. ``env['motorstate.spec']``
+    :param parent_field: name of the many2one from a line to its owner
+    :param specs_by_parent: ``{owner id: [(name, value), ...]}``, in display order
+    :param key_ids: ``{normalized name: key id}`` covering every incoming name
+    :return: ``{'created': int, 'updated': int, 'deleted': int}``
+    """
+    counts = {'created': 0, 'updated': 0, 'deleted': 0}
+    if not specs_by_parent:
+        return counts
+    has_sequence = 'sequence' in Spec._fields
+
+    existing = defaultdict(dict)
+    to_delete = []
+    for line in Spec.search([(parent_field, 'in', list(specs_by_parent))]):
+        lines = existing[line[parent_field].id]
+        key = normalize_spec_key(line.name)
+        if key in lines:
+            to_delete.append(line.id)  # duplicate key, keep the first line only
+        else:
+            lines[key] = line
+
+    to_write = defaultdict(list)
+    to_create = []
+    for parent_id, pairs in specs_by_parent.items():
+        incoming = {}
+        for name, value in pairs:
+            incoming[normalize_spec_key(name)] = (name or '', value or '')
+        lines = existing.get(parent_id, {})
+        next_sequence = max((l.sequence for l in lines.values()), default=0) + 1 if has_sequence else 0
+        for key, (name, value) in incoming.items():
+            line = lines.pop(key, None)
+            if line is None:
+                if key_ids is None:
+                    vals = {parent_field: parent_id, 'name': name, 'value': value}
+                else:
+                    vals = {parent_field: parent_id, 'key_id': key_ids.get(key, False), 'value': value}
+                if has_sequence:
+                    vals['sequence'] = next_sequence
+                    next_sequence += 1
+                to_create.append(vals)
+            elif key_ids is not None:
+                if (line.value or '') != value:
+                    to_write[(None, value)].append(line.id)
+            elif line.name != name or (line.value or '') != value:
+                to_write[(name, value)].append(line.id)
+        to_delete.extend(line.id for line in lines.values())
+
+    # Lines getting the same name/value (e.g. "Brand") are written together
+    for (name, value), ids in to_write.items():
+        Spec.browse(ids).write({'value': value} if name is None else {'name': name, 'value': value})
+        counts['updated'] += len(ids)
+    if to_create:
+        Spec.create(to_create)
+        counts['created'] = len(to_create)
+    if to_delete:
+        Spec.browse(to_delete).unlink()
+        counts['deleted'] = len(to_delete)
+
+    _logger.debug("%s sync for %s owner(s): %s", Spec._name, len(specs_by_parent), counts)
+    return counts
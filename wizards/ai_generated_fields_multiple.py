@@ -2,10 +2,28 @@
 
 from odoo import _, api, fields, models
 from odoo.exceptions import UserError
-import json
-import base64
-from io import BytesIO
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import logging
+import time
+from ..tools.json_stream import JsonStreamParser
+from ..tools.openai_client import (
+    DEFAULT_MAX_CONNECTIONS, DEFAULT_MAX_RETRIES, get_client, get_retry_count, reset_retry_count,
+)
+from ..tools.spec_sync import sync_specifications
+from ..tools.product_schema import CONTENT_FIELDS, build_product_schema, selected_content_fields
+from ..tools.prompt_builder import build_instructions, build_prompt, describe_sources, format_product_details
+from ..tools.routing import Route, merge_route_records, plan_routes
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_WRITE_BATCH_SIZE = 50
+DEFAULT_PACK_TOKEN_BUDGET = 12000
+OUTPUT_TOKENS_PER_PRODUCT = 900
+MAX_AUTO_PACK_SIZE = 20
+AI_MODEL = "gpt-4o"
+# Fields no ai.generation.route accepts: the main model with web and file search
+DEFAULT_ROUTE = Route(False, 'Default', AI_MODEL, (), True, True)
 
 class AIGeneratedFieldsMultiple(models.TransientModel):
     _name = 'ai.generated.fields.multiple'
@@ -21,6 +39,19 @@ class AIGeneratedFieldsMultiple(models.TransientModel):
         attachment=True,
         help="Upload a PDF/DOCX/TXT that will be sent to the AI"
     )
+    doc_mode = fields.Selection(
+        [
+            ('vector_store', 'OpenAI File Search'),
+            ('local', 'Local Index'),
+        ],
+        string="Document Search",
+        default='vector_store',
+        required=True,
+        help="Local Index extracts the document text on the server and adds the passages "
+             "matching each product to its prompt, instead of uploading it to OpenAI."
+    )
+    doc_checksum = fields.Char(readonly=True)
+    vector_store_id = fields.Char(readonly=True)
     global_prompt = fields.Char(
         "Global Prompt",
         help="Any specific requirements that you want AI to consider goes here."
@@ -35,65 +66,83 @@ class AIGeneratedFieldsMultiple(models.TransientModel):
         'ai.spec.option',
         string="Required Specifications"
     )
-
-    PRODUCT_CONTENT_SCHEMA = {
-        "type": "object",
-        "properties": {
-            "part_number" : {"type": "string"},
-            "product_title": {"type": "string"},
-            "short_description": {"type": "string"},
-            "ecom_description": {"type": "string"},
-            "ecom_keywords": {"type": "string"},
-            "ecom_disclaimer": {"type": "string"},
-            "specifications": {
-                "type": "object",
-                "properties": {},
-                "additionalProperties": {"type": "string"},
-            }
-        },
-        "required": [
-            "part_number",
-            "product_title",
-            "short_description",
-            "ecom_description",
-            "ecom_keywords",
-            "ecom_disclaimer",
-            "specifications"
+    run_mode = fields.Selection(
+        [
+            ('sequential', 'Sequential'),
+            ('concurrent', 'Concurrent'),
+            ('background', 'Background Job'),
+            ('batch', 'Batch API'),
         ],
-        "additionalProperties": False,
-    }
+        string="Execution Mode",
+        default='sequential',
+        required=True,
+        help="Concurrent sends several product requests to OpenAI at the same time. "
+             "Background Job queues one task per product, processed by scheduled actions. "
+             "Batch API submits all products as one OpenAI batch file (slower, half the cost)."
+    )
+    stale_only = fields.Boolean(
+        "Only Stale Products",
+        help="Skip the selected products whose source fields did not change since their AI content was generated."
+    )
+    force_refresh = fields.Boolean(
+        "Force Refresh",
+        help="Ignore previously generated responses for identical inputs and call OpenAI again."
+    )
+    pack_products = fields.Boolean(
+        "Pack Several Products per Request",
+        help="Send several products in one OpenAI request, so the instructions are only sent once per group."
+    )
+    pack_size = fields.Integer(
+        "Products per Request",
+        default=0,
+        help="Number of products per packed request. 0 picks it from the token budget "
+             "(ai_field_generator.pack_token_budget)."
+    )
+    write_batch_size = fields.Integer(
+        "Write Batch Size",
+        default=lambda self: self._default_write_batch_size(),
+        help="Number of products whose results are written and committed together in sequential mode."
+    )
+    max_workers = fields.Integer(
+        "Max Parallel Requests",
+        default=lambda self: self._default_max_workers(),
+        help="Maximum number of product requests in flight at once in concurrent mode."
+    )
+
+    @api.model
+    def _default_max_workers(self):
+        return max(self.env['ir.config_parameter']._get_number_param('ai_field_generator.max_workers', DEFAULT_MAX_WORKERS), 1)
+
+    @api.model
+    def _default_write_batch_size(self):
+        return max(self.env['ir.config_parameter']._get_number_param('ai_field_generator.write_batch_size', DEFAULT_WRITE_BATCH_SIZE), 1)
 
     @staticmethod
     def _extract_json_objects(text: str):
-        objs = []
-        stack = 0
-        start = None
-        in_str = False
-        esc = False
-
-        for i, ch in enumerate(text):
-            if ch == '"' and not esc:
-                in_str = not in_str
-            esc = (ch == '\\' and not esc)
-            if in_str:
+        return JsonStreamParser().feed(text)
+
+    @staticmethod
+    def _iter_stream_text(stream, meta=None):
+        """Yield the text deltas of a streamed Responses API call.
+
+        When given, ``meta`` receives the ``perf_counter`` time of the first text
+        (``first_text_at``), and the token ``usage`` and ``output`` items of the completed
+        response.
+        """
+        for chunk in stream:
+            if getattr(chunk, 'type', None) == 'response.completed':
+                if meta is not None:
+                    meta['usage'] = getattr(chunk.response, 'usage', None)
+                    meta['output'] = getattr(chunk.response, 'output', None)
                 continue
-            if ch == '{':
-                if stack == 0:
-                    start = i
-                stack += 1
-            elif ch == '}':
-                if stack:
-                    stack -= 1
-                    if stack == 0 and start is not None:
-                        chunk = text[start:i+1]
-                        try:
-                            obj = json.loads(chunk)
-                            if isinstance(obj, dict):
-                                objs.append(obj)
-                        except json.JSONDecodeError:
-                            pass
-                        start = None
-        return objs
+            if getattr(chunk, 'type', None) == 'response.output_text.delta':
+                text = chunk.delta
+            else:
+                text = getattr(chunk, 'output_text', None)
+            if text:
+                if meta is not None:
+                    meta.setdefault('first_text_at', time.perf_counter())
+                yield text
 
     @staticmethod
     def _resolve_part_number(d: dict):
@@ -114,6 +163,534 @@ class AIGeneratedFieldsMultiple(models.TransientModel):
                     return v.strip()
         return None
 
+    def _get_mandatory_specs(self):
+        if self.generate_specifications and self.required_spec_option_ids:
+            return self.required_spec_option_ids.mapped('name')
+        return []
+
+    def _get_openai_client(self):
+        """Shared pooled client of this process; pool and retry settings apply when it is first created."""
+        ICP = self.env['ir.config_parameter'].sudo()
+        return get_client(
+            ICP.get_param('openai_api_key'),
+            base_url=ICP.get_param('ai_field_generator.openai_base_url') or None,
+            max_connections=ICP._get_number_param('ai_field_generator.http_max_connections', DEFAULT_MAX_CONNECTIONS),
+            max_retries=ICP._get_number_param('ai_field_generator.http_max_retries', DEFAULT_MAX_RETRIES),
+        )
+
+    def _get_doc_attachment(self):
+        return self.env['ir.attachment']._get_field_attachment(self, 'doc_attachment')
+
+    def _prepare_vector_store(self, client):
+        if self.doc_mode == 'local':
+            return None
+        attachment = self._get_doc_attachment()
+        if not attachment:
+            return None
+        with attachment._open_content() as fh:
+            return self.env['ai.document.cache']._get_vector_store(
+                client, fh, self.doc_filename or "brand_catalogue.pdf")
+
+    def _prepare_local_index(self):
+        if self.doc_mode != 'local':
+            return
+        attachment = self._get_doc_attachment()
+        if not attachment:
+            return
+        with attachment._open_content() as fh:
+            self.doc_checksum = self.env['ai.document.index']._ensure_index(
+                fh, self.doc_filename or "brand_catalogue.pdf")
+
+    def _format_product_details(self, p):
+        return format_product_details(p, self.env['ai.document.index']._format_passages(self.doc_checksum, p))
+
+    def _get_instructions(self, mandatory, route=None, packed=False, vs_id=None):
+        """Stable prompt prefix of this run, shared by all its products (see tools/prompt_builder).
+
+        The sources it mentions follow the tools of ``route`` (default: web and file search),
+        file search only counting when a vector store ``vs_id`` is sent along.
+        """
+        content_fields = route.content_fields if route else selected_content_fields(self)
+        route = route or DEFAULT_ROUTE
+        return build_instructions(
+            content_fields, tuple(mandatory), (self.global_prompt or '').strip(),
+            describe_sources(route.web_search, bool(route.file_search and vs_id)), packed)
+
+    def _build_prompt(self, p, mandatory, route=None, vs_id=None):
+        return build_prompt(self._get_instructions(mandatory, route, vs_id=vs_id), self._format_product_details(p))
+
+    def _build_pack_prompt(self, products, mandatory, route=None, vs_id=None):
+        return build_prompt(
+            self._get_instructions(mandatory, route, packed=True, vs_id=vs_id),
+            [self._format_product_details(p) for p in products])
+
+    def _get_product_schema(self, mandatory, route=None):
+        """Schema of one product object, limited to the fields selected on the wizard (or ``route``)."""
+        content_fields = route.content_fields if route else selected_content_fields(self)
+        return build_product_schema(content_fields, tuple(mandatory), with_part_number=True)
+
+    def _get_pack_schema(self, mandatory, route=None):
+        return {
+            "type": "object",
+            "properties": {
+                "products": {
+                    "type": "array",
+                    "items": self._get_product_schema(mandatory, route),
+                },
+            },
+            "required": ["products"],
+            "additionalProperties": False,
+        }
+
+    def _prepare_response_request(self, prompt, vs_id, schema, web_search=True, model=AI_MODEL):
+        """Keyword arguments of a Responses API call for one product prompt (or a pack)."""
+        tools = [{"type": "web_search_preview"}] if web_search else []
+        if vs_id:
+            tools.append({
+                "type": "file_search",
+                "vector_store_ids": [vs_id]
+            })
+        return {
+            "model": model,
+            "input": prompt,
+            "tools": tools,
+            "text": {
+                "format": {
+                    "type": "json_schema",
+                    "name": "product_content",
+                    "schema": schema,
+                    "strict": True,
+                }
+            },
+        }
+
+    def _request_product_content(self, client, prompt, vs_id, schema, product_count=1, product_id=None,
+                                 route=DEFAULT_ROUTE):
+        """Stream one Responses API call and return the product objects it produced.
+
+        Packed responses (``{"products": [...]}``) are flattened. Must not touch the
+        ORM: it is called from worker threads in concurrent mode (the rate limiter
+        works on cursors of its own, the call log is only buffered).
+        """
+        Limiter = self.env['ai.rate.limit']
+        Log = self.env['ai.generation.log']
+        estimated = len(prompt) // 4 + OUTPUT_TOKENS_PER_PRODUCT * product_count
+        waited = Limiter._acquire(estimated)
+        reset_retry_count()
+        start = time.perf_counter()
+        log_vals = {
+            'product_id': product_id,
+            'route_id': route.id,
+            'model_name': route.model,
+            'source': 'bulk',
+            'product_count': product_count,
+            'limiter_wait': waited,
+        }
+        parser = JsonStreamParser()
+        results = []
+        meta = {}
+        try:
+            stream = client.responses.create(**self._prepare_response_request(
+                prompt, vs_id if route.file_search else None, schema,
+                web_search=route.web_search, model=route.model), stream=True)
+            for text in self._iter_stream_text(stream, meta):
+                for obj in parser.feed(text):
+                    if isinstance(obj.get('products'), list):
+                        results.extend(item for item in obj['products'] if isinstance(item, dict))
+                    else:
+                        results.append(obj)
+        except Exception as e:
+            log_vals.update(outcome='error', error=str(e), latency=time.perf_counter() - start,
+                            retries=get_retry_count())
+            Log._buffer_log(log_vals)
+            raise
+        latency = time.perf_counter() - start
+        usage = meta.get('usage')
+        Limiter._settle(estimated, getattr(usage, 'total_tokens', None))
+        log_vals.update(
+            outcome='success' if results else 'empty',
+            latency=latency,
+            retries=get_retry_count(),
+            **Log._usage_vals(usage),
+            **Log._tool_call_vals(meta.get('output')),
+        )
+        if 'first_text_at' in meta:
+            log_vals['ttft'] = meta['first_text_at'] - start
+        Log._buffer_log(log_vals)
+        _logger.info("OpenAI %s response (route %s) in %.2fs (%.2fs rate limited): %s object(s), "
+                     "%s/%s input tokens cached, %s output tokens, schema fields %s",
+                     route.model, route.name, latency, waited, len(results),
+                     log_vals.get('cached_tokens'), log_vals.get('input_tokens'),
+                     log_vals.get('output_tokens'), sorted(schema['properties']))
+        return results
+
+    def _prepare_product_vals(self, rec):
+        vals = {'ai_response_json': rec}
+        if self.generate_title and rec.get('product_title'):
+            vals['product_title'] = rec['product_title']
+        if self.generate_shortDesc and rec.get('short_description'):
+            vals['short_description'] = rec['short_description']
+        if self.generate_description and rec.get('ecom_description'):
+            vals['ecom_description'] = rec['ecom_description']
+        if self.generate_keywords and rec.get('ecom_keywords'):
+            vals['ecom_keywords'] = rec['ecom_keywords']
+        if self.generate_disclaimer and rec.get('ecom_disclaimer'):
+            vals['ecom_disclaimer'] = rec['ecom_disclaimer']
+        if self.generate_specifications and isinstance(rec.get('specifications'), dict):
+            vals['specification_lines'] = list(rec['specifications'].items())
+        return vals
+
+    def _collect_product_vals(self, pending, product, records, products_by_part):
+        """Buffer the values of ``records`` into ``pending`` ({product id: vals}).
+
+        Each object goes to the selected product with its part number, falling back to
+        ``product``, the one the request was made for.
+        """
+        for rec in records:
+            target = products_by_part.get(self._resolve_part_number(rec)) or product
+            pending.setdefault(target.id, {}).update(self._prepare_product_vals(rec))
+
+    def _write_product_vals(self, pending, key_cache=None):
+        """Write buffered values and empty ``pending``.
+
+        Specification lines of all products are synced in one pass (see
+        ``sync_specifications``); field writes are left to the ORM, which flushes them together.
+        ``key_cache`` keeps the specification key ids resolved during the run.
+        """
+        self.env['ai.generation.log']._flush_buffer()
+        if not pending:
+            return
+        settings = self._get_generation_settings()
+        spec_lines = {
+            product_id: vals.pop('specification_lines')
+            for product_id, vals in pending.items()
+            if 'specification_lines' in vals
+        }
+        if spec_lines:
+            key_ids = self.env['motorstate.spec.key']._resolve_ids(
+                [name for pairs in spec_lines.values() for name, _value in pairs], key_cache)
+            counts = sync_specifications(self.env['motorstate.spec'], 'product_id', spec_lines, key_ids=key_ids)
+            _logger.info("Specifications synced for %s product(s): %s", len(spec_lines), counts)
+        for product in self.env['motorstate.product'].browse(list(pending)):
+            if pending[product.id]:
+                product.write(dict(pending[product.id], **product._prepare_ai_generated_vals(settings)))
+        pending.clear()
+
+    def _apply_product_content(self, product, records, key_cache=None):
+        pending = {}
+        self._collect_product_vals(pending, product, records, {})
+        self._write_product_vals(pending, key_cache)
+
+    def _get_routes(self):
+        """Routes sharing out the selected fields, see ``ai.generation.route``."""
+        return plan_routes(selected_content_fields(self), self.env['ai.generation.route']._get_rules(), DEFAULT_ROUTE)
+
+    def _get_batch_route(self):
+        """Default route with the selected fields, without web search, which the Batch API does not offer."""
+        return DEFAULT_ROUTE._replace(content_fields=selected_content_fields(self), web_search=False)
+
+    def _get_response_cache_key(self, product, mandatory, vs_id, route=DEFAULT_ROUTE):
+        return self.env['ai.response.cache']._make_route_key(
+            product, route, mandatory, self.global_prompt, vs_id, self.doc_checksum)
+
+    def _lookup_cached_content(self, key):
+        if self.force_refresh:
+            return None
+        return self.env['ai.response.cache']._lookup(key)
+
+    def _lookup_routes_content(self, product, mandatory, vs_id, routes):
+        """Cached objects of ``product`` per route, and the routes missing from the cache."""
+        cached, missing = [], []
+        for route in routes:
+            records = self._lookup_cached_content(self._get_response_cache_key(product, mandatory, vs_id, route))
+            if records is None:
+                missing.append(route)
+            else:
+                cached.append(records)
+        return cached, missing
+
+    def _get_product_content(self, client, product, mandatory, vs_id):
+        """Generated objects for ``product``, from the response cache when the inputs are unchanged.
+
+        Each route is requested separately and the partial objects merged.
+        """
+        parts = []
+        for route in self._get_routes():
+            key = self._get_response_cache_key(product, mandatory, vs_id, route)
+            records = self._lookup_cached_content(key)
+            if records is None:
+                records = self._request_product_content(
+                    client, self._build_prompt(product, mandatory, route, vs_id), vs_id,
+                    self._get_product_schema(mandatory, route), product_id=product.id, route=route)
+                if records:
+                    self.env['ai.response.cache']._store(key, records, route.model, product)
+            parts.append(records)
+        return merge_route_records(parts)
+
+    def _generate_product(self, client, product, mandatory, vs_id, key_cache=None):
+        records = self._get_product_content(client, product, mandatory, vs_id)
+        self._apply_product_content(product, records, key_cache)
+        return records
+
+    def _split_into_packs(self, products):
+        """Group ``products`` for packed requests, by ``pack_size`` or by the token budget."""
+        if self.pack_size > 0:
+            for offset in range(0, len(products), self.pack_size):
+                yield products[offset:offset + self.pack_size]
+            return
+        budget = self.env['ir.config_parameter']._get_number_param(
+            'ai_field_generator.pack_token_budget', DEFAULT_PACK_TOKEN_BUDGET)
+        pack = self.env['motorstate.product']
+        used = 0
+        for p in products:
+            # Rough estimate: ~4 characters per input token, plus the expected output
+            cost = len(self._format_product_details(p)) // 4 + OUTPUT_TOKENS_PER_PRODUCT
+            if pack and (used + cost > budget or len(pack) >= MAX_AUTO_PACK_SIZE):
+                yield pack
+                pack, used = self.env['motorstate.product'], 0
+            pack |= p
+            used += cost
+        if pack:
+            yield pack
+
+    def _generate_pack(self, client, pack, mandatory, vs_id, route=DEFAULT_ROUTE):
+        """Generate the ``route`` fields of several products with one request.
+
+        Objects are routed back by part number; products missing from the answer are
+        requested again on their own. Returns {product id: objects}.
+        """
+        records_by_product = {}
+        if len(pack) > 1:
+            records = self._request_product_content(
+                client, self._build_pack_prompt(pack, mandatory, route, vs_id), vs_id,
+                self._get_pack_schema(mandatory, route), product_count=len(pack), route=route)
+            by_part = {(p.part_number or '').strip().casefold(): p for p in pack}
+            for rec in records:
+                target = by_part.get((self._resolve_part_number(rec) or '').casefold())
+                if target:
+                    records_by_product.setdefault(target.id, []).append(rec)
+        for p in pack:
+            product_records = records_by_product.get(p.id)
+            if not product_records:
+                if len(pack) > 1:
+                    _logger.info("Part %s missing from a packed response, retrying it alone", p.part_number)
+                product_records = self._request_product_content(
+                    client, self._build_prompt(p, mandatory, route, vs_id), vs_id,
+                    self._get_product_schema(mandatory, route), product_id=p.id, route=route)
+            if product_records:
+                key = self._get_response_cache_key(p, mandatory, vs_id, route)
+                self.env['ai.response.cache']._store(key, product_records, route.model, p)
+            records_by_product[p.id] = product_records
+        return records_by_product
+
+    def _generate_sequential(self, client, products, mandatory, vs_id):
+        """Generate ``products`` one request after the other, committing every ``write_batch_size``.
+
+        A product (or pack) whose generation fails is rolled back to its savepoint and
+        reported at the end; the results of the others are still written.
+        """
+        products_by_part = {p.part_number: p for p in products if p.part_number}
+        batch_size = max(self.write_batch_size or 1, 1)
+        pending = {}
+        key_cache = {}
+        errors = []
+
+        def flush_if_full():
+            if len(pending) >= batch_size:
+                self._write_product_vals(pending, key_cache)
+                self.env.cr.commit()
+
+        if self.pack_products:
+            routes = self._get_routes()
+            todo = {}
+            for p in products:
+                cached, missing = self._lookup_routes_content(p, mandatory, vs_id, routes)
+                if missing:
+                    todo[p.id] = (cached, missing)
+                else:
+                    self._collect_product_vals(pending, p, merge_route_records(cached), products_by_part)
+                    flush_if_full()
+            for pack in self._split_into_packs(products.browse(list(todo))):
+                # Per route, only the products without a cached answer for it go into the request
+                parts = {p.id: list(todo[p.id][0]) for p in pack}
+                try:
+                    with self.env.cr.savepoint():
+                        for route in routes:
+                            route_pack = pack.filtered(lambda p: route in todo[p.id][1])
+                            if route_pack:
+                                for product_id, records in self._generate_pack(
+                                        client, route_pack, mandatory, vs_id, route).items():
+                                    parts[product_id].append(records)
+                except Exception as e:
+                    _logger.exception("AI generation failed for parts %s", pack.mapped('part_number'))
+                    errors.extend("%s: %s" % (p.part_number, e) for p in pack)
+                    continue
+                for p in pack:
+                    self._collect_product_vals(pending, p, merge_route_records(parts[p.id]), {})
+                flush_if_full()
+        else:
+            for p in products:
+                try:
+                    with self.env.cr.savepoint():
+                        records = self._get_product_content(client, p, mandatory, vs_id)
+                except Exception as e:
+                    _logger.exception("AI generation failed for part %s", p.part_number)
+                    errors.append("%s: %s" % (p.part_number, e))
+                    continue
+                self._collect_product_vals(pending, p, records, products_by_part)
+                flush_if_full()
+        self._write_product_vals(pending, key_cache)
+        self.env.cr.commit()
+        self._raise_generation_errors(errors)
+
+    def _raise_generation_errors(self, errors):
+        """Report the products that failed, once the results of the others are committed."""
+        if errors:
+            raise UserError(_(
+                "AI generation failed for %(count)s product(s):\n%(errors)s",
+                count=len(errors),
+                errors="\n".join(errors),
+            ))
+
+    def _generate_product_worker(self, client, product_id, requests, vs_id, cached, key_cache):
+        """Run in a worker thread: call OpenAI for each route, then write on a private cursor.
+
+        ``requests`` holds ``(route, prompt, schema, cache key)`` tuples for the routes
+        missing from the cache, ``cached`` the objects of the others. ``key_cache`` is
+        shared by all workers of the run.
+        """
+        parts = list(cached)
+        answers = []
+        for route, prompt, schema, key in requests:
+            records = self._request_product_content(client, prompt, vs_id, schema, product_id=product_id, route=route)
+            answers.append((route, key, records))
+            parts.append(records)
+        records = merge_route_records(parts)
+        # Committed before the write cursor starts, so its snapshot sees the new keys
+        self.env['motorstate.spec.key']._ensure_keys(
+            [name for rec in records if isinstance(rec.get('specifications'), dict)
+             for name in rec['specifications']], key_cache)
+        with self.pool.cursor() as cr:
+            wizard = self.with_env(self.env(cr=cr))
+            product = wizard.env['motorstate.product'].browse(product_id)
+            wizard._apply_product_content(product, records, key_cache)
+            for route, key, records in answers:
+                if records:
+                    wizard.env['ai.response.cache']._store(key, records, route.model, product)
+        return product_id
+
+    def _generate_concurrent(self, client, products, mandatory, vs_id):
+        # Cache hits are applied right away; prompts for the misses are rendered on the
+        # request cursor so workers only get plain values.
+        routes = self._get_routes()
+        jobs = []
+        pending = {}
+        for p in products:
+            cached, missing = self._lookup_routes_content(p, mandatory, vs_id, routes)
+            if not missing:
+                self._collect_product_vals(pending, p, merge_route_records(cached), {})
+                continue
+            requests = [
+                (route, self._build_prompt(p, mandatory, route, vs_id), self._get_product_schema(mandatory, route),
+                 self._get_response_cache_key(p, mandatory, vs_id, route))
+                for route in missing
+            ]
+            jobs.append((p.id, p.part_number, requests, cached))
+        key_cache = {}
+        self._write_product_vals(pending, key_cache)
+        self.env.cr.commit()
+
+        max_workers = max(self.max_workers or 1, 1)
+        errors = []
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ai_fields') as executor:
+            futures = {
+                executor.submit(self._generate_product_worker, client, product_id, requests, vs_id, cached,
+                                key_cache): part_no
+                for product_id, part_no, requests, cached in jobs
+            }
+            for future in as_completed(futures):
+                part_no = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    _logger.exception("AI generation failed for part %s", part_no)
+                    errors.append("%s: %s" % (part_no, e))
+        # Calls of failed workers are still buffered, and this transaction is rolled back if any failed
+        self.env['ai.generation.log']._commit_buffer()
+        self._raise_generation_errors(errors)
+
+    def _get_generation_settings(self):
+        return self.env['motorstate.product']._make_generation_settings(
+            selected_content_fields(self),
+            self.required_spec_option_ids if self.generate_specifications else self.env['ai.spec.option'],
+            self.global_prompt,
+            doc_checksum=self.doc_checksum,
+            vector_store_id=self.vector_store_id,
+        )
+
+    @api.model
+    def _prepare_options_from_settings(self, settings):
+        """``ai.generation.options`` values regenerating content stored with ``settings``."""
+        content_fields = set(settings.get('fields') or ())
+        vals = {flag: prop in content_fields for flag, prop in CONTENT_FIELDS}
+        vector_store_id = settings.get('vector_store_id')
+        if vector_store_id and not self.env['ai.document.cache'].search_count(
+                [('vector_store_id', '=', vector_store_id)]):
+            # Evicted from the document cache: the remote vector store is gone
+            vector_store_id = False
+        vals.update(
+            global_prompt=settings.get('global_prompt') or False,
+            required_spec_option_ids=[(6, 0, self.env['ai.spec.option'].browse(
+                settings.get('required_spec_option_ids') or []).exists().ids)],
+            doc_checksum=settings.get('doc_checksum') or False,
+            vector_store_id=vector_store_id or False,
+        )
+        return vals
+
+    def _prepare_generation_options(self, vs_id):
+        """Values for an ``ai.generation.options`` record reproducing this wizard."""
+        return {
+            'global_prompt': self.global_prompt,
+            'generate_title': self.generate_title,
+            'generate_description': self.generate_description,
+            'generate_keywords': self.generate_keywords,
+            'generate_disclaimer': self.generate_disclaimer,
+            'generate_shortDesc': self.generate_shortDesc,
+            'generate_specifications': self.generate_specifications,
+            'required_spec_option_ids': [(6, 0, self.required_spec_option_ids.ids)],
+            'force_refresh': self.force_refresh,
+            'vector_store_id': vs_id,
+            'doc_checksum': self.doc_checksum,
+        }
+
+    def _enqueue_generation_job(self, vs_id):
+        job = self.env['ai.generation.job'].create(dict(
+            self._prepare_generation_options(vs_id),
+            task_ids=[(0, 0, {'product_id': p.id}) for p in self.product_ids],
+        ))
+        job._trigger_processing()
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': 'ai.generation.job',
+            'res_id': job.id,
+            'view_mode': 'form',
+            'target': 'current',
+        }
+
+    def _create_generation_batch(self, vs_id):
+        batch = self.env['ai.generation.batch'].create(dict(
+            self._prepare_generation_options(vs_id),
+            product_ids=[(6, 0, self.product_ids.ids)],
+        ))
+        batch._trigger_processing()
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': 'ai.generation.batch',
+            'res_id': batch.id,
+            'view_mode': 'form',
+            'target': 'current',
+        }
+
     def action_generate_ai_fields_multiple(self):
         self.ensure_one()
         if not any([
@@ -127,119 +704,28 @@ class AIGeneratedFieldsMultiple(models.TransientModel):
             raise UserError(_("Please select at least one field to generate."))
         if not self.product_ids:
             raise UserError(_("Please select at least one product."))
+        if self.stale_only:
+            self.product_ids = self.product_ids.filtered('ai_content_stale')
+            if not self.product_ids:
+                raise UserError(_("None of the selected products has stale AI content."))
 
-        mandatory = []
-        if self.generate_specifications and self.required_spec_option_ids:
-            mandatory = self.required_spec_option_ids.mapped('name')
-
-        api_key = self.env['ir.config_parameter'].sudo().get_param('openai_api_key')
-        client = OpenAI(api_key=api_key)
-
-        vs_id = None
-        if self.doc_attachment:
-            file_data = base64.b64decode(self.doc_attachment)
-            file_content = BytesIO(file_data)
-            file_name = self.doc_filename or "brand_catalogue.pdf"
-            upload = client.files.create(
-                file=(file_name, file_content),
-                purpose="assistants"
-            )
-            f_id = upload.id
-            if not f_id:
-                raise UserError(_("OpenAI upload failed: no file id returned."))
-            vector_store = client.vector_stores.create(
-                name=f"Knowledge_base_{file_name}",
-            )
-            vs_id = vector_store.id
-            if not vs_id:
-                raise UserError(_("Vector store creation returned no id."))
-            client.vector_stores.files.create(
-                vector_store_id=vs_id,
-                file_id=f_id
-            )
-
-        for p in self.product_ids:
-            base_prompt = (
-                f"""
-                You are an AI assistant that generates product content for ecommerce website.
-                Generate the details for the following product using the available information over the internet and file provided.
-
-                Product Details:
-                Part Number: {p.part_number or ''}
-                Part Name: {p.part_name or ''}
-                Brand: {p.part_brand or ''}
-                Product Info: {{\"part_length\": {p.part_length or ''}, \"part_width\": {p.part_width or ''}, \"part_height\": {p.part_height or ''}}}
-                Long Description: {p.part_description or ''}
-                Category: {{\"Category 1\": {p.categ_lvl_1 or ''}, \"Category 2\": {p.categ_lvl_2 or ''}, \"Category 3\": {p.categ_lvl_3 or ''}}}
-
-                Required Specifications: 
-                The JSON field 'specifications' must include ALL of
-                f\"these keys (in addition to any others you find): {json.dumps(mandatory)}.\"
-                Use EXACT sequence, casing for keys, and supply accurate string values.
-
-                Consider the special requests mentioned here: {self.global_prompt}
-                
-                Formatting instructions:
-                Include all the relevant specifications required related to the product. 
-                Make sure the specification title and it's value starts with an upper case always.
-                Use only Camel Case for everything you generate even if the information provided is all uppercase.
-                """
-            )
-
-            stream = client.responses.create(
-                model="gpt-4o",
-                input=base_prompt,
-                tools=[{"type": "web_search_preview"}] if not vs_id else
-                      [{"type": "web_search_preview"}, {
-                          "type": "file_search",
-                          "vector_store_ids": [vs_id]
-                      }],
-                text={
-                    "format": {
-                        "type": "json_schema",
-                        "name": "product_content",
-                        "schema": self.PRODUCT_CONTENT_SCHEMA,
-                        "strict": True,
-                    }
-                },
-                stream=True,
-            )
-
-            buffer = ""
-            for chunk in stream:
-                if getattr(chunk, 'output_text', None):
-                    buffer += chunk.output_text
-                    for rec in self._extract_json_objects(buffer):
-                        part_no = self._resolve_part_number(rec)
-                        prod = self.env['motorstate.product'].search(
-                            [('part_number', '=', part_no)], limit=1
-                        )
-                        if not prod:
-                            continue
-
-                        vals = {'ai_response_json': rec}
-                        if self.generate_title and rec.get('product_title'):
-                            vals['product_title'] = rec['product_title']
-                        if self.generate_shortDesc and rec.get('short_description'):
-                            vals['short_description'] = rec['short_description']
-                        if self.generate_description and rec.get('ecom_description'):
-                            vals['ecom_description'] = rec['ecom_description']
-                        if self.generate_keywords and rec.get('ecom_keywords'):
-                            vals['ecom_keywords'] = rec['ecom_keywords']
-                        if self.generate_disclaimer and rec.get('ecom_disclaimer'):
-                            vals['ecom_disclaimer'] = rec['ecom_disclaimer']
-                        if self.generate_specifications and isinstance(rec.get('specifications'), dict):
-                            spec_cmds = [(5, 0, 0)]
-                            for k, v in rec['specifications'].items():
-                                spec_cmds.append((0, 0, {
-                                    'name':  k,
-                                    'value': v
-                                }))
-                            vals['specification_ids'] = spec_cmds
-
-                        prod.write(vals)
-                        self.env.cr.commit()
-
-                        buffer = buffer.replace(json.dumps(rec), '')
-
-        return {'type': 'ir.actions.act_window_close'}
\ No newline at end of file
+        mandatory = self._get_mandatory_specs()
+
+        client = self._get_openai_client()
+        vs_id = self._prepare_vector_store(client)
+        self.vector_store_id = vs_id
+        self._prepare_local_index()
+
+        if self.run_mode == 'background':
+            return self._enqueue_generation_job(vs_id)
+        if self.run_mode == 'batch':
+            return self._create_generation_batch(vs_id)
+        if self.run_mode == 'concurrent':
+            # Workers commit on their own cursors; make sure the wizard is visible to them.
+            self.env.cr.commit()
+            self._generate_concurrent(client, self.product_ids, mandatory, vs_id)
+        else:
+            self._generate_sequential(client, self.product_ids, mandatory, vs_id)
+        _logger.info("Response cache stats: %s", self.env['ai.response.cache']._get_stats())
+
+        return {'type': 'ir.actions.act_window_close'}
@@ -1,11 +1,19 @@
 from odoo import _, api, fields, models
 from odoo.exceptions import UserError
 import openai
-from openai import OpenAI
 import json
-import base64
-from io import BytesIO
-import pdfplumber
+import logging
+import time
+from ..tools.spec_sync import sync_specifications
+from ..tools.product_schema import build_product_schema, selected_content_fields
+from ..tools.prompt_builder import (
+    build_instructions, build_prompt, describe_sources, format_product_details,
+)
+from ..tools.openai_client import get_retry_count, reset_retry_count
+from ..tools.routing import merge_route_records, plan_routes
+from .ai_generated_fields_multiple import DEFAULT_ROUTE, OUTPUT_TOKENS_PER_PRODUCT
+
+_logger = logging.getLogger(__name__)
 
 class AIGeneratedFieldsWizard(models.TransientModel):
     _name = 'ai.generated.fields.wizard'
@@ -14,6 +22,7 @@ class AIGeneratedFieldsWizard(models.TransientModel):
     product_id = fields.Many2one('motorstate.product', required=True, readonly=True)
     doc_filename = fields.Char("Document Filename")
     doc_attachment = fields.Binary("Supporting Document", attachment=True, help="Upload a PDF/DOCX/TXT that will be sent to the AI")
+    doc_mode = fields.Selection([('vector_store', 'OpenAI File Search'), ('local', 'Local Index')], string="Document Search", default='vector_store', required=True, help="Local Index extracts the document text on the server and adds the passages matching the product to the prompt, instead of uploading it to OpenAI.")
     global_prompt = fields.Char("Global Prompt", help="Any specific requirements that you want AI to consider goes here. Eg: tone, voice, language, keywords, brand info...")
     generate_title = fields.Boolean("Generate Product Title")
     generate_description = fields.Boolean("Generate Ecom Description")
@@ -22,24 +31,14 @@ class AIGeneratedFieldsWizard(models.TransientModel):
     generate_shortDesc = fields.Boolean("Generate Short Description")
     generate_specifications = fields.Boolean("Generate Specifications", default=False)
     required_spec_option_ids = fields.Many2many('ai.spec.option', string="Required Specifications")
+    force_refresh = fields.Boolean("Force Refresh", help="Ignore a previously generated response for identical inputs and call OpenAI again.")
 
-    PRODUCT_CONTENT_SCHEMA = {
-        "type": "object",
-        "properties": {
-            "product_title": {"type": "string"},
-            "short_description": {"type": "string"},
-            "ecom_description": {"type": "string"},
-            "ecom_keywords": {"type": "string"},
-            "ecom_disclaimer": {"type": "string"},
-            "specifications": {
-                "type": "object",
-                "properties": {},
-                "additionalProperties": {"type": "string"},
-            }
-        },
-        "required": ["product_title", "short_description", "ecom_description", "ecom_keywords","ecom_disclaimer","specifications"],
-        "additionalProperties": False,
-    }
+    def _log_failed_call(self, log_vals, error):
+        # This transaction is rolled back: the entry is committed on a cursor of its own
+        if log_vals is not None and 'outcome' not in log_vals:
+            log_vals.update(outcome='error', error=str(error), retries=get_retry_count())
+            self.env['ai.generation.log']._buffer_log(log_vals)
+        self.env['ai.generation.log']._commit_buffer()
 
     def action_generate_ai_fields(self):
         if not (self.generate_title or self.generate_description or self.generate_keywords or self.generate_shortDesc or self.generate_disclaimer or self.generate_specifications):
@@ -50,110 +49,99 @@ class AIGeneratedFieldsWizard(models.TransientModel):
             mandatory = self.required_spec_option_ids.mapped('name')
         
         product = self.product_id
+        content_fields = selected_content_fields(self)
 
-        #Build Full Prompt
-        base_prompt = (
-            f"""
-            You are an AI assistant that generates product content for ecommerce website.
-            Generate the details for the following product using the available information over the internet and file provided.
-
-            Product Details:
-            Part Number: {product.part_number or ''}
-            Part Name: {product.part_name or ''}
-            Brand: {product.part_brand or ''}
-            Product Info: {{"part_length": {product.part_length or ''}, "part_width": {product.part_width or ''}, "part_height": {product.part_height or ''}}}
-            Long Description: {product.part_description or ''}
-            Category: {{"Category 1": {product.categ_lvl_1 or ''}, "Category 2": {product.categ_lvl_2 or ''}, "Category 3": {product.categ_lvl_3 or ''}}}
-
-            Required Specifications: 
-            The JSON field 'specifications' must include ALL of
-            f"these keys (in addition to any others you find): {json.dumps(mandatory)}."
-            Use EXACT sequence, casing for keys, and supply accurate string values.
-
-            Consider the special requests mentioned here: {self.global_prompt}
-
-            Formatting instructions:
-            Include all the relevant specifications required related to the product. 
-            Make sure the specification title and it's value starts with an upper case always.
-            Use only Camel Case for everything you generate even if the information provided is all uppercase. (first letter uppercase, rest all lowercase)"""
-        )
+        # Read the document from the filestore rather than through the base64 field value
+        attachment = self.env['ir.attachment']._get_field_attachment(self, 'doc_attachment')
+        file_name = self.doc_filename or "brand_catalogue.pdf"
+
+        doc_checksum = None
+        if attachment and self.doc_mode == 'local':
+            with attachment._open_content() as fh:
+                doc_checksum = self.env['ai.document.index']._ensure_index(fh, file_name)
+        document_passages = self.env['ai.document.index']._format_passages(doc_checksum, product)
+        details = format_product_details(product, document_passages)
+        global_prompt = (self.global_prompt or '').strip()
 
         # Call OpenAI
-        api_key = self.env['ir.config_parameter'].sudo().get_param('openai_api_key')
-        
-        client = OpenAI(api_key=api_key)
+        client = self.env['ai.generated.fields.multiple']._get_openai_client()
 
 
         #semantic_file_search
-        if self.doc_attachment:
-            file_data = base64.b64decode(self.doc_attachment)
-            file_content = BytesIO(file_data)
-            file_name = self.doc_filename or "brand_catalogue.pdf"
-            file_tuple = (file_name, file_content)
-
-            upload = client.files.create(                                                       #upload file
-                file=file_tuple,
-                purpose="assistants"
-            )
-            f_id = upload.id
-            if not f_id:
-                raise UserError(_("OpenAI upload failed: no file id returned."))
-
-            vector_store = client.vector_stores.create(                                         #create vectorstore
-                name= f"Knowledge_base_{(product.part_brand or self.doc_filename)}",
-            )
-            vs_id = vector_store.id
-            if not vs_id:
-                raise UserError(_("Vector store creation returned no id."))
-
-            result = client.vector_stores.files.create(                                         #add uploaded file to the vector_store
-                vector_store_id=vs_id,
-                file_id=f_id
-            )
-        
+        vs_id = None
+        if attachment and self.doc_mode != 'local':
+            with attachment._open_content() as fh:
+                vs_id = self.env['ai.document.cache']._get_vector_store(client, fh, file_name)
+
+        Cache = self.env['ai.response.cache']
+        Generator = self.env['ai.generated.fields.multiple']
+        Limiter = self.env['ai.rate.limit']
+        Log = self.env['ai.generation.log']
+        # Same routing as the multi-product wizard: one request per model and tool set
+        routes = plan_routes(content_fields, self.env['ai.generation.route']._get_rules(), DEFAULT_ROUTE)
+
+        log_vals = None
         try:
-            if self.doc_attachment:                            #generate with vector_store
-                response = client.responses.create(
-                    model="gpt-4o",
-                    tools=[{
-                        "type": "web_search_preview",
-                        "type": "file_search",
-                        "vector_store_ids": [vs_id]
-                        }],
-                    input=base_prompt,
-                    text={
-                        "format": {
-                            "type": "json_schema",
-                            "name": "product_content",
-                            "schema": self.PRODUCT_CONTENT_SCHEMA,
-                            "strict": True,
-                        }
-                    }
-                )
-
-            else:                                               #generate without vector_store
-                response = client.responses.create(
-                    model="gpt-4o",
-                    tools=[{
-                        "type": "web_search_preview"
-                        }],
-                    input=base_prompt,
-                    text={
-                        "format": {
-                            "type": "json_schema",
-                            "name": "product_content",
-                            "schema": self.PRODUCT_CONTENT_SCHEMA,
-                            "strict": True,
-                        }
+            parts = []
+            for route in routes:
+                # A failure is logged against the call of this route, never a previous one
+                log_vals = None
+                # Same schema and key as the multi-product wizard, so both share cached answers
+                schema = build_product_schema(route.content_fields, tuple(mandatory), with_part_number=True)
+                cache_key = Cache._make_route_key(product, route, mandatory, global_prompt, vs_id, doc_checksum)
+                records = None if self.force_refresh else Cache._lookup(cache_key, source='single')
+                if records is None:
+                    # Instructions first and product last, so OpenAI can reuse the cached prefix
+                    prompt = build_prompt(
+                        build_instructions(
+                            route.content_fields, tuple(mandatory), global_prompt,
+                            describe_sources(route.web_search, bool(route.file_search and vs_id))),
+                        details,
+                    )
+                    # Interactive call: allowed into the share of the rate limit kept from bulk runs
+                    estimated = len(prompt) // 4 + OUTPUT_TOKENS_PER_PRODUCT
+                    waited = Limiter._acquire(estimated, interactive=True)
+                    log_vals = {
+                        'product_id': product.id,
+                        'route_id': route.id,
+                        'model_name': route.model,
+                        'source': 'single',
+                        'limiter_wait': waited,
                     }
-                )
-        
-            # Try to load JSON response
-            try:
-                result_json = response.output_text
-                data = json.loads(result_json)
-            except json.JSONDecodeError as e:
-                raise UserError(_("Could not parse AI response as JSON. Response was:\n%s") % result_json)
+                    reset_retry_count()
+                    start = time.perf_counter()
+                    response = client.responses.create(**Generator._prepare_response_request(
+                        prompt, vs_id if route.file_search else None, schema,
+                        web_search=route.web_search, model=route.model))
+
+                    # Try to load JSON response
+                    try:
+                        result_json = response.output_text
+                        data = json.loads(result_json)
+                    except json.JSONDecodeError as e:
+                        raise UserError(_("Could not parse AI response as JSON. Response was:\n%s") % result_json)
+                    Limiter._settle(estimated, getattr(response.usage, 'total_tokens', None))
+                    log_vals.update(
+                        outcome='success' if data else 'empty',
+                        latency=time.perf_counter() - start,
+                        retries=get_retry_count(),
+                        **Log._usage_vals(response.usage),
+                        **Log._tool_call_vals(response.output),
+                    )
+                    Log._buffer_log(log_vals)
+                    # On a cursor of its own: a later route may fail and roll this transaction back
+                    Log._commit_buffer()
+                    _logger.info("OpenAI %s response (route %s) for %s in %.2fs (%.2fs rate limited): "
+                                 "%s/%s input tokens cached, %s output tokens, schema fields %s",
+                                 route.model, route.name, product.part_number, time.perf_counter() - start, waited,
+                                 log_vals.get('cached_tokens'), log_vals.get('input_tokens'),
+                                 log_vals.get('output_tokens'), list(route.content_fields))
+
+                    records = [data] if data else []
+                    if records:
+                        Cache._store(cache_key, records, route.model, product)
+                parts.append(records)
+            data = (merge_route_records(parts) or [{}])[0]
 
             if self.generate_title:
                 product.product_title = data.get('product_title')
@@ -167,9 +155,7 @@ class AIGeneratedFieldsWizard(models.TransientModel):
                 product.ecom_disclaimer = data.get('ecom_disclaimer')
             if self.generate_specifications and data.get('specifications'):
                 specs = data.get('specifications')
-                product.specification_ids = [(5, 0, 0)]  # Remove existing lines
-                # build new lines
-                new_lines = []
+                pairs = []
                 for key, full_spec in specs.items():
                     # full_spec is like "Brand: A-1 PRODUCTS"
                     if ': ' in full_spec:
@@ -177,16 +163,26 @@ class AIGeneratedFieldsWizard(models.TransientModel):
                     else:
                         # fallback if no colon
                         name, val = key, full_spec
-                    new_lines.append((0, 0, {
-                        'product_id': product.id,
-                        'name':  name,
-                        'value': val,
-                    }))
-
-                # assign them
-                product.specification_ids = new_lines
+                    pairs.append((name, val))
+                key_ids = self.env['motorstate.spec.key']._resolve_ids([name for name, _val in pairs])
+                sync_specifications(self.env['motorstate.spec'], 'product_id', {product.id: pairs}, key_ids=key_ids)
+
+            settings = product._make_generation_settings(
+                content_fields,
+                self.required_spec_option_ids if self.generate_specifications else self.env['ai.spec.option'],
+                self.global_prompt,
+                doc_checksum=doc_checksum,
+                vector_store_id=vs_id,
+            )
+            product.write(product._prepare_ai_generated_vals(settings))
+            # Cache hits are logged even when no route called OpenAI
+            Log._commit_buffer()
 
+        except openai.RateLimitError as e:
+            self._log_failed_call(log_vals, e)
+            raise UserError(_("OpenAI is still rate limiting after several retries, please try again later.\n%s") % e)
         except Exception as e:
+            self._log_failed_call(log_vals, e)
             raise UserError(_("OpenAI API Error: %s" % str(e)))
 
         return {'type': 'ir.actions.act_window_close'}
\ No newline at end of file